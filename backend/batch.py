@@ -0,0 +1,288 @@
+"""
+Batch runner for many statements.
+
+Statements (directories and/or glob patterns) are OCR'd and parsed in a
+pool of warm worker processes; grouping, cleaning and categorisation run in
+this process as parsed statements come back, with one shared categoriser.
+
+Progress is tracked per statement in <out-dir>/manifest.json:
+
+  - parsed:      parsed lines saved to <out-dir>/lines/<name>.json
+  - categorised: transactions saved to <out-dir>/<name>.json and upserted
+                 into the spend ledger (see spendLedger.py)
+
+Statements are identified by content hash, so an interrupted or crashed run
+picks up where it stopped: categorised statements are skipped and parsed
+ones are only categorised. A statement that fails OCR or categorisation is
+recorded with its error in the manifest and the batch moves on; the next
+run retries only the stage that failed. All files are written atomically.
+
+Run from backend/:
+    python batch.py "bankStatements/*.pdf" --out-dir batchOutput --workers 4
+
+With --metrics-report (or METRICS_REPORT) a JSON report of stage timings and
+counters is written at the end; worker OCR time is recorded as `batch.ocr`.
+"""
+
+import argparse
+import glob
+import json
+import logging
+import multiprocessing
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import instrumentation
+from instrumentation import configureLogging, count, recordSpan
+from ocr.ocrCache import fileDigest
+from ocr.worker import initOcrWorker, ocrStatement
+from pipeline import StatementPipeline
+from records import recordToDict
+from spendLedger import SpendLedger
+
+STATEMENT_SUFFIXES = (".pdf", ".png", ".jpg", ".jpeg")
+
+logger = logging.getLogger(__name__)
+
+
+def writeJsonAtomic(path: Path, data: Any) -> None:
+    """
+    Write JSON via a temp file + rename, so readers (and resumed runs) never
+    see a partially written file.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(suffix=".tmp", dir=path.parent)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False, default=recordToDict)
+        os.replace(tmp, path)
+    except BaseException:
+        os.remove(tmp)
+        raise
+
+
+def findStatements(inputs: List[str]) -> List[str]:
+    """
+    Expand directories and glob patterns into a sorted list of statement files.
+    """
+    found = set()
+    for item in inputs:
+        if os.path.isdir(item):
+            candidates = [str(p) for p in Path(item).rglob("*")]
+        else:
+            candidates = glob.glob(item, recursive=True)
+        found.update(
+            os.path.abspath(p)
+            for p in candidates
+            if os.path.isfile(p) and p.lower().endswith(STATEMENT_SUFFIXES)
+        )
+    return sorted(found)
+
+
+def _ocrJob(job: Tuple[str, str]) -> Dict[str, Any]:
+    """
+    Runs in a warm worker process. Failures are returned rather than raised so
+    one bad statement does not stop the batch.
+    """
+    key, path = job
+    try:
+        return {"key": key, **ocrStatement(path)}
+    except Exception as exc:
+        return {"key": key, "error": f"{type(exc).__name__}: {exc}"}
+
+
+class BatchRunner:
+    """
+    Args:
+        out_dir: Directory for results, parsed lines and the manifest
+        workers: Number of OCR worker processes
+    """
+
+    def __init__(self, out_dir: str, workers: Optional[int] = None):
+        self.out_dir = Path(out_dir)
+        self.workers = workers or int(os.getenv("OCR_WORKERS", os.cpu_count() or 1))
+        self.manifest_path = self.out_dir / "manifest.json"
+        self.manifest: Dict[str, Dict[str, Any]] = {}
+        if self.manifest_path.exists():
+            with self.manifest_path.open("r", encoding="utf-8") as f:
+                self.manifest = json.load(f)
+
+    def _saveManifest(self) -> None:
+        writeJsonAtomic(self.manifest_path, self.manifest)
+
+    def _entry(self, path: str) -> Tuple[str, Dict[str, Any]]:
+        digest = fileDigest(path)
+        entry = self.manifest.setdefault(
+            digest, {"path": path, "name": f"{Path(path).stem}-{digest[:8]}", "stages": {}}
+        )
+        entry["path"] = path
+        return digest, entry
+
+    def _linesPath(self, entry) -> Path:
+        return self.out_dir / "lines" / f"{entry['name']}.json"
+
+    def _resultPath(self, entry) -> Path:
+        return self.out_dir / f"{entry['name']}.json"
+
+    def run(self, statements: List[str]) -> Dict[str, Any]:
+        start = time.perf_counter()
+        toOcr, toCategorise, skipped = [], [], 0
+        seen = set()
+        for path in statements:
+            key, entry = self._entry(path)
+            if key in seen:
+                # Same file content under another name
+                skipped += 1
+                continue
+            seen.add(key)
+            stages = entry["stages"]
+            if "categorised" in stages and self._resultPath(entry).exists():
+                skipped += 1
+            elif "parsed" in stages and self._linesPath(entry).exists():
+                toCategorise.append(key)
+            else:
+                stages.clear()
+                toOcr.append((key, path))
+        self._saveManifest()
+
+        total = len(toOcr) + len(toCategorise)
+        logger.info(
+            "%d statements: %d already done, %d to categorise, %d to OCR",
+            len(statements),
+            skipped,
+            len(toCategorise),
+            len(toOcr),
+        )
+        if total == 0:
+            return self._summary(0, 0, 0, time.perf_counter() - start)
+
+        # OCR'd lines are only ever loaded from disk here, so the pipeline
+        # never initialises PaddleOCR in this process
+        pipeline = StatementPipeline()
+        ledger = SpendLedger()
+        done = failed = transactions = 0
+
+        def finish(key: str, lines) -> None:
+            nonlocal done, failed, transactions
+            entry = self.manifest[key]
+            try:
+                cleaned = pipeline.cleaned(pipeline.grouped(lines))
+                categorised = pipeline.categorised(cleaned)
+                writeJsonAtomic(self._resultPath(entry), categorised)
+                ledger.upsert(Path(entry["path"]).name, categorised)
+            except Exception as exc:
+                # The parsed lines are kept, so a resumed run only retries
+                # categorisation for this statement
+                failed += 1
+                entry["error"] = f"{type(exc).__name__}: {exc}"
+                self._saveManifest()
+                count("batch.failed")
+                logger.error("FAILED %s: %s", entry["path"], entry["error"])
+                return
+            entry.pop("error", None)
+            entry["stages"]["categorised"] = time.time()
+            entry["transactions"] = len(categorised)
+            self._saveManifest()
+            done += 1
+            transactions += len(categorised)
+            self._progress(done + failed, total, entry, start, transactions)
+
+        pool = None
+        try:
+            for key in toCategorise:
+                with self._linesPath(self.manifest[key]).open("r", encoding="utf-8") as f:
+                    finish(key, json.load(f))
+
+            if toOcr:
+                # spawn: PaddlePaddle is not fork-safe once initialised
+                context = multiprocessing.get_context("spawn")
+                pool = context.Pool(processes=min(self.workers, len(toOcr)), initializer=initOcrWorker)
+                for result in pool.imap_unordered(_ocrJob, toOcr):
+                    entry = self.manifest[result["key"]]
+                    if "error" in result:
+                        failed += 1
+                        entry["error"] = result["error"]
+                        self._saveManifest()
+                        count("batch.failed")
+                        logger.error("FAILED %s: %s", entry["path"], result["error"])
+                        continue
+                    entry.pop("error", None)
+                    writeJsonAtomic(self._linesPath(entry), result["lines"])
+                    entry["stages"]["parsed"] = time.time()
+                    entry["ocr_seconds"] = result["ocr_seconds"]
+                    recordSpan("batch.ocr", result["ocr_seconds"])
+                    self._saveManifest()
+                    finish(result["key"], result["lines"])
+        except KeyboardInterrupt:
+            logger.warning("Interrupted; finished statements are kept, re-run to resume")
+        finally:
+            if pool is not None:
+                pool.terminate()
+                pool.join()
+            pipeline.printStats()
+            pipeline.close()
+            ledger.close()
+
+        return self._summary(done, failed, transactions, time.perf_counter() - start)
+
+    def _progress(self, finished: int, total: int, entry, start: float, transactions: int) -> None:
+        elapsed = time.perf_counter() - start
+        eta = elapsed / finished * (total - finished)
+        logger.info(
+            "[%*d/%d] %s: %d transactions | %.0fs elapsed, ~%.0fs left",
+            len(str(total)),
+            finished,
+            total,
+            entry["name"],
+            entry["transactions"],
+            elapsed,
+            eta,
+        )
+
+    def _summary(self, done: int, failed: int, transactions: int, seconds: float) -> Dict[str, Any]:
+        summary = {
+            "statements": done,
+            "failed": failed,
+            "transactions": transactions,
+            "seconds": seconds,
+            "statements_per_minute": done / seconds * 60 if seconds else 0.0,
+            "transactions_per_second": transactions / seconds if seconds else 0.0,
+        }
+        logger.info(
+            "%d statements (%d failed), %d transactions in %.1fs: "
+            "%.1f statements/min, %.1f transactions/s",
+            done,
+            failed,
+            transactions,
+            seconds,
+            summary["statements_per_minute"],
+            summary["transactions_per_second"],
+        )
+        return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Process many bank statements in parallel")
+    parser.add_argument("inputs", nargs="+", help="Statement files, directories or glob patterns")
+    parser.add_argument("--out-dir", default="batchOutput")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument(
+        "--metrics-report", default=os.getenv("METRICS_REPORT"), help="Write a JSON run report here"
+    )
+    args = parser.parse_args()
+
+    configureLogging()
+    if args.metrics_report:
+        instrumentation.enable()
+    statements = findStatements(args.inputs)
+    if not statements:
+        parser.error("no statements found")
+    BatchRunner(args.out_dir, workers=args.workers).run(statements)
+    instrumentation.writeReport(args.metrics_report)
+
+
+if __name__ == "__main__":
+    main()
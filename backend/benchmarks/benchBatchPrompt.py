@@ -0,0 +1,67 @@
+"""
+Prompt tokens and wall time per merchant for one-merchant-per-prompt versus
+K-merchants-per-prompt classification, against a local Ollama stub whose
+latency grows with prompt size.
+
+Run from backend/:
+    python -m benchmarks.benchBatchPrompt
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import re
+import time
+
+from benchmarks.ollamaStub import OllamaStub
+from categoriser.llmCategoriser import LlmCategoriser
+from categoriser.llmService import LLMService
+
+_NUMBERED = re.compile(r'^(\d+)\. "', re.MULTILINE)
+
+
+def stubAnswer(payload: dict) -> str:
+    prompt = payload.get("prompt", "")
+    if "Merchants:" in prompt:
+        numbers = _NUMBERED.findall(prompt.split("Merchants:", 1)[1])
+        return json.dumps({n: "dining" for n in numbers})
+    return "Looks like a food stall.\ndining"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--merchants", type=int, default=60)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--token-latency", type=float, default=0.0002)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 5, 10, 20])
+    args = parser.parse_args()
+
+    transactions = [
+        {"company_person": f"SYNTHETIC MERCHANT {i}"} for i in range(args.merchants)
+    ]
+
+    print(f"{'K':>3} {'requests':>8} {'tokens/merchant':>16} {'ms/merchant':>12}")
+    for size in args.sizes:
+        with OllamaStub(
+            latency=args.latency, token_latency=args.token_latency, respond=stubAnswer
+        ) as stub:
+            with contextlib.redirect_stdout(io.StringIO()):
+                service = LLMService(
+                    base_url=stub.base_url, concurrency=1, num_predict=16 * size + 32
+                )
+                categoriser = LlmCategoriser(service.predict, batch_size=size)
+                start = time.perf_counter()
+                categoriser.categorise_many([dict(t) for t in transactions])
+                elapsed = time.perf_counter() - start
+                service.close()
+
+            print(
+                f"{size:>3} {stub.requests:>8} "
+                f"{stub.prompt_tokens / args.merchants:>16.1f} "
+                f"{1000 * elapsed / args.merchants:>12.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
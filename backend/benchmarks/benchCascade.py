@@ -0,0 +1,124 @@
+"""
+Mean latency per merchant of a single large model versus a fast -> large
+model cascade, against two local Ollama stubs: a fast model that only gives
+a clean category line for obvious names, and a slower large model.
+
+Also runs the cascade with the fast tier hanging past its timeout, to show
+the circuit breaker taking it out after a few failed requests, and checks
+that with every tier's circuit open the merchants an override resolves keep
+their category while the rest fall back to 'misc', uncached.
+
+Run from backend/:
+    python -m benchmarks.benchCascade
+    python -m benchmarks.benchCascade --merchants 200 --ambiguous 0.3
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.ollamaStub import OllamaStub
+from categoriser.categoryCache import CategoryCache
+from categoriser.llmCategoriser import LlmCategoriser
+from categoriser.llmService import LLMService
+from categoriser.modelCascade import CircuitBreaker, ModelCascade, ModelTier
+
+
+def fastAnswer(payload: dict) -> str:
+    # Obvious names get a clean last line; ambiguous ones ramble
+    if "AMBIGUOUS" in payload["prompt"].rsplit("Company/person:", 1)[-1]:
+        return "It could be shopping or dining, hard to tell."
+    return "A food stall.\ndining"
+
+
+def run(categoriser: LlmCategoriser, names):
+    start = time.perf_counter()
+    transactions = categoriser.categorise_many([{"company_person": name} for name in names])
+    return time.perf_counter() - start, transactions
+
+
+def buildCascade(fast_url: str, large_url: str, fast_timeout: float, concurrency: int):
+    tiers = []
+    for name, url, timeout, retries in (
+        ("fast", fast_url, fast_timeout, 0),
+        ("large", large_url, None, 2),
+    ):
+        service = LLMService(base_url=url, model_name=name, concurrency=concurrency, max_retries=retries)
+        tiers.append(
+            ModelTier(
+                name,
+                service.predict,
+                timeout=timeout,
+                breaker=CircuitBreaker(failure_threshold=3, cooldown=60),
+                concurrency=concurrency,
+                close_fn=service.close,
+            )
+        )
+    return ModelCascade(tiers)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--merchants", type=int, default=100)
+    parser.add_argument("--ambiguous", type=float, default=0.2, help="Share of ambiguous names")
+    parser.add_argument("--fast-latency", type=float, default=0.02)
+    parser.add_argument("--large-latency", type=float, default=0.2)
+    parser.add_argument("--fast-timeout", type=float, default=0.5)
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+
+    step = round(1 / args.ambiguous) if args.ambiguous else 0
+    names = [
+        f"AMBIGUOUS {i}" if step and i % step == 0 else f"FOOD STALL {i}"
+        for i in range(args.merchants)
+    ]
+
+    large = OllamaStub(latency=args.large_latency, response="Retail shop.\nshopping").start()
+    fast = OllamaStub(latency=args.fast_latency, respond=fastAnswer).start()
+    hung = OllamaStub(latency=args.fast_timeout * 4, respond=fastAnswer).start()
+
+    single = LLMService(base_url=large.base_url, model_name="large", concurrency=args.concurrency)
+    elapsed, _ = run(LlmCategoriser(single.predict, predict_many_fn=single.predict_many), names)
+    single.close()
+    print(f"{'setup':>18} {'ms/merchant':>12}  tiers")
+    print(f"{'large model only':>18} {1000 * elapsed / len(names):>12.1f}")
+
+    for label, fast_url in (("cascade", fast.base_url), ("fast tier hanging", hung.base_url)):
+        cascade = buildCascade(fast_url, large.base_url, args.fast_timeout, args.concurrency)
+        elapsed, transactions = run(LlmCategoriser(None, cascade=cascade), names)
+        report = cascade.report()
+        tiers = ", ".join(
+            f"{name} {tier['share']:.0%} resolved ({tier['requests']} requests, "
+            f"{tier['failures']} failed, {tier['skipped']} skipped, breaker {tier['breaker']})"
+            for name, tier in report["tiers"].items()
+        )
+        print(f"{label:>18} {1000 * report['mean_seconds_per_merchant']:>12.1f}  {tiers}")
+        ambiguous = [t["llm_category"] for t in transactions if t["company_person"].startswith("AMB")]
+        assert all(category == "shopping" for category in ambiguous)
+        cascade.close()
+
+    # Both tiers out: nothing is sent, and the call still returns
+    cascade = buildCascade(fast.base_url, large.base_url, args.fast_timeout, args.concurrency)
+    for tier in cascade.tiers:
+        for _ in range(tier.breaker.failure_threshold):
+            tier.breaker.record_failure()
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = CategoryCache(os.path.join(tmp, "cache.sqlite3"))
+        categoriser = LlmCategoriser(None, cache=cache, cascade=cascade)
+        _, transactions = run(categoriser, ["GRAB"] + names[:5])
+        categories = {t["company_person"]: t["llm_category"] for t in transactions}
+        assert categories.pop("GRAB") == "transport"
+        assert set(categories.values()) == {"misc"}, categories
+        assert all(cache.get(categoriser.cache_namespace(), name) is None for name in categories)
+        assert sum(tier.stats["requests"] for tier in cascade.tiers) == 0
+        cache.close()
+    print(f"{'all tiers open':>18} {len(categories)} merchants fell back to misc, GRAB kept transport")
+    cascade.close()
+
+    for stub in (fast, large, hung):
+        stub.stop()
+
+
+if __name__ == "__main__":
+    main()
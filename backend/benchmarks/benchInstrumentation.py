@@ -0,0 +1,79 @@
+"""
+Cost of the instrumentation calls left in hot paths: span/count/observe per
+call with instrumentation disabled (the default) and enabled, next to an
+empty loop, plus a categorisation run of synthetic merchants with and
+without it.
+
+Run from backend/:
+    python -m benchmarks.benchInstrumentation --calls 1000000
+"""
+
+import argparse
+import time
+
+import instrumentation
+from categoriser.categoryCache import CategoryCache
+from categoriser.llmCategoriser import LlmCategoriser
+from instrumentation import count, observe, span
+
+
+def perCall(fn, calls: int) -> float:
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - start) / calls
+
+
+def spanCall():
+    with span("bench.span"):
+        pass
+
+
+def categoriseRun(merchants: int) -> float:
+    transactions = [
+        {"date": "01 Aug", "category": "dr", "amount": "1.00", "company_person": f"MERCHANT {i:05d}"}
+        for i in range(merchants)
+    ]
+    categoriser = LlmCategoriser(
+        predict_fn=lambda prompt: "others",
+        cache=CategoryCache(path=":memory:"),
+        model_name="bench",
+    )
+    start = time.perf_counter()
+    categoriser.categorise_many(transactions)
+    elapsed = time.perf_counter() - start
+    categoriser.cache.close()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=1_000_000)
+    parser.add_argument("--merchants", type=int, default=20000)
+    args = parser.parse_args()
+
+    baseline = perCall(lambda: None, args.calls)
+    print(f"{'call':>10} {'disabled ns':>12} {'enabled ns':>12}")
+    rows = {"span": spanCall, "count": lambda: count("bench.count"), "observe": lambda: observe("bench.observe", 3.0)}
+    results = {}
+    for on in (False, True):
+        instrumentation.enable(on)
+        for name, fn in rows.items():
+            results[name, on] = (perCall(fn, args.calls) - baseline) * 1e9
+    for name in rows:
+        print(f"{name:>10} {results[name, False]:>12.0f} {results[name, True]:>12.0f}")
+
+    instrumentation.enable(False)
+    off = categoriseRun(args.merchants)
+    instrumentation.enable(True)
+    on = categoriseRun(args.merchants)
+    print(
+        f"\ncategorise {args.merchants:,} merchants: {off * 1000:.0f} ms disabled, "
+        f"{on * 1000:.0f} ms enabled ({(on / off - 1) * 100:+.1f}%)"
+    )
+    spans = instrumentation.report()["spans_ms"]
+    print(f"categorise.lookup p50 {spans['categorise.lookup']['p50']:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
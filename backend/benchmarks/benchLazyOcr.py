@@ -0,0 +1,71 @@
+"""
+OCR time and peak RSS of the eager path (perform_ocr over every page, then
+parse) versus lazy page-by-page OCR (iter_pages: skip page 1, stop at the
+end-of-transactions marker). Each mode runs in its own process so peak RSS
+is measured independently. Needs PaddleOCR.
+
+Run from backend/:
+    python -m benchmarks.benchLazyOcr --statement "bankStatements/AUG 2025_20251126153531065.pdf"
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import resource
+import subprocess
+import sys
+import time
+
+from records import recordToDict
+
+
+def runMode(mode: str, statement: str) -> dict:
+    from ocr.ocr import Ocr
+    from ocr.parser import OcrParser
+
+    engine = Ocr()
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        if mode == "eager":
+            lines = OcrParser().parse_transactions(engine.perform_ocr(statement))
+        else:
+            lines = OcrParser().parse_transactions(
+                engine.iter_pages(statement, first_page=2), start_page=2
+            )
+        elapsed = time.perf_counter() - start
+
+    # ru_maxrss is KiB on Linux
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return {"mode": mode, "seconds": elapsed, "peak_rss_mb": peak, "lines": lines}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--statement", required=True)
+    parser.add_argument("--mode", choices=["eager", "lazy"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(runMode(args.mode, args.statement), default=recordToDict))
+        return
+
+    results = {}
+    for mode in ("eager", "lazy"):
+        out = subprocess.run(
+            [sys.executable, "-m", "benchmarks.benchLazyOcr", "--statement", args.statement, "--mode", mode],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        results[mode] = json.loads(out.strip().splitlines()[-1])
+
+    same = results["eager"]["lines"] == results["lazy"]["lines"]
+    print(f"{'mode':>6} {'OCR s':>7} {'peak RSS MB':>12}")
+    for mode, result in results.items():
+        print(f"{mode:>6} {result['seconds']:>7.2f} {result['peak_rss_mb']:>12.0f}")
+    print(f"parsed lines identical: {same}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Spend ledger at scale: upsert throughput, idempotent re-upserts, and query
+latency of the trigger-maintained aggregates versus aggregating the
+transactions table directly. Also checks that the aggregates stay equal to
+a full GROUP BY over the debits, with credits (salary) left out.
+
+Run from backend/:
+    python -m benchmarks.benchLedger --rows 2000000
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from spendLedger import MONTHS, SpendLedger
+
+CATEGORIES = ["dining", "transport", "shopping", "utilities", "misc", "others", "travel"]
+
+
+def syntheticStatements(rows: int, per_statement: int = 10000, seed: int = 0):
+    """
+    (statement name, transactions) pairs spread over two years of monthly
+    statements and 5000 merchants, about 2% of them credits.
+    """
+    rng = random.Random(seed)
+    merchants = [f"MERCHANT {i:05d}" for i in range(5000)]
+    for index in range(rows // per_statement):
+        year, month = 2024 + (index // 12) % 2, index % 12 + 1
+        name = f"{MONTHS[month - 1]} {year}_{index:06d}.pdf"
+        transactions = [
+            {
+                "date": f"{rng.randint(1, 28):02d} {MONTHS[month - 1].title()}",
+                "category": "cr" if rng.random() < 0.02 else "dr",
+                "amount": f"{rng.randint(100, 50000) / 100:,.2f}",
+                "company_person": rng.choice(merchants),
+                "llm_category": rng.choice(CATEGORIES),
+            }
+            for _ in range(per_statement)
+        ]
+        yield name, transactions
+
+
+def timed(fn, repeat: int = 1):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        value = fn()
+    return value, (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ledger = SpendLedger(os.path.join(tmp, "ledger.sqlite3"))
+        statements = list(syntheticStatements(args.rows))
+
+        start = time.perf_counter()
+        for name, transactions in statements:
+            ledger.upsert(name, transactions)
+        elapsed = time.perf_counter() - start
+        total = ledger.count()
+        print(f"upserted {total:,} rows in {elapsed:.1f}s ({total / elapsed:,.0f} rows/s)")
+
+        before = ledger.spend_by_category()
+        _, again = timed(lambda: ledger.upsert(*statements[0]))
+        assert ledger.count() == total and ledger.spend_by_category() == before
+        print(f"re-upsert of one statement: {again * 1000:.0f} ms, no changes")
+
+        name, transactions = statements[1]
+        for transaction in transactions[:1000]:
+            transaction["llm_category"] = "travel"
+        ledger.upsert(name, transactions)
+        assert ledger.count() == total
+
+        # A salary credit must not count as spend, nor survive as a debit
+        before = ledger.spend_by_category()
+        salary = {
+            "date": "25 Jan",
+            "category": "cr",
+            "amount": "9,999,999.00",
+            "company_person": "ACME PAYROLL",
+            "llm_category": "misc",
+        }
+        ledger.upsert("JAN 2024_salary.pdf", [salary])
+        assert ledger.spend_by_category() == before, "credit counted as spend"
+        assert "ACME PAYROLL" not in [r["merchant"] for r in ledger.top_merchants(10)]
+        ledger.upsert("JAN 2024_salary.pdf", [dict(salary, category="dr")])
+        assert ledger.top_merchants(1)[0]["merchant"] == "ACME PAYROLL"
+        ledger.upsert("JAN 2024_salary.pdf", [salary])
+        assert ledger.spend_by_category() == before, "credit left behind after re-typing"
+        print("salary credit kept out of spend totals")
+
+        # Aggregates must equal a full GROUP BY over the ledger's debits
+        direct = ledger._query(
+            "SELECT month, llm_category, SUM(amount_cents), COUNT(*) FROM transactions "
+            "WHERE txn_type IS NOT 'cr' GROUP BY month, llm_category ORDER BY month, SUM(amount_cents) DESC",
+            [],
+        )
+        maintained = [
+            (r["month"], r["llm_category"], round(r["total"] * 100), r["count"])
+            for r in ledger.spend_by_category()
+        ]
+        assert maintained == direct, "monthly_category drifted from transactions"
+        direct = ledger._query(
+            "SELECT merchant, SUM(amount_cents) AS s FROM transactions "
+            "WHERE txn_type IS NOT 'cr' GROUP BY merchant ORDER BY s DESC LIMIT 10",
+            [],
+        )
+        maintained = [(r["merchant"], round(r["total"] * 100)) for r in ledger.top_merchants(10)]
+        assert maintained == direct, "merchant_totals drifted from transactions"
+        print("aggregates match a full GROUP BY after re-upserts and re-categorisation")
+
+        print(f"\n{'query':>40} {'ms':>9}")
+        queries = {
+            "spend by category per month": lambda: ledger.spend_by_category(),
+            "  same, one quarter + category": lambda: ledger.spend_by_category(
+                "2025-01", "2025-03", "dining"
+            ),
+            "top 10 merchants, all time": lambda: ledger.top_merchants(10),
+            "top 10 merchants, one month": lambda: ledger.top_merchants(10, "2025-06", "2025-06"),
+            "scan: category per month": lambda: ledger._query(
+                "SELECT month, llm_category, SUM(amount_cents) FROM transactions "
+                "WHERE txn_type IS NOT 'cr' GROUP BY month, llm_category",
+                [],
+            ),
+            "scan: top 10 merchants": lambda: ledger._query(
+                "SELECT merchant, SUM(amount_cents) AS s FROM transactions "
+                "WHERE txn_type IS NOT 'cr' GROUP BY merchant ORDER BY s DESC LIMIT 10",
+                [],
+            ),
+        }
+        for label, query in queries.items():
+            _, seconds = timed(query, repeat=3)
+            print(f"{label:>40} {seconds * 1000:>9.2f}")
+        ledger.close()
+
+
+if __name__ == "__main__":
+    main()
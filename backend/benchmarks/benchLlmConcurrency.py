@@ -0,0 +1,43 @@
+"""
+Throughput of LLMService.predict_many versus concurrency level, against a
+local Ollama stub with simulated latency.
+
+Run from backend/:
+    python -m benchmarks.benchLlmConcurrency
+"""
+
+import argparse
+import contextlib
+import io
+import time
+
+from benchmarks.ollamaStub import OllamaStub
+from categoriser.llmService import LLMService
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--prompts", type=int, default=64)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    args = parser.parse_args()
+
+    prompts = [f"Company/person: MERCHANT {i}" for i in range(args.prompts)]
+
+    with OllamaStub(latency=args.latency) as stub:
+        print(f"{'concurrency':>11} {'seconds':>8} {'req/s':>8}")
+        for level in args.levels:
+            # Silence the per-request debug output of LLMService
+            with contextlib.redirect_stdout(io.StringIO()):
+                service = LLMService(base_url=stub.base_url, concurrency=level)
+                start = time.perf_counter()
+                results = service.predict_many(prompts)
+                elapsed = time.perf_counter() - start
+                service.close()
+
+            assert len(results) == len(prompts)
+            print(f"{level:>11} {elapsed:>8.2f} {len(prompts) / elapsed:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""
+Merchant canonicalisation (categoriser/merchantIndex.py) on a history of
+noisy statements: cluster quality, LLM calls saved and lookup cost.
+
+Each "month" draws --transactions merchants from a Zipf-like pool
+(benchmarks/syntheticStatement.merchantPool); a --noise share of them come
+back as one of --variants recurring OCR misreads of that merchant: a
+dropped space, an S/5, O/0, I/1 or B/8 swap, a dropped letter, or a
+trailing terminal ID (new each time). PTE LTD / SINGAPORE SG suffixes are
+left out, OcrSorter already strips them. The months are categorised
+in order by one LlmCategoriser per mode, with a model stub that answers
+from the ground-truth merchant and a category cache kept across months
+(no local classifier, so only the index differs between modes):
+
+  - clusters:   pairwise precision / recall of the index's clusters against
+                the true merchants
+  - LLM calls:  without and with the index, plus the share of transactions
+                whose category is the same in both modes
+  - lookups:    mean match() time and LSH candidates per lookup as the index
+                grows, against a brute-force scan of every canonical name
+
+Run from backend/:
+    python -m benchmarks.benchMerchantIndex
+    python -m benchmarks.benchMerchantIndex --months 12 --noise 0.5
+"""
+
+import argparse
+import itertools
+import os
+import random
+import re
+import tempfile
+import time
+import zlib
+
+from benchmarks.syntheticStatement import merchantPool
+from categoriser.categoryCache import CategoryCache
+from categoriser.companyOverrides import COMPANY_OVERRIDES, getCompanyOverride
+from categoriser.llmCategoriser import TARGET_CATEGORIES, LlmCategoriser
+from categoriser.merchantIndex import MerchantIndex, merchantKey
+
+PROMPT_MERCHANT = re.compile(r'Company/person: "(.*)"')
+LOOKALIKES = {"S": "5", "O": "0", "I": "1", "B": "8"}
+
+
+def noisy(name: str, rng: random.Random) -> str:
+    kind = rng.randrange(3)
+    if kind == 0 and " " in name:
+        spaces = [i for i, c in enumerate(name) if c == " "]
+        i = rng.choice(spaces)
+        return name[:i] + name[i + 1 :]
+    if kind == 1:
+        swaps = [i for i, c in enumerate(name) if c in LOOKALIKES]
+        if swaps:
+            i = rng.choice(swaps)
+            return name[:i] + LOOKALIKES[name[i]] + name[i + 1 :]
+    letters = [i for i, c in enumerate(name) if c.isalpha()]
+    i = rng.choice(letters)
+    return name[:i] + name[i + 1 :]
+
+
+def truthCategory(name: str) -> str:
+    # The model agrees with the override table where there is an entry
+    return getCompanyOverride(name) or TARGET_CATEGORIES[zlib.crc32(name.encode()) % (len(TARGET_CATEGORIES) - 2)]
+
+
+def history(args, rng: random.Random):
+    pool = merchantPool(args.merchants, rng)
+    weights = [1 / (rank + 1) for rank in range(len(pool))]
+    # The same receipt font misreads a merchant the same few ways
+    variants = {merchant: [noisy(merchant, rng) for _ in range(args.variants)] for merchant in pool}
+    months = []
+    for _ in range(args.months):
+        month = []
+        for merchant in rng.choices(pool, weights, k=args.transactions):
+            seen = merchant
+            if rng.random() < args.noise:
+                seen = rng.choice(variants[merchant] + [None])
+                if seen is None:
+                    seen = f"{merchant} {rng.randint(1000, 9999)}"
+            month.append((seen, merchant))
+        months.append(month)
+    return months
+
+
+def categoriseHistory(months, truth, index, cachePath):
+    def predict(prompt: str) -> str:
+        seen = PROMPT_MERCHANT.search(prompt).group(1)
+        return truthCategory(truth.get(seen, seen))
+
+    cache = CategoryCache(cachePath)
+    categoriser = LlmCategoriser(predict_fn=predict, cache=cache, model_name="stub", merchant_index=index)
+    categories = []
+    for month in months:
+        transactions = categoriser.categorise_many([{"company_person": seen} for seen, _ in month])
+        categories.extend(transaction["llm_category"] for transaction in transactions)
+    cache.close()
+    return categoriser, categories
+
+
+def clusterQuality(index: MerchantIndex, truth):
+    # Ground truth per match key (distinct merchants can share a key)
+    keyTruth = {}
+    for seen, merchant in truth.items():
+        keyTruth.setdefault(merchantKey(seen), set()).add(merchant)
+    # Spellings answered by an override were never registered; add them now
+    clusterOf = {key: index.add(key) for key in keyTruth}
+
+    truePairs = predictedPairs = correctPairs = 0
+    for a, b in itertools.combinations(keyTruth, 2):
+        same = bool(keyTruth[a] & keyTruth[b])
+        together = clusterOf[a] == clusterOf[b]
+        truePairs += same
+        predictedPairs += together
+        correctPairs += same and together
+    return correctPairs / max(1, predictedPairs), correctPairs / max(1, truePairs)
+
+
+def lookupCost(sizes, queries: int, rng: random.Random):
+    names = merchantPool(max(sizes), rng)
+    # merchantPool only has so many word combinations; add distinct tails
+    names = [f"{name} {chr(65 + i % 26)}{chr(65 + i // 26 % 26)}{chr(65 + i // 676 % 26)}" for i, name in enumerate(names)]
+    rows = []
+    for size in sizes:
+        index = MerchantIndex()
+        for name in names[:size]:
+            index.add(name)
+        probes = [noisy(rng.choice(names[:size]), rng) for _ in range(queries)]
+
+        index.stats["candidates"] = 0
+        start = time.perf_counter()
+        for probe in probes:
+            index.match(probe)
+        lsh = (time.perf_counter() - start) / queries
+
+        start = time.perf_counter()
+        for probe in probes:
+            shingles = index._shingle(merchantKey(probe))
+            max(len(shingles & other) / len(shingles | other) for other in index._shingles)
+        scan = (time.perf_counter() - start) / queries
+        rows.append((size, len(index), lsh, scan, index.stats["candidates"] / queries))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--months", type=int, default=6)
+    parser.add_argument("--transactions", type=int, default=300, help="Transactions per month")
+    parser.add_argument("--merchants", type=int, default=200, help="True merchants in the pool")
+    parser.add_argument("--noise", type=float, default=0.3, help="Share of names with OCR noise")
+    parser.add_argument("--variants", type=int, default=2, help="Recurring misreads per merchant")
+    parser.add_argument("--threshold", type=float, default=0.7)
+    parser.add_argument("--sizes", default="1000,10000,50000", help="Index sizes for the lookup timing")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    months = history(args, rng)
+    truth = {seen: merchant for month in months for seen, merchant in month}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        plain, plainCategories = categoriseHistory(months, truth, None, os.path.join(tmp, "plain.sqlite3"))
+        # Seeded with the override table, as buildCategoriser does
+        index = MerchantIndex(threshold=args.threshold)
+        for company in COMPANY_OVERRIDES:
+            index.add(company)
+        indexed, indexedCategories = categoriseHistory(months, truth, index, os.path.join(tmp, "index.sqlite3"))
+        # Saved and reloaded as between runs
+        index.save(os.path.join(tmp, "index.json"))
+        reloaded = MerchantIndex.load(os.path.join(tmp, "index.json"))
+        assert all(reloaded.match(seen) == index.match(seen) for seen in truth)
+
+    precision, recall = clusterQuality(index, truth)
+    merchants = len(set(truth.values()))
+    print(f"{args.months} months x {args.transactions} transactions: {len(truth)} spellings of {merchants} merchants")
+    print(f"clusters: {len(index)} canonical merchants, pairwise precision {precision:.3f}, recall {recall:.3f}")
+    print(f"{'LLM calls':>12}: {plain.llm_calls} without the index, {indexed.llm_calls} with it")
+    print(
+        f"saved {1 - indexed.llm_calls / plain.llm_calls:.0%} of LLM calls "
+        f"({indexed.index_stats['reused']} reused, {indexed.index_stats['collapsed']} collapsed)"
+    )
+    same = sum(a == b for a, b in zip(plainCategories, indexedCategories)) / len(plainCategories)
+    print(f"same category as without the index: {same:.1%} of transactions")
+
+    print(f"\n{'names':>8} {'canonical':>10} {'LSH us':>8} {'scan us':>8} {'candidates':>11}")
+    for size, canonical, lsh, scan, candidates in lookupCost(
+        [int(size) for size in args.sizes.split(",")], args.queries, rng
+    ):
+        print(f"{size:>8} {canonical:>10} {lsh * 1e6:>8.0f} {scan * 1e6:>8.0f} {candidates:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
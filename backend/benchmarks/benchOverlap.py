@@ -0,0 +1,103 @@
+"""
+Wall time of the serial pipeline (the main.py flow: OCR every page, then
+parse, group, clean and categorise) versus overlapped mode
+(PIPELINE_OVERLAP=1), where pages are categorised while later pages are
+still being OCR'd. Both runs must return the same transactions in the same
+order.
+
+OCR is simulated so this runs without PaddleOCR: a synthetic statement
+(benchmarks/syntheticStatement.py) is handed out page by page after
+--ocr-seconds per page, spent sleeping (PaddleOCR's native inference
+releases the GIL) or, with --busy, spinning in Python while holding it.
+The categoriser talks to a local Ollama stub with --llm-latency per request.
+
+Run from backend/:
+    python -m benchmarks.benchOverlap
+    python -m benchmarks.benchOverlap --lines 1000 --ocr-seconds 1.0 --llm-latency 0.5
+"""
+
+import argparse
+import os
+import tempfile
+import time
+import zlib
+
+from benchmarks.ollamaStub import OllamaStub
+from benchmarks.syntheticStatement import syntheticStatement
+from categoriser.llmCategoriser import TARGET_CATEGORIES
+from pipeline import StatementPipeline
+
+
+class SimulatedOcr:
+    """
+    Stand-in for Ocr.iter_pages that serves pre-built pages at OCR speed.
+    """
+
+    def __init__(self, pages, seconds: float, busy: bool = False):
+        self.pages = pages
+        self.seconds = seconds
+        self.busy = busy
+
+    def iter_pages(self, image_path, first_page=2, **kwargs):
+        for page in self.pages[first_page - 1 :]:
+            if self.busy:
+                end = time.perf_counter() + self.seconds
+                while time.perf_counter() < end:
+                    pass
+            else:
+                time.sleep(self.seconds)
+            yield page
+
+
+def stubAnswer(payload: dict) -> str:
+    # Same merchant, same category, whichever run asks
+    merchant = payload["prompt"].rsplit("Company/person:", 1)[-1]
+    return TARGET_CATEGORIES[zlib.crc32(merchant.encode()) % (len(TARGET_CATEGORIES) - 2)]
+
+
+def runMode(overlap: bool, ocr: SimulatedOcr, tmp: str):
+    # Cold category cache per run; keep the local classifier off the fast path
+    os.environ["CATEGORY_CACHE_PATH"] = tempfile.mktemp(suffix=".sqlite3", dir=tmp)
+    os.environ["LOCAL_CLASSIFIER_THRESHOLD"] = "1.1"
+    pipeline = StatementPipeline(ocr=ocr, overlap=overlap)
+    start = time.perf_counter()
+    transactions = pipeline.run("synthetic.pdf")
+    elapsed = time.perf_counter() - start
+    calls = pipeline.llmCategoriser.llm_calls
+    # Not pipeline.close(): that would save the local classifier over the real one
+    pipeline.llmCategoriser.cache.close()
+    pipeline.llmModel.close()
+    return elapsed, calls, [t.to_dict() for t in transactions]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lines", type=int, default=500)
+    parser.add_argument("--ocr-seconds", type=float, default=0.5)
+    parser.add_argument("--busy", action="store_true", help="Hold the GIL while simulating OCR")
+    parser.add_argument("--llm-latency", type=float, default=0.2)
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+
+    pages, _ = syntheticStatement(args.lines, fmt="dict")
+    ocr = SimulatedOcr(pages, args.ocr_seconds, args.busy)
+    os.environ["OLLAMA_CONCURRENCY"] = str(args.concurrency)
+
+    results = {}
+    with OllamaStub(latency=args.llm_latency, respond=stubAnswer) as stub, tempfile.TemporaryDirectory() as tmp:
+        os.environ["OLLAMA_BASE_URL"] = stub.base_url
+        for label, overlap in (("serial", False), ("overlapped", True)):
+            results[label] = runMode(overlap, ocr, tmp)
+
+    ocrTotal = (len(pages) - 1) * args.ocr_seconds
+    print(f"{len(pages) - 1} pages OCR'd ({ocrTotal:.1f}s simulated OCR)")
+    print(f"{'mode':>10} {'wall s':>8} {'LLM calls':>10} {'transactions':>13}")
+    for label, (elapsed, calls, transactions) in results.items():
+        print(f"{label:>10} {elapsed:>8.2f} {calls:>10} {len(transactions):>13}")
+    serial, overlapped = results["serial"], results["overlapped"]
+    print(f"speed-up: {serial[0] / overlapped[0]:.2f}x")
+    assert serial[2] == overlapped[2], "overlapped output differs from the serial run"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Override engine microbenchmark: compile time and per-lookup latency with
+10k+ exact, prefix and contains rules, for hits and misses.
+
+Run from backend/:
+    python -m benchmarks.benchOverrides
+"""
+
+import argparse
+import random
+import string
+import time
+
+from categoriser.companyOverrides import OverrideEngine, OverrideRule
+
+CATEGORIES = ["dining", "shopping", "transport", "travel", "utilities"]
+
+
+def randomName(rng: random.Random) -> str:
+    words = rng.randint(1, 3)
+    return " ".join(
+        "".join(rng.choices(string.ascii_uppercase, k=rng.randint(3, 9)))
+        for _ in range(words)
+    )
+
+
+def timeLookups(engine: OverrideEngine, names, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for name in names:
+            engine.lookup(name)
+        best = min(best, time.perf_counter() - start)
+    return 1e6 * best / len(names)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rules", type=int, default=10000, help="rules per type")
+    parser.add_argument("--lookups", type=int, default=20000)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    rules = []
+    patterns = {}
+    for kind in ("exact", "prefix", "contains"):
+        patterns[kind] = [randomName(rng) for _ in range(args.rules)]
+        for pattern in patterns[kind]:
+            rules.append(OverrideRule(kind, pattern, rng.choice(CATEGORIES), len(rules)))
+
+    engine = OverrideEngine()
+    start = time.perf_counter()
+    engine.compile(rules)
+    print(f"compiled {len(rules)} rules in {time.perf_counter() - start:.2f}s")
+
+    cases = {
+        "exact hit": [rng.choice(patterns["exact"]) for _ in range(args.lookups)],
+        "prefix hit": [
+            rng.choice(patterns["prefix"]) + f" {rng.randint(0, 9999)}"
+            for _ in range(args.lookups)
+        ],
+        "contains hit": [
+            f"{rng.randint(0, 9999)} {rng.choice(patterns['contains'])} SINGAPORE"
+            for _ in range(args.lookups)
+        ],
+        "miss": [f"{randomName(rng)} {rng.randint(0, 9999)}" for _ in range(args.lookups)],
+    }
+
+    print(f"{'case':>14} {'us/lookup':>10}")
+    for label, names in cases.items():
+        print(f"{label:>14} {timeLookups(engine, names):>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+OcrParser line clustering on synthetic multi-page statements: the original
+list-based global sort versus the per-page NumPy clustering.
+
+Each synthetic page has rows of several boxes with jittered coordinates,
+at the same heights on every page. The per-page clustering must reproduce
+the generated rows exactly; the legacy path interleaves rows across pages.
+
+Run from backend/:
+    python -m benchmarks.benchParser
+"""
+
+import argparse
+import contextlib
+import io
+import random
+import time
+
+import numpy as np
+
+from ocr.parser import OcrParser
+
+
+def syntheticPages(pages: int, rows: int, cols: int, seed: int = 0):
+    """
+    PaddleX-style page dicts plus the expected line texts (pages 2..n).
+    """
+    rng = random.Random(seed)
+    result, expected = [], []
+    for page in range(pages):
+        texts, polys = [], []
+        for row in range(rows):
+            y = 100 + row * 32
+            parts = []
+            for col in range(cols):
+                x = 50 + col * 180 + rng.uniform(-5, 5)
+                top = y + rng.uniform(-3, 3)
+                height = rng.uniform(18, 24)
+                text = f"p{page}r{row}c{col}"
+                parts.append(text)
+                texts.append(text)
+                polys.append(
+                    [[x, top], [x + 150, top], [x + 150, top + height], [x, top + height]]
+                )
+            if page > 0:
+                expected.append(" ".join(parts))
+
+        # OCR engines do not return boxes in perfect reading order
+        order = list(range(len(texts)))
+        rng.shuffle(order)
+        result.append(
+            {
+                "rec_texts": [texts[i] for i in order],
+                "rec_polys": np.array([polys[i] for i in order], dtype=np.int16),
+                "rec_scores": np.ones(len(order), dtype=np.float32),
+            }
+        )
+    return result, expected
+
+
+def legacyParse(ocr_result):
+    detections = []
+    for page in ocr_result[1:]:
+        for text, poly, score in zip(page["rec_texts"], page["rec_polys"], page["rec_scores"]):
+            detections.append([poly.tolist(), (text, score)])
+    detections.sort(key=lambda d: d[0][0][1])
+
+    lines, current = [], [detections[0]]
+    for det in detections[1:]:
+        if abs(det[0][0][1] - current[-1][0][0][1]) <= 10:
+            current.append(det)
+        else:
+            current.sort(key=lambda d: d[0][0][0])
+            lines.append(current)
+            current = [det]
+    current.sort(key=lambda d: d[0][0][0])
+    lines.append(current)
+    return [" ".join(d[1][0] for d in line) for line in lines]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--rows", type=int, default=60)
+    parser.add_argument("--cols", type=int, default=4)
+    args = parser.parse_args()
+
+    ocr_result, expected = syntheticPages(args.pages, args.rows, args.cols)
+    detections = sum(len(p["rec_texts"]) for p in ocr_result)
+
+    start = time.perf_counter()
+    legacy = legacyParse(ocr_result)
+    legacyTime = time.perf_counter() - start
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        parsed = OcrParser().parse_transactions(ocr_result)
+        newTime = time.perf_counter() - start
+
+    assert [t["raw_text"] for t in parsed] == expected, "per-page clustering lost rows"
+
+    print(f"{args.pages} pages, {detections} detections")
+    print(f"legacy:   {1000 * legacyTime:8.2f} ms, rows correct: {legacy == expected}")
+    print(f"per-page: {1000 * newTime:8.2f} ms, rows correct: True")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""
+Per-page PaddleOCR time with and without preprocessing (grayscale render
+and recognition cropped to the transaction table), and whether both produce
+the same cleaned transactions. The text layer is disabled so every page is
+OCR'd. Needs PaddleOCR.
+
+The first page of each size is always OCR'd in full to find the table;
+cropping pays off from the next page of the same layout on.
+
+Every run first checks cropping on a synthetic two-page scanned layout
+(no PaddleOCR or PDF needed): page 2 holds a short table followed by a
+notice block, page 3 a table that runs past where that notice started.
+Page 3 is recognised from page 2's region and must give the same
+transactions as OCR'ing both pages in full.
+
+Run from backend/:
+    python -m benchmarks.benchPreprocess
+    python -m benchmarks.benchPreprocess --statement "bankStatements/AUG 2025_20251126153531065.pdf"
+    python -m benchmarks.benchPreprocess --statement scanned.pdf --dpi 200 --first-page 1
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.syntheticStatement import PAGE_TOP, ROW_PITCH, syntheticStatement
+from categoriser.sorter import OcrSorter
+from ocr.ocr import Ocr
+from ocr.parser import OcrParser
+
+# A4 in PDF points; syntheticStatement lays pages out at scale 2.0
+PAGE_SIZE = (595.0, 842.0)
+SCALE = 2.0
+
+
+class ScannedPage:
+    """
+    Stand-in for a pypdfium2 page of a scanned statement: renders blank
+    bitmaps of the requested crop and remembers where the crop sits.
+    """
+
+    def __init__(self, page):
+        self.page = page
+        self.offset = (0, 0)
+
+    def get_size(self):
+        return PAGE_SIZE
+
+    def render(self, scale, crop=(0, 0, 0, 0), grayscale=False):
+        left, bottom, right, top = crop
+        width, height = PAGE_SIZE
+        self.offset = (round(left * scale), round(top * scale))
+        shape = (round((height - bottom - top) * scale), round((width - left - right) * scale))
+        return _Bitmap(np.zeros(shape if grayscale else shape + (4,), dtype=np.uint8))
+
+    def close(self):
+        pass
+
+
+class _Bitmap:
+    def __init__(self, array):
+        self.array = array
+
+    def to_numpy(self):
+        return self.array
+
+    def close(self):
+        pass
+
+
+class CropRecogniser:
+    """
+    Stand-in for PaddleOCR: returns the boxes of the current ScannedPage
+    that lie wholly inside the rendered image, in the image's coordinates.
+    """
+
+    def __init__(self):
+        self.current = None
+
+    def ocr(self, image):
+        (dx, dy), page = self.current.offset, self.current.page
+        height, width = image.shape[:2]
+        polys = np.asarray(page["rec_polys"]) - np.array([dx, dy])
+        inside = [
+            i
+            for i, poly in enumerate(polys)
+            if poly.min() >= 0 and poly[:, 0].max() <= width and poly[:, 1].max() <= height
+        ]
+        return [
+            {
+                "rec_texts": [page["rec_texts"][i] for i in inside],
+                "rec_polys": polys[inside],
+                "rec_scores": [page["rec_scores"][i] for i in inside],
+            }
+        ]
+
+
+def twoPageLayout():
+    """
+    Pages 2 and 3 of a synthetic statement: page 2 cut to 20 rows and a
+    notice block low on the page, page 3 a full page of rows.
+    """
+    pages, _ = syntheticStatement(300, seed=1)
+    short = pages[1]
+    tops = np.asarray(short["rec_polys"])[:, 0, 1]
+    keep = np.flatnonzero(tops < PAGE_TOP + 20 * ROW_PITCH)
+    notice = ["Please examine this statement", "Call 1800 222 2121 for any discrepancy"]
+    notice_polys = [
+        [[60, y], [60 + 9 * len(text), y], [60 + 9 * len(text), y + 20], [60, y + 20]]
+        for y, text in zip((1300, 1330), notice)
+    ]
+    short = {
+        "rec_texts": [short["rec_texts"][i] for i in keep] + notice,
+        "rec_polys": np.concatenate([np.asarray(short["rec_polys"])[keep], np.array(notice_polys, dtype=np.int16)]),
+        "rec_scores": [0.99] * (len(keep) + len(notice)),
+    }
+    return [short, pages[2]]
+
+
+def checkLongerLaterPage():
+    pages = twoPageLayout()
+    engine = Ocr(use_cache=False, use_text_layer=False, preprocess=True)
+    recogniser = engine._ocr_model = CropRecogniser()
+
+    def transactions(preprocess: bool):
+        engine.preprocess = preprocess
+        regions, recognised, engines = {}, [], []
+        for page in pages:
+            recogniser.current = ScannedPage(page)
+            result, name = engine._recognise(recogniser.current, SCALE, regions)
+            recognised.append(result)
+            engines.append(name)
+        sorter = OcrSorter()
+        lines = OcrParser().parse_transactions(recognised, start_page=2)
+        return sorter.cleanTransactions(sorter.groupTransactions(lines)), engines
+
+    full, _ = transactions(False)
+    cropped, engines = transactions(True)
+    assert engines == ["PaddleOCR", "PaddleOCR crop"], engines
+    assert cropped == full, f"{len(full) - len(cropped)} transactions lost to the crop"
+    print(f"longer page 3 cropped from page 2's region: {len(cropped)} transactions, same as full page")
+
+
+def runEngine(engine: Ocr, statement: str, first_page: int):
+    engine.page_log.clear()
+    start = time.perf_counter()
+    lines = OcrParser().parse_transactions(
+        engine.iter_pages(statement, first_page=first_page), start_page=first_page
+    )
+    elapsed = time.perf_counter() - start
+    sorter = OcrSorter()
+    transactions = sorter.cleanTransactions(sorter.groupTransactions(lines))
+    return elapsed, list(engine.page_log), transactions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--statement", help="Scanned statement to time (needs PaddleOCR)")
+    parser.add_argument("--dpi", type=float, default=144)
+    parser.add_argument("--first-page", type=int, default=2)
+    args = parser.parse_args()
+
+    checkLongerLaterPage()
+    if not args.statement:
+        return
+
+    engine = Ocr(use_cache=False, use_text_layer=False, dpi=args.dpi)
+    # Warm-up run: the first PaddleOCR calls initialise the predictors
+    engine.preprocess = False
+    runEngine(engine, args.statement, args.first_page)
+
+    results = {}
+    for preprocess in (False, True):
+        engine.preprocess = preprocess
+        results[preprocess] = runEngine(engine, args.statement, args.first_page)
+
+    full, preprocessed = results[False], results[True]
+    print(f"{'page':>4} {'full page ms':>13} {'preprocessed ms':>16}  engine")
+    for (page, _, before), (_, name, after) in zip(full[1], preprocessed[1]):
+        print(f"{page:>4} {before * 1000:>13.0f} {after * 1000:>16.0f}  {name}")
+    print(
+        f"total: {full[0]:.2f}s full page, {preprocessed[0]:.2f}s preprocessed "
+        f"({full[0] / preprocessed[0]:.2f}x)"
+    )
+
+    before, after = full[2], preprocessed[2]
+    same = sum(a == b for a, b in zip(before, after))
+    print(f"transactions: {len(before)} vs {len(after)}, {same} identical")
+    for a, b in zip(before, after):
+        if a != b:
+            print(f"  full page:    {a}\n  preprocessed: {b}")
+
+
+if __name__ == "__main__":
+    main()
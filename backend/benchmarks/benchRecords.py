@@ -0,0 +1,115 @@
+"""
+Memory footprint and save/load time of synthetic transactions as dicts
+(the old representation), slotted Transaction records and a columnar
+TransactionBatch, persisted as indented JSON (the current files) versus
+Parquet. Parquet needs pandas + pyarrow and is skipped without them.
+
+Run from backend/:
+    python -m benchmarks.benchRecords --count 1000000
+"""
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+from records import Transaction, TransactionBatch, recordToDict
+
+CATEGORIES = ["dr", "nets", "paynow", "cr", "fund", "bill"]
+LLM_CATEGORIES = ["dining", "transport", "shopping", "utilities", "misc", "others"]
+
+
+def syntheticColumns(count: int, seed: int = 0):
+    rng = random.Random(seed)
+    merchants = [f"MERCHANT {i:05d}" for i in range(5000)]
+    dates = [f"{d:02d} {m}" for m in ("Jan", "Feb", "Mar", "Apr") for d in range(1, 29)]
+    return {
+        "date": [rng.choice(dates) for _ in range(count)],
+        "category": [rng.choice(CATEGORIES) for _ in range(count)],
+        "amount": [f"{rng.randint(1, 500000) / 100:,.2f}" for _ in range(count)],
+        "company_person": [rng.choice(merchants) for _ in range(count)],
+        "llm_category": [rng.choice(LLM_CATEGORIES) for _ in range(count)],
+    }
+
+
+def measure(build):
+    """
+    Bytes allocated by `build()` (the container objects only: the column
+    strings are shared between representations) and the time it took.
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    value = build()
+    elapsed = time.perf_counter() - start
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return value, size, elapsed
+
+
+def saveJson(records, path) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(records, f, indent=2, default=recordToDict)
+
+
+def loadJson(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [Transaction.from_dict(t) for t in json.load(f)]
+
+
+def timed(fn):
+    start = time.perf_counter()
+    value = fn()
+    return value, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    columns = syntheticColumns(args.count)
+    names = list(columns)
+    rows = list(zip(*columns.values()))
+
+    dicts, dictBytes, dictSeconds = measure(lambda: [dict(zip(names, row)) for row in rows])
+    records, recordBytes, recordSeconds = measure(lambda: [Transaction(*row) for row in rows])
+    batch, batchBytes, batchSeconds = measure(lambda: TransactionBatch(**columns))
+    del rows
+
+    mb = 1024 * 1024
+    print(f"{args.count:,} transactions")
+    print(f"{'representation':>16} {'MB':>8} {'build s':>8}")
+    print(f"{'dict':>16} {dictBytes / mb:>8.1f} {dictSeconds:>8.2f}")
+    print(f"{'__slots__':>16} {recordBytes / mb:>8.1f} {recordSeconds:>8.2f}")
+    print(f"{'columnar':>16} {batchBytes / mb:>8.1f} {batchSeconds:>8.2f}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        jsonPath = os.path.join(tmp, "transactions.json")
+        _, saveSeconds = timed(lambda: saveJson(records, jsonPath))
+        loaded, loadSeconds = timed(lambda: loadJson(jsonPath))
+        assert loaded == records
+        print(f"\n{'format':>8} {'MB':>8} {'save s':>8} {'load s':>8}")
+        print(f"{'JSON':>8} {os.path.getsize(jsonPath) / mb:>8.1f} {saveSeconds:>8.2f} {loadSeconds:>8.2f}")
+
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            print(f"{'Parquet':>8} skipped (pyarrow not installed)")
+            return
+
+        parquetPath = os.path.join(tmp, "transactions.parquet")
+        _, saveSeconds = timed(lambda: TransactionBatch.from_records(records).to_parquet(parquetPath))
+        loaded, loadSeconds = timed(lambda: TransactionBatch.from_parquet(parquetPath).to_records())
+        assert loaded == records
+        print(f"{'Parquet':>8} {os.path.getsize(parquetPath) / mb:>8.1f} {saveSeconds:>8.2f} {loadSeconds:>8.2f}")
+        # Columnar load without materialising records
+        columnar, columnSeconds = timed(lambda: TransactionBatch.from_parquet(parquetPath))
+        assert len(columnar) == len(batch)
+        print(f"Parquet columns only: {columnSeconds:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Cold versus warm per-statement latency.
+
+Cold: a fresh Python process imports PaddleOCR, builds Ocr() and processes
+the statement, as `python main.py` does on every run.
+Warm: the same statement submitted repeatedly to an in-process
+StatementService whose OCR workers are already loaded.
+
+Needs PaddleOCR installed (e.g. inside the backend container) and only
+measures OCR + parsing + sorting; categorisation is skipped by default.
+
+Run from backend/:
+    python -m benchmarks.benchService --statement "bankStatements/AUG 2025_20251126153531065.pdf"
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+from service import StatementService
+
+COLD_SCRIPT = """
+from ocr.ocr import Ocr
+from ocr.parser import OcrParser
+from categoriser.sorter import OcrSorter
+import sys
+lines = OcrParser().parse_transactions(Ocr().perform_ocr(sys.argv[1]))
+sorter = OcrSorter()
+sorter.cleanTransactions(sorter.groupTransactions(lines))
+"""
+
+
+class _NoCategoriser:
+    llm_calls = 0
+
+    def categorise_many(self, transactions):
+        return transactions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--statement", required=True)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--categorise", action="store_true", help="include LLM categorisation")
+    args = parser.parse_args()
+
+    cold = []
+    for _ in range(args.runs):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, "-c", COLD_SCRIPT, args.statement],
+            check=True,
+            stdout=subprocess.DEVNULL,
+        )
+        cold.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    service = StatementService(workers=args.workers)
+    startup = time.perf_counter() - start
+    if not args.categorise:
+        service.llmCategoriser = _NoCategoriser()
+
+    warm = []
+    try:
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            jobId = service.submit(args.statement)
+            service.queue.join()
+            warm.append(time.perf_counter() - start)
+            assert service.jobs[jobId]["status"] == "done", service.jobs[jobId].get("error")
+    finally:
+        service.pool.terminate()
+        service.pool.join()
+
+    print(f"service start-up (one-off): {startup:.2f}s")
+    print(f"cold per statement: {statistics.mean(cold):.2f}s (runs: {args.runs})")
+    print(f"warm per statement: {statistics.mean(warm):.2f}s (runs: {args.runs})")
+
+
+if __name__ == "__main__":
+    main()
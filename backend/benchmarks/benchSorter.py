@@ -0,0 +1,94 @@
+"""
+Time and peak memory of grouping + cleaning multi-million-line statements:
+the list API (groupTransactions then cleanTransactions, which needs every
+line up front) versus the streaming iterTransactions state machine fed by
+a line iterator.
+
+Lines come from a parsed synthetic statement (benchmarks/syntheticStatement.py)
+that is replayed as a whole until at least --lines lines have been produced;
+each replayed line is a fresh OcrLine, as if it had just been parsed. Both
+runs must return the same transactions. Peak memory is measured with
+tracemalloc in a separate pass, since tracing slows everything down.
+
+Run from backend/:
+    python -m benchmarks.benchSorter
+    python -m benchmarks.benchSorter --lines 5000000
+"""
+
+import argparse
+import gc
+import itertools
+import time
+import tracemalloc
+
+from benchmarks.syntheticStatement import syntheticStatement
+from categoriser.sorter import OcrSorter
+from ocr.parser import OcrParser
+from records import OcrLine
+
+
+def lineStream(lines, total: int):
+    # Whole replays only, so no transaction is cut off at the end
+    for line in itertools.chain.from_iterable(itertools.repeat(lines, -(-total // len(lines)))):
+        yield OcrLine(line.raw_text, line.parts)
+
+
+def listApi(sorter: OcrSorter, lines, total: int):
+    allLines = list(lineStream(lines, total))
+    return sorter.cleanTransactions(sorter.groupTransactions(allLines))
+
+
+def streaming(sorter: OcrSorter, lines, total: int):
+    # Consume as a pipeline stage would, keeping only a running count
+    count, last = 0, None
+    for transaction in sorter.iterTransactions(lineStream(lines, total)):
+        count, last = count + 1, transaction
+    return count, last
+
+
+def timed(fn, *args, trace: bool = False):
+    gc.collect()
+    if trace:
+        tracemalloc.start()
+    start = time.perf_counter()
+    result = fn(*args)
+    elapsed = time.perf_counter() - start
+    peak = 0
+    if trace:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lines", type=int, default=2_000_000)
+    parser.add_argument("--statement-lines", type=int, default=20_000, help="Size of the replayed statement")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc pass")
+    args = parser.parse_args()
+
+    pages, _ = syntheticStatement(args.statement_lines, fmt="dict")
+    lines = OcrParser().parse_transactions(pages, start_page=1)
+    sorter = OcrSorter()
+
+    total = -(-args.lines // len(lines)) * len(lines)
+    listed, listSeconds, _ = timed(listApi, sorter, lines, args.lines)
+    (streamed, last), streamSeconds, _ = timed(streaming, sorter, lines, args.lines)
+    assert streamed == len(listed) and last == listed[-1], "streaming output differs"
+    # Full comparison on one replay of the statement
+    assert list(sorter.iterTransactions(lines)) == sorter.cleanTransactions(sorter.groupTransactions(lines))
+    del listed
+
+    listPeak = streamPeak = 0
+    if not args.no_memory:
+        _, _, listPeak = timed(listApi, sorter, lines, args.lines, trace=True)
+        _, _, streamPeak = timed(streaming, sorter, lines, args.lines, trace=True)
+
+    print(f"{total:,} lines -> {streamed:,} transactions")
+    print(f"{'':>10} {'seconds':>8} {'lines/s':>12} {'peak MB':>9}")
+    for label, seconds, peak in (("list", listSeconds, listPeak), ("streaming", streamSeconds, streamPeak)):
+        print(f"{label:>10} {seconds:>8.2f} {total / seconds:>12,.0f} {peak / 1e6:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Start-up cost: import time of the OCR, sorter, categoriser and full-pipeline
+entry points, and time to first result for OCR-only, categorise-only and
+full runs, each in a fresh interpreter.
+
+  - imports:    wall time of importing each entry module, and which heavy
+                packages (paddleocr, paddle, numpy, requests) it loaded
+  - ocr:        import + Ocr() + first page of --statement out of iter_pages
+  - categorise: import + buildCategoriser() + first categorise() answer
+  - full:       main.py's flow (StatementPipeline, optional warm-up, run)
+                until the statement's transactions are categorised, with
+                and without the concurrent warm-up
+
+Ollama is a local stub that takes --load-latency to "load" a model on its
+first request (or on a warm-up request), like a real model load. OCR needs
+PaddleOCR; set OCR_TEXT_LAYER=0 to force it on a digital statement. The OCR
+cache is off throughout.
+
+Run from backend/:
+    python -m benchmarks.benchStartup --statement "bankStatements/AUG 2025_20251126153531065.pdf"
+    OCR_TEXT_LAYER=0 python -m benchmarks.benchStartup --statement scanned.pdf --load-latency 3
+"""
+
+import time
+
+_START = time.perf_counter()
+
+import argparse  # noqa: E402
+import json  # noqa: E402
+import os  # noqa: E402
+import subprocess  # noqa: E402
+import sys  # noqa: E402
+import tempfile  # noqa: E402
+
+ENTRY_MODULES = ("ocr.ocr", "categoriser.sorter", "categoriser.categoriserFactory", "pipeline")
+HEAVY_PACKAGES = ("paddleocr", "paddle", "numpy", "requests")
+
+
+def childImports(module: str) -> dict:
+    __import__(module)
+    return {
+        "seconds": time.perf_counter() - _START,
+        "loaded": [name for name in HEAVY_PACKAGES if name in sys.modules],
+    }
+
+
+def childOcr(statement: str) -> dict:
+    from ocr.ocr import Ocr
+
+    engine = Ocr(use_cache=False)
+    next(iter(engine.iter_pages(statement, first_page=2)))
+    return {"seconds": time.perf_counter() - _START, "engine": engine.page_log[0][1]}
+
+
+def childCategorise() -> dict:
+    from categoriser.categoriserFactory import buildCategoriser
+
+    _, categoriser = buildCategoriser()
+    category = categoriser.categorise("STARTUP PROBE MERCHANT")
+    return {"seconds": time.perf_counter() - _START, "category": category}
+
+
+def childFull(statement: str, warm: bool) -> dict:
+    from pipeline import StatementPipeline
+
+    pipeline = StatementPipeline()
+    if warm:
+        pipeline.warmUp()
+    transactions = pipeline.run(statement)
+    return {"seconds": time.perf_counter() - _START, "transactions": len(transactions)}
+
+
+def runChild(args: list, env: dict) -> dict:
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.benchStartup", "--child", *args],
+        env=env,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--statement")
+    parser.add_argument("--load-latency", type=float, default=2.0, help="Simulated model load seconds")
+    parser.add_argument("--child", nargs="+", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        kind, rest = args.child[0], args.child[1:]
+        if kind == "imports":
+            result = childImports(rest[0])
+        elif kind == "ocr":
+            result = childOcr(rest[0])
+        elif kind == "categorise":
+            result = childCategorise()
+        else:
+            result = childFull(rest[0], warm=rest[1] == "warm")
+        print(json.dumps(result))
+        return
+
+    if not args.statement:
+        parser.error("--statement is required")
+    from benchmarks.ollamaStub import OllamaStub
+
+    tmp = tempfile.mkdtemp(prefix="bench_startup_")
+    env = {
+        **os.environ,
+        "OCR_CACHE": "0",
+        "CATEGORY_CACHE_PATH": os.path.join(tmp, "cache.sqlite3"),
+        # Keep the probe off the local classifier's fast path
+        "LOCAL_CLASSIFIER_THRESHOLD": "1.1",
+    }
+
+    print(f"{'entry module':>32} {'import ms':>10}  heavy packages loaded")
+    for module in ENTRY_MODULES:
+        result = runChild(["imports", module], env)
+        print(f"{module:>32} {result['seconds'] * 1000:>10.0f}  {', '.join(result['loaded']) or '-'}")
+
+    print(f"\n{'run':>32} {'first result s':>15}")
+    result = runChild(["ocr", args.statement], env)
+    print(f"{'ocr (first page, ' + result['engine'] + ')':>32} {result['seconds']:>15.2f}")
+
+    runs = [("categorise", ["categorise"])] + [
+        (f"full ({label})", ["full", args.statement, label]) for label in ("cold", "warm")
+    ]
+    for label, child in runs:
+        # A fresh stub per run, so every run starts with the model unloaded
+        with OllamaStub(latency=0.05, load_latency=args.load_latency, response="dining") as stub:
+            if os.path.exists(env["CATEGORY_CACHE_PATH"]):
+                os.remove(env["CATEGORY_CACHE_PATH"])
+            result = runChild(child, {**env, "OLLAMA_BASE_URL": stub.base_url})
+        print(f"{label:>32} {result['seconds']:>15.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Per-merchant latency of blocking versus streamed generation with early
+termination, against a local Ollama stub that simulates per-token
+generation time and a model that keeps talking after the category line.
+
+Run from backend/:
+    python -m benchmarks.benchStreaming
+"""
+
+import argparse
+import contextlib
+import io
+import time
+
+from benchmarks.ollamaStub import OllamaStub
+from categoriser.llmCategoriser import LlmCategoriser, categoryIsFinal
+from categoriser.llmService import LLMService
+
+RESPONSE = (
+    "<think>The name looks like a small drink stall, which is food and beverage. "
+    "That maps to dining rather than shopping.</think>\n"
+    "dining\n"
+    "The merchant appears to be a drinks stall, so the most suitable category is "
+    "dining because it sells beverages for immediate consumption."
+)
+
+
+def run(stub: OllamaStub, merchants: int, stream: bool) -> float:
+    with contextlib.redirect_stdout(io.StringIO()):
+        service = LLMService(
+            base_url=stub.base_url,
+            concurrency=1,
+            stream=stream,
+            early_stop=categoryIsFinal if stream else None,
+        )
+        categoriser = LlmCategoriser(service.predict)
+        start = time.perf_counter()
+        transactions = categoriser.categorise_many(
+            [{"company_person": f"DRINKS STALL {i}"} for i in range(merchants)]
+        )
+        elapsed = time.perf_counter() - start
+        service.close()
+
+    assert all(t["llm_category"] == "dining" for t in transactions)
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--merchants", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.01)
+    parser.add_argument("--gen-latency", type=float, default=0.005)
+    args = parser.parse_args()
+
+    print(f"{'mode':>10} {'ms/merchant':>12} {'tokens/merchant':>16}")
+    for label, stream in (("blocking", False), ("streaming", True)):
+        with OllamaStub(
+            latency=args.latency, gen_latency=args.gen_latency, response=RESPONSE
+        ) as stub:
+            elapsed = run(stub, args.merchants, stream)
+            # Let the stub notice disconnects before reading its counters
+            time.sleep(0.05)
+            print(
+                f"{label:>10} {1000 * elapsed / args.merchants:>12.2f} "
+                f"{stub.generated_tokens / args.merchants:>16.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,298 @@
+"""
+Benchmark suite for every pipeline stage on synthetic statements, with a
+stored baseline and regression thresholds.
+
+For each OCR format (PaddleX dicts, legacy lists) and scale (in transaction
+lines), a statement from benchmarks/syntheticStatement.py is run through:
+
+  - parse:      OcrParser.parse_transactions
+  - group:      OcrSorter.groupTransactions
+  - clean:      OcrSorter.cleanTransactions (checked against the expected
+                transactions; a mismatch fails the run)
+  - overrides:  getCompanyOverride for every cleaned merchant
+  - categorise: LlmCategoriser.categorise_many with a stub predict_fn and a
+                cold category cache
+
+Each stage is timed best-of --repeat; small cases are repeated until they
+have run for about --min-time seconds, so their minimum is stable. As in
+timeit, the garbage collector is off while a pass runs. Results are
+compared with the stored baseline (benchmarks/baseline.json): a stage
+regresses when it is more than its threshold slower (THRESHOLDS, or
+--threshold for all) and also slower by more than --min-delta ms, which
+keeps timer noise at small scales from failing the run. Exits with status 1
+on any regression.
+
+Cases that look regressed are re-run (--confirm times) and keep their best
+time per stage, so a burst of load on a shared machine (which moved whole
+runs by 30-50% here) has to repeat before it fails the suite.
+
+Timings depend on the machine and the code: the baseline's "meta" records
+the CPU, Python and commit it was recorded on. It holds the median of
+--baseline-runs whole suite runs per stage, so one lucky or unlucky run
+does not set the bar. Re-save it (--save-baseline) on the machine the
+suite is compared on, and in the same commit as any change that is meant
+to move a stage's timings, so the gate keeps comparing against the
+current code rather than an older baseline.
+
+Run from backend/:
+    python -m benchmarks.benchSuite
+    python -m benchmarks.benchSuite --scales 10,1000,100000,1000000 --repeat 1
+    python -m benchmarks.benchSuite --save-baseline
+"""
+
+import argparse
+import gc
+import json
+import math
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from benchmarks.syntheticStatement import syntheticStatement
+from categoriser.categoryCache import CategoryCache
+from categoriser.companyOverrides import getCompanyOverride
+from categoriser.llmCategoriser import TARGET_CATEGORIES, LlmCategoriser
+from categoriser.sorter import OcrSorter
+from ocr.parser import OcrParser
+
+DEFAULT_BASELINE = Path(__file__).parent / "baseline.json"
+STAGES = ("parse", "group", "clean", "overrides", "categorise")
+# Allowed slowdown per stage before it counts as a regression
+THRESHOLDS = {"parse": 0.25, "group": 0.25, "clean": 0.25, "overrides": 0.25, "categorise": 0.25}
+
+
+def stubPredict(prompt: str) -> str:
+    # Deterministic stand-in for the LLM: same prompt, same category
+    return TARGET_CATEGORIES[zlib.crc32(prompt.encode()) % len(TARGET_CATEGORIES)]
+
+
+def runStages(pages, expected, tmp: str) -> Dict[str, float]:
+    """
+    One pass over all stages. Returns seconds per stage.
+    """
+    gc.collect()
+    gc.disable()
+    try:
+        return _timeStages(pages, expected, tmp)
+    finally:
+        gc.enable()
+
+
+def _timeStages(pages, expected, tmp: str) -> Dict[str, float]:
+    seconds = {}
+    parser, sorter = OcrParser(), OcrSorter()
+
+    start = time.perf_counter()
+    lines = parser.parse_transactions(pages, start_page=1)
+    seconds["parse"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    grouped = sorter.groupTransactions(lines)
+    seconds["group"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    cleaned = sorter.cleanTransactions(grouped)
+    seconds["clean"] = time.perf_counter() - start
+    if cleaned != expected:
+        raise AssertionError(
+            f"cleaned transactions differ from the generated ones ({len(cleaned)} vs {len(expected)})"
+        )
+
+    start = time.perf_counter()
+    for transaction in cleaned:
+        getCompanyOverride(transaction.company_person)
+    seconds["overrides"] = time.perf_counter() - start
+
+    cache = CategoryCache(path=tempfile.mktemp(suffix=".sqlite3", dir=tmp))
+    categoriser = LlmCategoriser(predict_fn=stubPredict, cache=cache, model_name="bench-stub")
+    start = time.perf_counter()
+    categoriser.categorise_many(cleaned)
+    seconds["categorise"] = time.perf_counter() - start
+    cache.close()
+    return seconds
+
+
+def runCase(fmt: str, scale: int, repeat: int, min_time: float) -> Dict[str, Any]:
+    """
+    Best-of timings for one format/scale.
+    """
+    pages, expected = syntheticStatement(scale, fmt=fmt)
+    with tempfile.TemporaryDirectory() as tmp:
+        best = runStages(pages, expected, tmp)
+        runs = max(repeat, min(100, math.ceil(min_time / sum(best.values()))))
+        for _ in range(runs - 1):
+            for stage, seconds in runStages(pages, expected, tmp).items():
+                best[stage] = min(seconds, best[stage])
+    print(
+        f"{fmt + '/' + str(scale):>16} {len(expected):>9,} txns  "
+        + "  ".join(f"{stage} {best[stage] * 1000:8.2f}ms" for stage in STAGES)
+    )
+    return {"transactions": len(expected), "seconds": best}
+
+
+def cpuModel() -> str:
+    # platform.processor() is only the architecture on Linux
+    try:
+        with open("/proc/cpuinfo", "r", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("model name"):
+                    return line.split(":", 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor() or platform.machine()
+
+
+def gitCommit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def runSuite(formats: List[str], scales: List[int], repeat: int, min_time: float = 0.5) -> Dict[str, Any]:
+    # Compile the override engine outside the timings
+    getCompanyOverride("")
+    results = {
+        f"{fmt}/{scale}": runCase(fmt, scale, repeat, min_time) for fmt in formats for scale in scales
+    }
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "processor": cpuModel(),
+            "cpus": os.cpu_count(),
+            "commit": gitCommit(),
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "repeat": repeat,
+            "min_time": min_time,
+        },
+        "results": results,
+    }
+
+
+def medianSuite(runs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Per-stage median of several runSuite outputs, as stored in the baseline.
+    """
+    results = {
+        key: {
+            "transactions": result["transactions"],
+            "seconds": {
+                stage: statistics.median(run["results"][key]["seconds"][stage] for run in runs)
+                for stage in STAGES
+            },
+        }
+        for key, result in runs[0]["results"].items()
+    }
+    return {"meta": {**runs[0]["meta"], "runs": len(runs)}, "results": results}
+
+
+def compare(
+    current: Dict[str, Any],
+    baseline: Dict[str, Any],
+    threshold: Optional[float] = None,
+    min_delta: float = 0.002,
+) -> List[str]:
+    """
+    Print current versus baseline timings and return the regressions.
+
+    Args:
+        current: Output of runSuite
+        baseline: Stored runSuite output
+        threshold: Allowed relative slowdown for every stage (overrides THRESHOLDS)
+        min_delta: Slowdowns smaller than this many seconds never count
+
+    Returns:
+        (format/scale, description) per regressed stage
+    """
+    regressions = []
+    print(f"\n{'case':>16} {'stage':>11} {'baseline ms':>12} {'current ms':>11} {'change':>8}")
+    for key, result in current["results"].items():
+        base = baseline["results"].get(key)
+        if base is None:
+            print(f"{key:>16} {'':>11} {'(no baseline)':>12}")
+            continue
+        for stage in STAGES:
+            now, before = result["seconds"][stage], base["seconds"].get(stage)
+            if before is None:
+                continue
+            change = now / before - 1 if before else 0.0
+            allowed = THRESHOLDS[stage] if threshold is None else threshold
+            regressed = change > allowed and now - before > min_delta
+            flag = "  REGRESSION" if regressed else ""
+            print(f"{key:>16} {stage:>11} {before * 1000:>12.2f} {now * 1000:>11.2f} {change:>+8.0%}{flag}")
+            if regressed:
+                regressions.append((key, f"{key} {stage}: {before * 1000:.2f} -> {now * 1000:.2f} ms ({change:+.0%})"))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", default="10,1000,100000", help="Comma-separated transaction line counts")
+    parser.add_argument("--formats", default="dict,legacy")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--min-time", type=float, default=0.5, help="Minimum seconds of repeats per case")
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE))
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the baseline")
+    parser.add_argument(
+        "--baseline-runs", type=int, default=3, help="Suite runs whose per-stage median is saved as the baseline"
+    )
+    parser.add_argument("--output", help="Also write this run's results to a JSON file")
+    parser.add_argument("--threshold", type=float, default=None, help="Allowed slowdown for every stage, e.g. 0.25")
+    parser.add_argument("--min-delta", type=float, default=2.0, help="Ignore slowdowns below this many ms")
+    parser.add_argument("--confirm", type=int, default=2, help="Re-runs of a regressed case before it fails")
+    args = parser.parse_args()
+
+    scales = [int(scale) for scale in args.scales.split(",")]
+    formats = args.formats.split(",")
+    current = runSuite(formats, scales, args.repeat, args.min_time)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(current, f, indent=2)
+    if args.save_baseline:
+        runs = [current] + [
+            runSuite(formats, scales, args.repeat, args.min_time) for _ in range(args.baseline_runs - 1)
+        ]
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(medianSuite(runs), f, indent=2)
+        print(f"\nBaseline saved to {args.baseline}")
+        return
+    if not os.path.exists(args.baseline):
+        print(f"\nNo baseline at {args.baseline}; run with --save-baseline first")
+        return
+
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = compare(current, baseline, args.threshold, args.min_delta / 1000)
+    for _ in range(args.confirm):
+        if not regressions:
+            break
+        keys = sorted({key for key, _ in regressions})
+        print(f"\nRe-running {len(keys)} case(s) to confirm")
+        for key in keys:
+            fmt, scale = key.split("/")
+            rerun = runCase(fmt, int(scale), args.repeat, args.min_time)["seconds"]
+            seconds = current["results"][key]["seconds"]
+            for stage in STAGES:
+                seconds[stage] = min(seconds[stage], rerun[stage])
+        regressions = compare(current, baseline, args.threshold, args.min_delta / 1000)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s):")
+        for _, regression in regressions:
+            print(f"  {regression}")
+        sys.exit(1)
+    print("\nNo regressions against the baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Per-page time of the embedded text layer fast path versus rasterising +
+PaddleOCR on the same statement, and whether both produce the same cleaned
+transactions. Fails if the cleaned merchants (company_person) differ, since
+those feed the category cache, the local classifier and the merchant index.
+Needs PaddleOCR (for the OCR side of the comparison).
+
+Run from backend/:
+    python -m benchmarks.benchTextLayer --statement "bankStatements/AUG 2025_20251126153531065.pdf"
+"""
+
+import argparse
+import contextlib
+import io
+import time
+
+from categoriser.sorter import OcrSorter
+from ocr.ocr import Ocr
+from ocr.parser import OcrParser
+
+
+def runEngine(engine: Ocr, statement: str):
+    engine.page_log.clear()
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        lines = OcrParser().parse_transactions(
+            engine.iter_pages(statement, first_page=2), start_page=2
+        )
+        elapsed = time.perf_counter() - start
+        sorter = OcrSorter()
+        transactions = sorter.cleanTransactions(sorter.groupTransactions(lines))
+    return elapsed, list(engine.page_log), transactions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--statement", required=True)
+    args = parser.parse_args()
+
+    engine = Ocr(use_cache=False)
+    results = {}
+    for use_text_layer in (True, False):
+        engine.use_text_layer = use_text_layer
+        results[use_text_layer] = runEngine(engine, args.statement)
+
+    print(f"{'page':>4} {'engine':>12} {'ms':>9}")
+    for use_text_layer in (True, False):
+        for page, name, seconds in results[use_text_layer][1]:
+            print(f"{page:>4} {name:>12} {seconds * 1000:>9.1f}")
+
+    fast, slow = results[True][0], results[False][0]
+    print(f"text layer: {fast:.3f}s  PaddleOCR: {slow:.3f}s  speed-up: {slow / fast:.0f}x")
+
+    fastTx, slowTx = results[True][2], results[False][2]
+    same = sum(a == b for a, b in zip(fastTx, slowTx))
+    print(f"transactions: {len(fastTx)} vs {len(slowTx)}, {same} identical")
+    for a, b in zip(fastTx, slowTx):
+        if a != b:
+            print(f"  text layer: {a}\n  PaddleOCR:  {b}")
+
+    fastMerchants = [t.company_person for t in fastTx]
+    slowMerchants = [t.company_person for t in slowTx]
+    assert fastMerchants == slowMerchants, (
+        f"cleaned merchants differ: text layer {fastMerchants} vs PaddleOCR {slowMerchants}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""
+Minimal stand-in for Ollama's /api/generate endpoint, for benchmarks and
+local experiments without a real model.
+
+Every request sleeps for `latency` seconds (plus `token_latency` per
+estimated prompt token) and answers with a fixed response, or with whatever
+`respond(payload)` returns. Estimated prompt tokens (~4 characters each) are
+accumulated in `prompt_tokens` and reported as Ollama's prompt_eval_count.
+
+Generation is simulated at `gen_latency` seconds per whitespace-separated
+output token. Requests with "stream": true are answered as chunked NDJSON,
+one token per line, and stop generating when the client disconnects.
+
+With `load_latency`, the first request for each model also waits that long
+while the model "loads" (requests for a model that is still loading wait
+for it). A request without a prompt only loads the model, as in Ollama;
+loaded models are listed in `loaded`.
+"""
+
+import json
+import re
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Optional
+
+
+class OllamaStub:
+    def __init__(
+        self,
+        latency: float = 0.05,
+        response: str = "Looks like a food stall.\ndining",
+        port: int = 0,
+        respond: Optional[Callable[[dict], str]] = None,
+        token_latency: float = 0.0,
+        gen_latency: float = 0.0,
+        load_latency: float = 0.0,
+    ):
+        self.latency = latency
+        self.response = response
+        self.respond = respond
+        self.token_latency = token_latency
+        self.requests = 0
+        self.prompt_tokens = 0
+        self.generated_tokens = 0
+        self.gen_latency = gen_latency
+        self.load_latency = load_latency
+        self.loaded = set()
+        self._lock = threading.Lock()
+        self._load_locks = {}
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _load(self, model) -> None:
+        with self._lock:
+            lock = self._load_locks.setdefault(model, threading.Lock())
+        with lock:
+            if model not in self.loaded:
+                time.sleep(self.load_latency)
+                self.loaded.add(model)
+
+    def _make_handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                # Headers and body are written separately; avoid Nagle delays
+                self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                stub._load(payload.get("model"))
+                if "prompt" not in payload:
+                    self._send_json(
+                        {"model": payload.get("model"), "response": "", "done": True, "done_reason": "load"}
+                    )
+                    return
+                prompt_tokens = len(payload.get("prompt", "")) // 4
+                with stub._lock:
+                    stub.requests += 1
+                    stub.prompt_tokens += prompt_tokens
+                time.sleep(stub.latency + stub.token_latency * prompt_tokens)
+
+                response = stub.respond(payload) if stub.respond else stub.response
+                tokens = re.findall(r"\S+\s*|\s+", response)
+                if payload.get("stream"):
+                    self._stream(payload, tokens, prompt_tokens)
+                    return
+
+                time.sleep(stub.gen_latency * len(tokens))
+                with stub._lock:
+                    stub.generated_tokens += len(tokens)
+                self._send_json(
+                    {
+                        "model": payload.get("model"),
+                        "response": response,
+                        "done": True,
+                        "prompt_eval_count": prompt_tokens,
+                        "eval_count": len(tokens),
+                    }
+                )
+
+            def _send_json(self, data):
+                body = json.dumps(data).encode("utf-8")
+                try:
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                except (BrokenPipeError, ConnectionResetError):
+                    # Client gave up (e.g. its timeout expired)
+                    self.close_connection = True
+
+            def _stream(self, payload, tokens, prompt_tokens):
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+
+                def chunk(data: bytes):
+                    self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+                    self.wfile.flush()
+
+                try:
+                    for token in tokens:
+                        time.sleep(stub.gen_latency)
+                        with stub._lock:
+                            stub.generated_tokens += 1
+                        line = {"model": payload.get("model"), "response": token, "done": False}
+                        chunk(json.dumps(line).encode("utf-8") + b"\n")
+                    done = {
+                        "model": payload.get("model"),
+                        "response": "",
+                        "done": True,
+                        "prompt_eval_count": prompt_tokens,
+                        "eval_count": len(tokens),
+                    }
+                    chunk(json.dumps(done).encode("utf-8") + b"\n")
+                    chunk(b"")
+                except (BrokenPipeError, ConnectionResetError):
+                    # Client closed the stream early
+                    self.close_connection = True
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> "OllamaStub":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,290 @@
+"""
+Synthetic bank statements as OCR output, for benchmarks.
+
+`syntheticStatement(lines)` lays out a UOB-style statement of roughly
+`lines` transaction lines and returns it the way an OCR engine would:
+
+  - fmt="dict":   PaddleX OCRResult-style {"rec_texts", "rec_polys",
+                  "rec_scores"} per page (polygons as an int16 array)
+  - fmt="legacy": PaddleOCR 2.x [[box, (text, score)], ...] per page
+
+Page 1 is an account summary (skipped by OcrParser), every page repeats the
+bank header and column titles, and the last page ends with the totals and
+the "End of Transaction Details" marker. Transactions follow the real line
+patterns OcrSorter relies on:
+
+  - DR debit card (3 lines), NETS (3), PayNow (3-4), salary/inward credit
+    CR (4), fund transfer (3-4), bill payment (3), and an interest credit
+    at the end of the statement (skipped by cleanTransactions)
+
+Merchants are drawn from a Zipf-like pool (a few very frequent, a long
+tail), with PTE/LTD/SINGAPORE suffixes in the varied forms OCR returns.
+Boxes come back in reading order with a few pixels of jitter, and no
+transaction is split across pages.
+
+The expected cleaned transactions are returned alongside, so benchmarks can
+check the pipeline output as well as time it.
+
+Generate from backend/ (prints a summary; --out writes the pages as JSON):
+    python -m benchmarks.syntheticStatement --lines 1000 --format legacy
+"""
+
+import argparse
+import json
+import itertools
+import random
+from typing import Any, List, Tuple
+
+import numpy as np
+
+from records import Transaction
+
+MONTHS = ("Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec")
+
+# Column x positions at 144 DPI (rasterisation scale 2.0), as on the sample
+DATE_X, DESCRIPTION_X, WITHDRAWAL_X, DEPOSIT_X, BALANCE_X = 60, 170, 760, 900, 1040
+ROW_PITCH = 30
+BOX_HEIGHT = 20
+PAGE_TOP = 80
+ROWS_PER_PAGE = 48
+
+MERCHANT_WORDS = [
+    "GOLDEN", "LUCKY", "KOPI", "CORNER", "FRESH", "MART", "NOODLE", "HOUSE",
+    "TEA", "GARDEN", "EAST", "COAST", "BAKERY", "SUNRISE", "CHICKEN", "RICE",
+    "ORCHARD", "TAMPINES", "JURONG", "BEDOK", "PHARMACY", "BOOKS", "STUDIO",
+    "FITNESS", "FLORIST", "SUSHI", "BISTRO", "GROCER", "HARDWARE", "OPTICS",
+]
+# Real names, some of which have COMPANY_OVERRIDES entries
+KNOWN_MERCHANTS = [
+    "ST LOGISTICS", "GRAB", "M1 MAXX", "WHOLLY GREENS", "COCA-COLA", "SHENG SIONG",
+    "NTUC FAIRPRICE", "STARBUCKS", "MCDONALDS", "KOUFU", "SHOPEE", "LAZADA",
+    "UNIQLO", "GUARDIAN", "WATSONS", "POPULAR BOOK", "SIMPLYGO", "SINGTEL",
+]
+PEOPLE = [
+    "Nur hazah", "Tan Wei Ming", "Lim Jia Hui", "Muhammad Faiz", "Priya Raj",
+    "Ong Kai Xiang", "Siti Aminah", "Chen Yu Ting", "Ravi Kumar", "Goh Mei Ling",
+]
+EMPLOYERS = ["ACME LOGISTICS", "SUNRISE TECH", "HARBOUR FRONT HOLDINGS", "GOLDEN BAKERY"]
+BILLERS = ["SP SERVICES", "STARHUB", "SINGTEL", "TOWN COUNCIL", "M1"]
+SUFFIXES = [" PTE LTD", " PTE. LTD.", " SINGAPORE SG", " PTE LTD SINGAPORE SG", ""]
+
+# Relative frequency of each transaction type
+TEMPLATE_WEIGHTS = {"dr": 50, "nets": 15, "paynow": 20, "cr": 3, "fund": 6, "bill": 6}
+
+
+def merchantPool(size: int, rng: random.Random) -> List[str]:
+    pool = list(KNOWN_MERCHANTS)
+    while len(pool) < size:
+        pool.append(" ".join(rng.sample(MERCHANT_WORDS, rng.randint(2, 3))))
+    return pool[:size]
+
+
+def formatAmount(cents: int) -> str:
+    return f"{cents / 100:,.2f}"
+
+
+class _Layout:
+    """
+    Accumulates rows into pages and renders them in the requested format.
+    """
+
+    def __init__(self, rng: random.Random, fmt: str, rows_per_page: int):
+        self.rng = rng
+        self.fmt = fmt
+        self.rows_per_page = rows_per_page
+        self.pages: List[Any] = []
+        self._rows: List[List[Tuple[int, str]]] = []
+        # Legacy polygons are shared between identical boxes to keep 1M-line
+        # statements in memory
+        self._polys = {}
+
+    def page_full(self, rows_needed: int) -> bool:
+        return len(self._rows) + rows_needed > self.rows_per_page
+
+    def add_row(self, cells: List[Tuple[int, str]]) -> None:
+        self._rows.append(cells)
+
+    def add_header(self, page_no: int) -> None:
+        self.add_row([(DATE_X, "UOB")])
+        self.add_row([(BALANCE_X - 100, f"Page {page_no}")])
+        self.add_row([(DATE_X, "Account Transaction Details")])
+        self.add_row([(DATE_X, "One Account"), (DESCRIPTION_X + 300, "772-315-311-9")])
+        self.add_row(
+            [
+                (DATE_X, "Date"),
+                (DESCRIPTION_X, "Description"),
+                (WITHDRAWAL_X, "Withdrawals SGD"),
+                (DEPOSIT_X, "Deposits SGD"),
+                (BALANCE_X, "Balance SGD"),
+            ]
+        )
+
+    def end_page(self) -> None:
+        texts, polys = [], []
+        for row_index, cells in enumerate(self._rows):
+            y = PAGE_TOP + row_index * ROW_PITCH + self.rng.randint(-2, 2)
+            for x, text in cells:
+                x0 = x + self.rng.randint(-3, 3)
+                top = y + self.rng.randint(-2, 2)
+                texts.append(text)
+                polys.append((x0, top, x0 + 9 * len(text), top + BOX_HEIGHT))
+        self._rows = []
+
+        if self.fmt == "dict":
+            boxes = np.array(polys, dtype=np.int16).reshape(-1, 4)
+            x0, y0, x1, y1 = boxes.T
+            rec_polys = np.stack(
+                [np.stack([x0, y0], 1), np.stack([x1, y0], 1), np.stack([x1, y1], 1), np.stack([x0, y1], 1)],
+                axis=1,
+            )
+            scores = np.full(len(texts), 0.99, dtype=np.float32)
+            self.pages.append({"rec_texts": texts, "rec_polys": rec_polys, "rec_scores": scores})
+        else:
+            page = []
+            for text, box in zip(texts, polys):
+                poly = self._polys.get(box)
+                if poly is None:
+                    x0, y0, x1, y1 = box
+                    poly = self._polys[box] = [[x0, y0], [x1, y0], [x1, y1], [x0, y1]]
+                page.append([poly, (text, 0.99)])
+            self.pages.append(page)
+
+
+def syntheticStatement(
+    lines: int,
+    seed: int = 0,
+    fmt: str = "dict",
+    merchants: int = 2000,
+    rows_per_page: int = ROWS_PER_PAGE,
+) -> Tuple[List[Any], List[Transaction]]:
+    """
+    Lay out a synthetic statement as OCR output.
+
+    Args:
+        lines: Approximate number of transaction lines (10 to 1M+)
+        seed: Random seed; the same arguments always give the same statement
+        fmt: "dict" (PaddleX OCRResult-style) or "legacy" (PaddleOCR 2.x lists)
+        merchants: Size of the merchant pool
+        rows_per_page: Rows per page, headers included
+
+    Returns:
+        (pages, expected cleaned transactions); pages include the summary
+        page, so parse them with start_page=1
+    """
+    if fmt not in ("dict", "legacy"):
+        raise ValueError(f"unknown format: {fmt}")
+    rng = random.Random(seed)
+    pool = merchantPool(merchants, rng)
+    # Zipf-like: the merchant at rank r is picked with weight 1/r
+    weights = list(itertools.accumulate(1 / rank for rank in range(1, len(pool) + 1)))
+    kinds = list(TEMPLATE_WEIGHTS)
+    kindWeights = list(itertools.accumulate(TEMPLATE_WEIGHTS.values()))
+
+    layout = _Layout(rng, fmt, rows_per_page)
+    layout.add_row([(DATE_X, "Statement of Account")])
+    layout.add_row([(DATE_X, "Account Summary"), (BALANCE_X, "SGD")])
+    layout.add_row([(DATE_X, "One Account 772-315-311-9"), (BALANCE_X, "1,099.64")])
+    layout.end_page()
+
+    month = MONTHS[rng.randrange(12)]
+    balance = rng.randint(100_000, 500_000)
+    expected: List[Transaction] = []
+    page_no = 2
+    layout.add_header(page_no)
+    layout.add_row([(DATE_X, f"01 {month}"), (DESCRIPTION_X, "BALANCE B/F"), (BALANCE_X, formatAmount(balance))])
+
+    written = 0
+    index = 0
+    while written < lines:
+        kind = rng.choices(kinds, cum_weights=kindWeights)[0]
+        day = f"{min(28, 1 + index * 28 // max(1, lines // 3)):02d} {month}"
+        cents = rng.randint(100, 20_000) if kind != "cr" else rng.randint(200_000, 600_000)
+        ref = rng.randint(10**6, 10**7 - 1)
+        credit = kind == "cr"
+        balance += cents if credit else -cents
+        if balance < 0:
+            balance += 1_000_000
+        amountCell = (DEPOSIT_X if credit else WITHDRAWAL_X, formatAmount(cents))
+        balanceCell = (BALANCE_X, formatAmount(balance))
+
+        if kind == "dr":
+            name = rng.choices(pool, cum_weights=weights)[0]
+            rows = [
+                [(DESCRIPTION_X, f"{day.upper()} 0269 {ref}")],
+                [(DESCRIPTION_X, name + rng.choice(SUFFIXES))],
+            ]
+            description, company = "Misc DR-Debit Card", name
+        elif kind == "nets":
+            name = rng.choices(pool, cum_weights=weights)[0].split()[0]
+            terminal = f"STAL0{ref}"
+            rows = [[(DESCRIPTION_X, f"{name} {terminal}")], [(DESCRIPTION_X, f"xxxxxx{ref % 10000:04d}")]]
+            description, company = "NETS Debit-Consumer", f"{name} {terminal}"
+        elif kind == "paynow":
+            person = rng.choice(PEOPLE)
+            rows = [[(DESCRIPTION_X, f"PIB25{ref}{ref}")], [(DESCRIPTION_X, person)]]
+            if rng.random() < 0.7:
+                rows.append([(DESCRIPTION_X, "OTHR Transfer - Mobile")])
+            description, company = "PAYNOW-FAST", person.upper()
+        elif kind == "cr":
+            employer = rng.choice(EMPLOYERS)
+            rows = [
+                [(DESCRIPTION_X, f"IBG{ref}")],
+                [(DESCRIPTION_X, employer + " PTE LTD")],
+                [(DESCRIPTION_X, "SALA Salary")],
+            ]
+            description, company = "Inward Credit-FAST", employer
+        elif kind == "fund":
+            person = rng.choice(PEOPLE)
+            rows = [[(DESCRIPTION_X, f"MBK-{ref}")], [(DESCRIPTION_X, person)]]
+            if rng.random() < 0.5:
+                rows.append([(DESCRIPTION_X, "Transfer - Mobile")])
+            description, company = "Fund Transfer", person.upper()
+        else:
+            biller = rng.choice(BILLERS)
+            rows = [[(DESCRIPTION_X, f"MBK-{ref}")], [(DESCRIPTION_X, biller + " LTD")]]
+            description, company = "Bill Payment", biller
+
+        if layout.page_full(1 + len(rows)):
+            layout.end_page()
+            page_no += 1
+            layout.add_header(page_no)
+        layout.add_row([(DATE_X, day), (DESCRIPTION_X, description), amountCell, balanceCell])
+        for row in rows:
+            layout.add_row(row)
+        expected.append(Transaction(day, kind, formatAmount(cents), company))
+        written += 1 + len(rows)
+        index += 1
+
+    if layout.page_full(3):
+        layout.end_page()
+        page_no += 1
+        layout.add_header(page_no)
+    balance += 4
+    layout.add_row(
+        [(DATE_X, f"28 {month}"), (DESCRIPTION_X, "Interest Credit"), (DEPOSIT_X, "0.04"), (BALANCE_X, formatAmount(balance))]
+    )
+    layout.add_row([(DESCRIPTION_X, "Total"), (BALANCE_X, formatAmount(balance))])
+    layout.add_row([(DATE_X, "End of Transaction Details")])
+    layout.end_page()
+    return layout.pages, expected
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, default=1000)
+    parser.add_argument("--format", choices=["dict", "legacy"], default="dict")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="Write the OCR pages to this JSON file")
+    args = parser.parse_args()
+
+    pages, expected = syntheticStatement(args.lines, seed=args.seed, fmt=args.format)
+    boxes = sum(len(page["rec_texts"]) if isinstance(page, dict) else len(page) for page in pages)
+    print(f"{len(pages)} pages, {boxes} boxes, {len(expected)} transactions")
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(pages, f, default=lambda a: a.tolist())
+        print(f"Wrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
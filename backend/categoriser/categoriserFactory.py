@@ -0,0 +1,230 @@
+"""
+Builds the categoriser stack used by main.py and the statement service:
+LLMService + CategoryCache + LocalClassifier + LlmCategoriser, configured
+from environment variables.
+
+  - CATEGORISER_BATCH_SIZE: merchants per prompt (default 1)
+  - OLLAMA_NUM_PREDICT: max generated tokens per request (default 64, or
+    16 per merchant + 32 for batched prompts)
+  - OLLAMA_STREAM=1: stream responses and stop at the category line
+  - OLLAMA_CONSTRAIN=1: restrict output to the target categories
+  - LOCAL_CLASSIFIER_THRESHOLD: similarity needed for the local fast path
+  - OLLAMA_MODEL_TIERS: comma-separated models, fastest first (e.g.
+    "llama3.2:1b,llama3.1:8b"); enables the model cascade in place of
+    OLLAMA_MODEL and forces single-merchant prompts
+  - OLLAMA_TIER_TIMEOUTS: comma-separated request timeouts per tier in
+    seconds (the last value is reused for any remaining tiers)
+  - OLLAMA_KEEP_ALIVE: how long Ollama keeps the model(s) loaded after the
+    warm-up and each request (default "30m", see LLMService)
+  - OLLAMA_BREAKER_FAILURES / OLLAMA_BREAKER_COOLDOWN: consecutive failures
+    that take a tier out of the cascade, and for how many seconds
+  - MERCHANT_INDEX=0: disable the MinHash/LSH merchant index that maps OCR
+    variants of a merchant to one canonical name (on by default)
+  - MERCHANT_INDEX_THRESHOLD: shingle similarity needed to join a merchant
+"""
+
+import logging
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from categoriser.categoryCache import CategoryCache
+from categoriser.companyOverrides import COMPANY_OVERRIDES
+from categoriser.llmCategoriser import (
+    CATEGORY_FORMAT,
+    TARGET_CATEGORIES,
+    LlmCategoriser,
+    categoryIsFinal,
+)
+from categoriser.llmService import LLMService
+from categoriser.localClassifier import DEFAULT_MODEL_PATH, LocalClassifier
+from categoriser.merchantIndex import DEFAULT_INDEX_PATH, MerchantIndex
+from categoriser.modelCascade import CircuitBreaker, ModelCascade, ModelTier
+
+logger = logging.getLogger(__name__)
+
+HISTORY_PATH = Path(__file__).parent / "categorisedOutput" / "categorised_output.json"
+
+
+def buildCascade(
+    tierModels: List[str], serviceArgs: Dict[str, Any]
+) -> Tuple[List[LLMService], ModelCascade]:
+    """
+    One LLMService per model tier, each with its own timeout and circuit
+    breaker. Tiers that can escalate are not retried: the next tier is the
+    fallback.
+    """
+    timeouts = [
+        float(value)
+        for value in os.getenv("OLLAMA_TIER_TIMEOUTS", "").split(",")
+        if value.strip()
+    ]
+    failures = int(os.getenv("OLLAMA_BREAKER_FAILURES", "3"))
+    cooldown = float(os.getenv("OLLAMA_BREAKER_COOLDOWN", "30"))
+
+    services, tiers = [], []
+    for position, modelName in enumerate(tierModels):
+        last = position == len(tierModels) - 1
+        timeout = timeouts[min(position, len(timeouts) - 1)] if timeouts else None
+        service = LLMService(
+            model_name=modelName,
+            max_retries=2 if last else 0,
+            **serviceArgs,
+        )
+        services.append(service)
+        tiers.append(
+            ModelTier(
+                name=modelName,
+                predict_fn=service.predict,
+                timeout=timeout,
+                breaker=CircuitBreaker(failure_threshold=failures, cooldown=cooldown),
+                concurrency=service.concurrency,
+                close_fn=service.close,
+                warm_up_fn=service.warm_up,
+            )
+        )
+    logger.info("Model cascade: %s", " -> ".join(tierModels))
+    return services, ModelCascade(tiers)
+
+
+def buildCategoriser() -> Tuple[LLMService, LlmCategoriser]:
+    # Merchants per prompt; batched answers are JSON and need a bigger token budget
+    batchSize = int(os.getenv("CATEGORISER_BATCH_SIZE", "1"))
+    # Fast models first; merchants are escalated one at a time, so no batching
+    tierModels = [
+        model.strip() for model in os.getenv("OLLAMA_MODEL_TIERS", "").split(",") if model.strip()
+    ]
+    if tierModels and batchSize > 1:
+        logger.warning("CATEGORISER_BATCH_SIZE is ignored with OLLAMA_MODEL_TIERS")
+        batchSize = 1
+    # Streaming stops generation as soon as the category line is complete;
+    # constraining restricts the output to the target categories via a JSON schema,
+    # and the prompt then asks for that JSON object instead of a category line
+    streamResponses = os.getenv("OLLAMA_STREAM", "0") == "1"
+    constrainOutput = os.getenv("OLLAMA_CONSTRAIN", "0") == "1"
+    numPredict = os.getenv("OLLAMA_NUM_PREDICT")
+    serviceArgs = dict(
+        num_predict=int(numPredict) if numPredict else (64 if batchSize == 1 else 16 * batchSize + 32),
+        stream=streamResponses,
+        early_stop=categoryIsFinal if streamResponses and batchSize == 1 else None,
+        format=(CATEGORY_FORMAT if batchSize == 1 else "json") if constrainOutput else None,
+    )
+    cascade: Optional[ModelCascade] = None
+    if tierModels:
+        services, cascade = buildCascade(tierModels, serviceArgs)
+        llmModel = services[0]
+    else:
+        llmModel = LLMService(**serviceArgs)
+
+    # Local n-gram classifier answers near-duplicates of known merchants instantly;
+    # it is seeded from previous categorised output and the override table
+    localThreshold = float(os.getenv("LOCAL_CLASSIFIER_THRESHOLD", "0.8"))
+    if DEFAULT_MODEL_PATH.exists():
+        localClassifier = LocalClassifier.load(threshold=localThreshold)
+    else:
+        localClassifier = LocalClassifier(threshold=localThreshold)
+        if HISTORY_PATH.exists():
+            localClassifier.train_from_history(HISTORY_PATH, TARGET_CATEGORIES)
+    localClassifier.train_from_overrides(COMPANY_OVERRIDES, TARGET_CATEGORIES)
+
+    # Merchant index persists across runs; seeded the same way as the classifier
+    merchantIndex: Optional[MerchantIndex] = None
+    if os.getenv("MERCHANT_INDEX", "1") != "0":
+        indexThreshold = float(os.getenv("MERCHANT_INDEX_THRESHOLD", "0.7"))
+        if DEFAULT_INDEX_PATH.exists():
+            merchantIndex = MerchantIndex.load(threshold=indexThreshold)
+        else:
+            merchantIndex = MerchantIndex(threshold=indexThreshold)
+            if HISTORY_PATH.exists():
+                merchantIndex.add_from_history(HISTORY_PATH)
+        for company in COMPANY_OVERRIDES:
+            merchantIndex.add(company)
+
+    llmCategoriser = LlmCategoriser(
+        predict_fn=llmModel.predict,
+        cache=CategoryCache(),
+        model_name=cascade.name if cascade else llmModel.model_name,
+        predict_many_fn=llmModel.predict_many,
+        batch_size=batchSize,
+        local_classifier=localClassifier,
+        cascade=cascade,
+        merchant_index=merchantIndex,
+        json_answer=constrainOutput and batchSize == 1,
+    )
+    return llmModel, llmCategoriser
+
+
+def warmUpCategoriser(llmModel: LLMService, llmCategoriser: LlmCategoriser) -> None:
+    """
+    Preload the Ollama model(s) the categoriser will call (every cascade tier
+    when OLLAMA_MODEL_TIERS is set).
+    """
+    if llmCategoriser.cascade is not None:
+        llmCategoriser.cascade.warm_up()
+    else:
+        llmModel.warm_up()
+
+
+def printCategoriserStats(llmCategoriser: LlmCategoriser) -> None:
+    cache = llmCategoriser.cache
+    logger.info(
+        "Category cache: %d hits, %d misses (%d LLM calls)",
+        cache.hits,
+        cache.misses,
+        llmCategoriser.llm_calls,
+    )
+    localStats = llmCategoriser.local_stats
+    lookedUp = localStats["fast_path"] + localStats["escalated"]
+    logger.info(
+        "Local classifier: %d/%d merchants on the fast path, "
+        "agreed with LLM on %d/%d escalated guesses",
+        localStats["fast_path"],
+        lookedUp,
+        localStats["agreed"],
+        localStats["compared"],
+    )
+    if llmCategoriser.merchant_index is not None:
+        indexStats = llmCategoriser.index_stats
+        logger.info(
+            "Merchant index: %d canonical merchants, %d variants reused a canonical "
+            "answer, %d collapsed into a shared LLM query",
+            len(llmCategoriser.merchant_index),
+            indexStats["reused"],
+            indexStats["collapsed"],
+        )
+    if llmCategoriser.cascade is not None:
+        report = llmCategoriser.cascade.report()
+        for name, tier in report["tiers"].items():
+            logger.info(
+                "Model tier %s: resolved %d merchants (%.0f%%), escalated %d, "
+                "%d failed / %d skipped requests, %.2fs mean request, breaker %s",
+                name,
+                tier["resolved"],
+                100 * tier["share"],
+                tier["escalated"],
+                tier["failures"],
+                tier["skipped"],
+                tier["mean_request_seconds"],
+                tier["breaker"],
+            )
+        logger.info(
+            "Model cascade: %d merchants, %.2fs mean latency per merchant, %d unresolved",
+            report["merchants"],
+            report["mean_seconds_per_merchant"],
+            report["unresolved"],
+        )
+
+
+def closeCategoriser(llmModel: LLMService, llmCategoriser: LlmCategoriser) -> None:
+    """
+    Persist what the local classifier and merchant index learnt and release
+    the cache and HTTP pool.
+    """
+    llmCategoriser.local_classifier.save()
+    if llmCategoriser.merchant_index is not None:
+        llmCategoriser.merchant_index.save()
+    llmCategoriser.cache.close()
+    if llmCategoriser.cascade is not None:
+        llmCategoriser.cascade.close()
+    else:
+        llmModel.close()
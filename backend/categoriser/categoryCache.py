@@ -0,0 +1,163 @@
+"""
+Persistent merchant -> category cache for the LLM categoriser.
+
+Entries are stored in a small SQLite database so that merchants seen in
+previous runs (ST LOGISTICS, JUICYFRESH, GRAB, ...) never hit the model again.
+
+Each entry is keyed on:
+  - the normalised company_person
+  - a namespace made of the model name and a hash of the prompt template /
+    target categories
+
+Changing the model or the prompt therefore changes the namespace, so stale
+answers are never returned; old rows simply age out through LRU eviction/TTL.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+DEFAULT_CACHE_PATH = Path(__file__).parent / "cache" / "category_cache.sqlite3"
+
+
+def normaliseMerchant(company_person: str) -> str:
+    """
+    Normalise a company_person value for use as a cache key.
+    Upper-cases, strips and collapses internal whitespace.
+    """
+    return " ".join(company_person.upper().split())
+
+
+class CategoryCache:
+    """
+    SQLite-backed LRU cache with TTL for merchant categories.
+
+    You can override the location via:
+      - CATEGORY_CACHE_PATH
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        max_entries: int = 10000,
+        ttl_seconds: Optional[float] = 90 * 24 * 3600,
+    ):
+        self.path = Path(path or os.getenv("CATEGORY_CACHE_PATH", DEFAULT_CACHE_PATH))
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS category_cache (
+                namespace TEXT NOT NULL,
+                merchant TEXT NOT NULL,
+                category TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (namespace, merchant)
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_category_cache_last_used "
+            "ON category_cache (last_used)"
+        )
+        self._conn.commit()
+
+    def get(self, namespace: str, company_person: str) -> Optional[str]:
+        """
+        Look up a cached category.
+
+        Args:
+            namespace: Model/prompt namespace the answer must belong to
+            company_person: The cleaned company/merchant name
+
+        Returns:
+            Category string on a hit, None on a miss or expired entry
+        """
+        merchant = normaliseMerchant(company_person)
+        now = time.time()
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT category, created_at FROM category_cache "
+                "WHERE namespace = ? AND merchant = ?",
+                (namespace, merchant),
+            ).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            category, created_at = row
+            if self.ttl_seconds is not None and now - created_at > self.ttl_seconds:
+                self._conn.execute(
+                    "DELETE FROM category_cache WHERE namespace = ? AND merchant = ?",
+                    (namespace, merchant),
+                )
+                self._conn.commit()
+                self.misses += 1
+                return None
+
+            self._conn.execute(
+                "UPDATE category_cache SET last_used = ? "
+                "WHERE namespace = ? AND merchant = ?",
+                (now, namespace, merchant),
+            )
+            self._conn.commit()
+            self.hits += 1
+            return category
+
+    def put(self, namespace: str, company_person: str, category: str) -> None:
+        """
+        Store a category and evict the least recently used entries if the
+        cache grows past max_entries.
+        """
+        merchant = normaliseMerchant(company_person)
+        now = time.time()
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO category_cache "
+                "(namespace, merchant, category, created_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (namespace, merchant, category, now, now),
+            )
+            (count,) = self._conn.execute(
+                "SELECT COUNT(*) FROM category_cache"
+            ).fetchone()
+            if count > self.max_entries:
+                self._conn.execute(
+                    "DELETE FROM category_cache WHERE rowid IN ("
+                    "SELECT rowid FROM category_cache ORDER BY last_used ASC LIMIT ?)",
+                    (count - self.max_entries,),
+                )
+            self._conn.commit()
+
+    def invalidate(self, namespace: Optional[str] = None) -> None:
+        """
+        Drop every entry, or only the entries of a single namespace.
+        """
+        with self._lock:
+            if namespace is None:
+                self._conn.execute("DELETE FROM category_cache")
+            else:
+                self._conn.execute(
+                    "DELETE FROM category_cache WHERE namespace = ?", (namespace,)
+                )
+            self._conn.commit()
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
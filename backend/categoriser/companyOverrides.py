@@ -1,8 +1,43 @@
 """
 Company-specific category overrides.
 Use this for companies where the name is misleading or keyword matching fails.
+
+Besides the exact-name table below, rules can be loaded from a JSON file
+(overrideRules.json next to this module, or OVERRIDE_RULES_PATH):
+
+    [
+      {"type": "prefix", "pattern": "GRAB", "category": "transport"},
+      {"type": "contains", "pattern": "STARBUCKS", "category": "dining"},
+      {"type": "regex", "pattern": "^SHELL\\\\b", "category": "transport"}
+    ]
+
+Rule types:
+  - exact:    the whole normalised name equals the pattern
+  - prefix:   the name starts with the pattern, and the pattern ends on a
+              token boundary (end of the name, a space or punctuation), so
+              "GRAB" matches "GRAB* 1234" but not "GRABBIT TOYS"
+  - contains: the pattern appears as whole token(s) anywhere in the name
+              (punctuation counts as a token boundary)
+  - regex:    the pattern matches anywhere in the name (re.search)
+
+Priority is deterministic: exact > prefix > contains > regex; within a type
+the longest pattern wins, then the rule defined first. The file is reloaded
+automatically when it changes; a file that fails to load is logged and
+the previously compiled rules stay in use until it is fixed.
 """
 
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
 # Companies that should override keyword-based categorization
 COMPANY_OVERRIDES = {
     # Format: "COMPANY NAME": "category"
@@ -23,6 +58,265 @@ COMPANY_OVERRIDES = {
     # Add more as you discover them
 }
 
+DEFAULT_RULES_PATH = Path(__file__).parent / "overrideRules.json"
+
+RULE_TYPES = ("exact", "prefix", "contains", "regex")
+
+_TOKEN = re.compile(r"[A-Z0-9]+")
+
+
+class OverrideRule(NamedTuple):
+    type: str
+    pattern: str
+    category: str
+    order: int
+
+
+def normaliseName(name: str) -> str:
+    return " ".join(name.upper().split())
+
+
+def tokeniseName(name: str) -> str:
+    """
+    Alphanumeric tokens of a name joined by single spaces, so punctuation
+    ("GRAB*", "MCDONALD'S") counts as a token boundary for contains rules.
+    """
+    return " ".join(_TOKEN.findall(name.upper()))
+
+
+def _better(a: Optional[OverrideRule], b: Optional[OverrideRule]) -> Optional[OverrideRule]:
+    """
+    Pick the higher-priority of two rules of the same type:
+    longest pattern first, then the rule defined first.
+    """
+    if a is None:
+        return b
+    if b is None:
+        return a
+    if len(a.pattern) != len(b.pattern):
+        return a if len(a.pattern) > len(b.pattern) else b
+    return a if a.order < b.order else b
+
+
+class OverrideEngine:
+    """
+    Compiled override rules.
+
+    Exact rules live in a dict, prefix rules in a character trie and
+    contains rules in an Aho-Corasick automaton, so a lookup costs
+    O(len(name)) regardless of how many rules there are. Regex rules are
+    checked last, in definition order.
+
+    Args:
+        overrides: Exact-name table (e.g. COMPANY_OVERRIDES)
+        rules_path: Optional JSON rules file, hot-reloaded when modified
+        reload_interval: Minimum seconds between checks of the file's mtime
+    """
+
+    def __init__(
+        self,
+        overrides: Optional[Dict[str, str]] = None,
+        rules_path: Optional[str] = None,
+        reload_interval: float = 2.0,
+    ):
+        self.overrides = dict(overrides or {})
+        self.rules_path = Path(rules_path) if rules_path else None
+        self.reload_interval = reload_interval
+        self._lock = threading.Lock()
+        self._mtime: Optional[float] = None
+        self._last_check = 0.0
+        self.rules: List[OverrideRule] = []
+        self.reload()
+
+    def load_rules(self) -> List[OverrideRule]:
+        """
+        Read the exact-name table and the rules file into a flat rule list.
+        """
+        rules = [
+            OverrideRule("exact", normaliseName(name), category, order)
+            for order, (name, category) in enumerate(self.overrides.items())
+        ]
+
+        if self.rules_path is not None and self.rules_path.exists():
+            with self.rules_path.open("r", encoding="utf-8") as f:
+                entries = json.load(f)
+            for entry in entries:
+                kind = entry.get("type", "exact")
+                if kind not in RULE_TYPES:
+                    raise ValueError(f"Unknown override rule type: {kind!r}")
+                pattern = entry["pattern"] if kind == "regex" else normaliseName(entry["pattern"])
+                rules.append(OverrideRule(kind, pattern, entry["category"], len(rules)))
+
+        return rules
+
+    def reload(self) -> None:
+        """
+        (Re)compile all rules. Called automatically when the rules file changes.
+        """
+        mtime = None
+        if self.rules_path is not None and self.rules_path.exists():
+            mtime = self.rules_path.stat().st_mtime
+        self.compile(self.load_rules())
+        self._mtime = mtime
+        self._last_check = time.monotonic()
+
+    def compile(self, rules: List[OverrideRule]) -> None:
+        exact: Dict[str, OverrideRule] = {}
+        prefix_trie: List[Dict[str, int]] = [{}]
+        prefix_out: List[Optional[OverrideRule]] = [None]
+        contains: List[OverrideRule] = []
+        regexes = []
+
+        for rule in rules:
+            if rule.type == "exact":
+                exact[rule.pattern] = _better(exact.get(rule.pattern), rule)
+            elif rule.type == "prefix":
+                node = 0
+                for ch in rule.pattern:
+                    nxt = prefix_trie[node].get(ch)
+                    if nxt is None:
+                        nxt = len(prefix_trie)
+                        prefix_trie[node][ch] = nxt
+                        prefix_trie.append({})
+                        prefix_out.append(None)
+                    node = nxt
+                prefix_out[node] = _better(prefix_out[node], rule)
+            elif rule.type == "contains":
+                contains.append(rule)
+            else:
+                regexes.append((re.compile(rule.pattern, re.IGNORECASE), rule))
+
+        goto, fail, out = self._build_automaton(contains)
+
+        # Swap in the compiled tables in one go so lookups never see a mix
+        with self._lock:
+            self.rules = rules
+            self._exact = exact
+            self._prefix_trie = prefix_trie
+            self._prefix_out = prefix_out
+            self._ac_goto = goto
+            self._ac_fail = fail
+            self._ac_out = out
+            self._regexes = regexes
+
+    @staticmethod
+    def _build_automaton(rules: List[OverrideRule]):
+        """
+        Aho-Corasick automaton over " PATTERN TOKENS " so that matches always
+        start and end on token boundaries. out[node] is the best rule that ends at
+        that node, including via failure links.
+        """
+        goto: List[Dict[str, int]] = [{}]
+        out: List[Optional[OverrideRule]] = [None]
+
+        for rule in rules:
+            node = 0
+            for ch in f" {tokeniseName(rule.pattern)} ":
+                nxt = goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[node][ch] = nxt
+                    goto.append({})
+                    out.append(None)
+                node = nxt
+            out[node] = _better(out[node], rule)
+
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in goto[node].items():
+                queue.append(nxt)
+                f = fail[node]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fail[nxt] = goto[f].get(ch, 0)
+                out[nxt] = _better(out[nxt], out[fail[nxt]])
+
+        return goto, fail, out
+
+    def _maybe_reload(self) -> None:
+        if self.rules_path is None:
+            return
+        now = time.monotonic()
+        if now - self._last_check < self.reload_interval:
+            return
+        self._last_check = now
+        mtime = self.rules_path.stat().st_mtime if self.rules_path.exists() else None
+        if mtime != self._mtime:
+            logger.info("Reloading override rules from %s", self.rules_path)
+            try:
+                self.reload()
+            except (OSError, ValueError, KeyError, TypeError, AttributeError, re.error) as exc:
+                # Half-saved or invalid file: keep the current tables, retry on the next change
+                logger.error("Keeping previous override rules, %s failed to load: %s", self.rules_path, exc)
+                self._mtime = mtime
+
+    def match(self, company_name: str) -> Optional[OverrideRule]:
+        """
+        Find the highest-priority rule matching a company name.
+        """
+        self._maybe_reload()
+        name = normaliseName(company_name)
+        if not name:
+            return None
+
+        with self._lock:
+            exact, trie, prefix_out = self._exact, self._prefix_trie, self._prefix_out
+            goto, fail, ac_out = self._ac_goto, self._ac_fail, self._ac_out
+            regexes = self._regexes
+
+        rule = exact.get(name)
+        if rule is not None:
+            return rule
+
+        # Longest matching prefix that ends on a token boundary
+        best = None
+        node = 0
+        for i, ch in enumerate(name):
+            node = trie[node].get(ch)
+            if node is None:
+                break
+            if prefix_out[node] is not None and (i + 1 == len(name) or not name[i + 1].isalnum()):
+                best = prefix_out[node]
+        if best is not None:
+            return best
+
+        if len(goto) > 1:
+            node = 0
+            for ch in f" {tokeniseName(name)} ":
+                while node and ch not in goto[node]:
+                    node = fail[node]
+                node = goto[node].get(ch, 0)
+                best = _better(best, ac_out[node])
+            if best is not None:
+                return best
+
+        for pattern, rule in regexes:
+            if pattern.search(name):
+                return rule
+        return None
+
+    def lookup(self, company_name: str) -> Optional[str]:
+        rule = self.match(company_name)
+        return rule.category if rule is not None else None
+
+
+_engine: Optional[OverrideEngine] = None
+
+
+def getOverrideEngine() -> OverrideEngine:
+    """
+    Shared engine built from COMPANY_OVERRIDES and the rules file.
+    """
+    global _engine
+    if _engine is None:
+        _engine = OverrideEngine(
+            COMPANY_OVERRIDES,
+            rules_path=os.getenv("OVERRIDE_RULES_PATH", DEFAULT_RULES_PATH),
+        )
+    return _engine
+
 
 def getCompanyOverride(company_name: str) -> str | None:
     """
@@ -34,7 +328,4 @@ def getCompanyOverride(company_name: str) -> str | None:
     Returns:
         Category string if override exists, None otherwise
     """
-    # Normalize the company name for matching
-    normalized = company_name.upper().strip()
-
-    return COMPANY_OVERRIDES.get(normalized)
+    return getOverrideEngine().lookup(company_name)
@@ -1,5 +1,17 @@
-from typing import Callable, Optional, List
+import hashlib
+import json
+import logging
+import re
+from typing import Callable, Optional, List, Dict, Any, Tuple, Union
 from categoriser.companyOverrides import getCompanyOverride
+from categoriser.categoryCache import CategoryCache, normaliseMerchant
+from categoriser.localClassifier import LocalClassifier
+from categoriser.merchantIndex import MerchantIndex
+from categoriser.modelCascade import ModelCascade
+from instrumentation import count, span
+from records import Transaction
+
+logger = logging.getLogger(__name__)
 
 TARGET_CATEGORIES: List[str] = [
     "travel",
@@ -12,6 +24,72 @@ TARGET_CATEGORIES: List[str] = [
     "ignore",  # For bank transactions like interest, fees, transfers
 ]
 
+# 'ignore' is only kept for names that really look like bank transactions
+BANK_KEYWORDS: List[str] = [
+    "bank",
+    "interest",
+    "fee",
+    "fees",
+    "charge",
+    "charges",
+    "atm",
+    "transfer",
+    "loan",
+    "repayment",
+]
+
+# Ollama structured-output schema that only allows a single target category
+CATEGORY_FORMAT: Dict[str, Any] = {
+    "type": "object",
+    "properties": {"category": {"type": "string", "enum": TARGET_CATEGORIES}},
+    "required": ["category"],
+}
+
+
+def jsonCategory(text: str) -> Optional[str]:
+    """
+    Category of a structured answer ({"category": "dining"}, as requested
+    with CATEGORY_FORMAT), or None if `text` holds no such JSON object.
+    """
+    start, end = text.find("{"), text.rfind("}")
+    if start == -1 or end < start:
+        return None
+    try:
+        data = json.loads(text[start : end + 1])
+    except ValueError:
+        return None
+    if not isinstance(data, dict) or not isinstance(data.get("category"), str):
+        return None
+    category = data["category"].strip().lower()
+    return category if category in TARGET_CATEGORIES else None
+
+
+def categoryIsFinal(partial_response: str) -> bool:
+    """
+    Incremental counterpart of LlmCategoriser.parse_category, for streamed
+    responses that are cut off at a line boundary.
+
+    Returns True once the last completed line (outside any unfinished
+    <think> block) is a clear non-'misc' category, either bare or as a
+    {"category": ...} JSON object, i.e. parse_category would already return
+    that category for the text so far.
+    """
+    text = partial_response.lower()
+    if "<think>" in text:
+        if "</think>" not in text:
+            return False
+        text = text.split("</think>", 1)[1]
+
+    lines = [ln.strip() for ln in text.splitlines() if ln.strip()]
+    if not lines:
+        return False
+    last = jsonCategory(lines[-1]) or lines[-1].strip(" .,:;\"'")
+    return last in TARGET_CATEGORIES and last != "misc"
+
+
+_CATEGORY_WORD = re.compile(r"\b(" + "|".join(TARGET_CATEGORIES) + r")\b")
+_NUMBERED_LINE = re.compile(r"^\W*(\d+)\b(.*)$")
+
 
 class LlmCategoriser:
     """
@@ -20,28 +98,73 @@ class LlmCategoriser:
     You pass in a `predict_fn` that knows how to call Phi-3 Mini (or any
     other model). The function should accept a single string prompt and
     return the model's raw text response.
+
+    An optional `cache` (CategoryCache) is consulted before the model is
+    called. Answers are namespaced by `model_name` and the prompt fingerprint,
+    so changing either one invalidates previous answers automatically.
+
+    An optional `predict_many_fn` takes a list of prompts and returns the
+    raw responses in the same order (e.g. LLMService.predict_many); it is
+    used by categorise_many to run several model calls concurrently.
+
+    With `batch_size` > 1, categorise_many classifies up to that many
+    merchants per prompt and asks for a JSON answer; entries that come back
+    missing or malformed are re-queried one merchant per prompt.
+
+    An optional `local_classifier` (LocalClassifier) answers merchants that
+    are close enough to a previously labelled one without calling the model,
+    and learns from every LLM answer. Fast-path coverage and agreement of its
+    low-confidence guesses with the LLM are kept in `local_stats`.
+
+    An optional `cascade` (ModelCascade) replaces `predict_fn` for merchants
+    that need the model: each one goes to the fastest tier first and is only
+    escalated to a larger model when `accept_answer` rejects the answer.
+    Prompts are single-merchant, so `batch_size` is ignored with a cascade.
+
+    With `json_answer`, single-merchant prompts ask for a {"category": ...}
+    JSON object instead of a category on the last line, to match an output
+    constrained with CATEGORY_FORMAT.
+
+    An optional `merchant_index` (MerchantIndex) maps OCR variants of a
+    merchant ("STLOGISTICS", "ST LOGISTIC5 0854") to one canonical name: a
+    variant reuses the canonical merchant's override or cached answer, and
+    variants still needing the model share one query. Reuse is counted in
+    `index_stats`.
     """
 
-    def __init__(self, predict_fn: Callable[[str], str]):
+    def __init__(
+        self,
+        predict_fn: Callable[[str], str],
+        cache: Optional[CategoryCache] = None,
+        model_name: Optional[str] = None,
+        predict_many_fn: Optional[Callable[[List[str]], List[str]]] = None,
+        batch_size: int = 1,
+        local_classifier: Optional[LocalClassifier] = None,
+        cascade: Optional[ModelCascade] = None,
+        merchant_index: Optional[MerchantIndex] = None,
+        json_answer: bool = False,
+    ):
         self.predict_fn = predict_fn
+        self.predict_many_fn = predict_many_fn
+        self.batch_size = max(1, batch_size)
+        self.cache = cache
+        self.model_name = model_name or "unknown"
+        self.local_classifier = local_classifier
+        self.cascade = cascade
+        self.merchant_index = merchant_index
+        self.json_answer = json_answer
+        self.llm_calls = 0
+        self.local_stats = {"fast_path": 0, "escalated": 0, "compared": 0, "agreed": 0}
+        self.index_stats = {"reused": 0, "collapsed": 0}
+        self._local_guesses: Dict[str, str] = {}
+        self._namespace: Optional[str] = None
 
-    def build_prompt(
-        self,
-        company_person: str,
-        description: Optional[str] = None,
-    ) -> str:
+    def build_guidelines(self) -> str:
         """
-        Build a classification prompt for the LLM based on the merchant/company name
-        and optional extra description.
+        Build the category guidelines and few-shot examples shared by the
+        single-merchant and batched prompts.
         """
-        print("=== DEBUG PROMPT INPUT ===")
-        print(company_person, description)
-        print("=== END DEBUG ===")
-        details = f'Company/person: "{company_person}"'
-        if description:
-            details += f'\nAdditional details: "{description}"'
-
-        instruction = (
+        return (
             "You are classifying credit card transactions into exactly one category: "
             f"{', '.join(TARGET_CATEGORIES)}.\n\n"
             "Guidelines:\n"
@@ -70,41 +193,179 @@ class LlmCategoriser:
             "- Merchant: 'M1 MAXX' -> Category: utilities\n"
             "- Merchant: 'ST LOGISTICS' -> Category: shopping\n"
             "- Merchant: 'NUR HAZAH' (looks like a person) -> Category: misc\n\n"
+        )
+
+    def build_instruction(self) -> str:
+        """
+        Build the fixed instruction block (guidelines + few-shot examples)
+        shared by every single-merchant classification prompt.
+        """
+        if self.json_answer:
+            return self.build_guidelines() + (
+                "Now classify the merchant below. Respond with ONLY a JSON object of the form "
+                '{"category": "<category>"} with the category name in lowercase, '
+                "and do not write anything else.\n"
+            )
+        return self.build_guidelines() + (
             "Now classify the merchant below. First think briefly about the best category, "
             "then on the last line output ONLY the category name in lowercase."
             "Do not write the word 'misc' anywhere unless you choose it as the final category.\n"
 
         )
 
-        return instruction + "\\n\\n" + details
+    def build_prompt(
+        self,
+        company_person: str,
+        description: Optional[str] = None,
+    ) -> str:
+        """
+        Build a classification prompt for the LLM based on the merchant/company name
+        and optional extra description.
+        """
+        logger.debug("Prompt input: %r, %r", company_person, description)
+        details = f'Company/person: "{company_person}"'
+        if description:
+            details += f'\nAdditional details: "{description}"'
+
+        return self.build_instruction() + "\\n\\n" + details
+
+    def build_batch_instruction(self) -> str:
+        """
+        Build the fixed instruction block for prompts that classify several
+        numbered merchants at once and answer in JSON.
+        """
+        return self.build_guidelines() + (
+            "Now classify each numbered merchant below. Respond with ONLY a JSON object "
+            "that maps each merchant number to its category in lowercase, for example "
+            '{"1": "dining", "2": "transport"}. '
+            "Include every number exactly once and do not write anything else.\n"
+        )
+
+    def build_batch_prompt(self, company_persons: List[str]) -> str:
+        """
+        Build a prompt that classifies several merchants in one request.
+        Merchants are numbered from 1 in the given order.
+        """
+        merchants = "\n".join(
+            f'{i}. "{company_person}"' for i, company_person in enumerate(company_persons, 1)
+        )
+        return self.build_batch_instruction() + "\nMerchants:\n" + merchants
+
+    def cache_namespace(self) -> str:
+        """
+        Namespace for cached answers: model name plus a hash of the prompt
+        template(s) in use and target categories.
+        """
+        if self._namespace is None:
+            templates = self.build_instruction()
+            if self.batch_size > 1:
+                templates += self.build_batch_instruction()
+            fingerprint = hashlib.sha256(
+                (templates + "|" + ",".join(TARGET_CATEGORIES)).encode("utf-8")
+            ).hexdigest()[:16]
+            self._namespace = f"{self.model_name}:{fingerprint}"
+        return self._namespace
 
     def parse_category(self, raw_response: str) -> str:
         """
         Extract one of the target categories from the LLM's raw response.
         Prefer non-'others' categories if present.
         """
+        return self.parse_answer(raw_response)[0]
+
+    def parse_answer(self, raw_response: str) -> Tuple[str, bool]:
+        """
+        Like parse_category, but also report whether the category came from a
+        clean answer, either the last line or a {"category": ...} object
+        (True), or from the keyword scan / 'misc' default (False).
+        """
         text = raw_response.strip().lower()
 
         # If any <think>...</think> pattern exists, drop it
         if "</think>" in text:
             text = text.split("</think>", 1)[1].strip()
 
+        # A constrained (JSON) answer is as clean as a bare last line
+        structured = jsonCategory(text)
+        if structured is not None and structured != "misc":
+            return structured, True
+
         # Take last non-empty line
         lines = [ln.strip() for ln in text.splitlines() if ln.strip()]
         if lines:
             last = lines[-1].strip(" .,:;\"'")
             # If last is a clear category and not 'others', trust it
             if last in TARGET_CATEGORIES and last != "misc":
-                return last
+                return last, True
 
         # Otherwise, search for any non-'others' category in the text first
         for category in [c for c in TARGET_CATEGORIES if c != "misc"]:
             if category in text:
-                return category
+                return category, False
             
 
         # Only fall back to 'others' if nothing else found
-        return "misc"
+        return "misc", False
+
+    def accept_answer(self, company_person: str, raw_response: str) -> bool:
+        """
+        Whether a cascade tier's answer is final: it must be a clean category
+        (last line or JSON), match the local classifier's low-confidence
+        guess (if there is one), and survive the post-rules unchanged (an
+        'ignore' for a name without bank keywords does not). Anything else
+        is escalated.
+        """
+        category, clean = self.parse_answer(raw_response)
+        if not clean:
+            return False
+        guess = self._local_guesses.get(normaliseMerchant(company_person))
+        if guess is not None and guess != category:
+            return False
+        return self.apply_post_rules(company_person, category) == category
+
+    def parse_batch_response(self, raw_response: str, count: int) -> Dict[int, str]:
+        """
+        Extract categories from a batched JSON answer.
+
+        Falls back to scanning numbered lines ("1: dining", "2. GRAB -> transport")
+        when the answer is not valid JSON.
+
+        Returns:
+            Mapping of 0-based merchant index to category for every entry that
+            parsed cleanly; missing or invalid entries are left out
+        """
+        text = raw_response.strip().lower()
+        if "</think>" in text:
+            text = text.split("</think>", 1)[1].strip()
+
+        answers: Dict[int, str] = {}
+
+        start, end = text.find("{"), text.rfind("}")
+        if start != -1 and end > start:
+            try:
+                data = json.loads(text[start : end + 1])
+            except ValueError:
+                data = None
+            if isinstance(data, dict):
+                for key, value in data.items():
+                    if not str(key).strip().isdigit() or not isinstance(value, str):
+                        continue
+                    answers[int(key) - 1] = value.strip(" .,:;\"'")
+
+        if not answers:
+            for line in text.splitlines():
+                match = _NUMBERED_LINE.match(line)
+                if not match:
+                    continue
+                found = _CATEGORY_WORD.findall(match.group(2))
+                if found:
+                    answers[int(match.group(1)) - 1] = found[-1]
+
+        return {
+            index: category
+            for index, category in answers.items()
+            if 0 <= index < count and category in TARGET_CATEGORIES
+        }
 
     def categorise(
         self,
@@ -117,20 +378,284 @@ class LlmCategoriser:
 
         Checks company overrides first before using LLM.
         """
+        category = self.lookup(company_person, description)
+        if category:
+            return category
+
+        # Otherwise, use LLM to categorize
+        if self.cascade is not None:
+            category = self._query_cascade([company_person], description)[0]
+            return category if category is not None else self._unresolved([company_person])
+        prompt = self.build_prompt(company_person, description)
+        raw = self.predict_fn(prompt)
+        self.llm_calls += 1
+        count("llm.calls")
+        return self._handle_response(company_person, raw, cache=not description)
+
+    def lookup(
+        self,
+        company_person: str,
+        description: Optional[str] = None,
+    ) -> Optional[str]:
+        """
+        Resolve a category without calling the model: company overrides first,
+        then a previously cached answer for this model/prompt, then the
+        override or cached answer of the canonical merchant, then a confident
+        local classifier prediction.
+
+        Returns:
+            Category string if resolved, None if the model is needed
+        """
         # Check if there's a manual override for this company
         override = getCompanyOverride(company_person)
         if override:
-            print(f"Using override for '{company_person}': {override}")
+            logger.debug("Using override for %r: %s", company_person, override)
+            count("categorise.override")
             return override
 
-        # Otherwise, use LLM to categorize
-        prompt = self.build_prompt(company_person, description)
-        raw = self.predict_fn(prompt)
+        # Answers that depend on an extra description are not cached
+        if self.cache is not None and not description:
+            cached = self.cache.get(self.cache_namespace(), company_person)
+            if cached:
+                logger.debug("Using cached category for %r: %s", company_person, cached)
+                count("categorise.cache_hit")
+                return cached
+
+        # An OCR variant of a known merchant gets the canonical merchant's answer;
+        # registering it makes the next lookup of this spelling an exact hit
+        if self.merchant_index is not None and not description:
+            canonical = self.merchant_index.add(company_person)
+            if canonical != normaliseMerchant(company_person):
+                category = getCompanyOverride(canonical)
+                if not category and self.cache is not None:
+                    category = self.cache.get(self.cache_namespace(), canonical)
+                if category:
+                    logger.debug("Using %r's category for %r: %s", canonical, company_person, category)
+                    self.index_stats["reused"] += 1
+                    count("categorise.canonical")
+                    return category
+
+        if self.local_classifier is not None:
+            category, score = self.local_classifier.nearest(company_person)
+            if category is not None and score >= self.local_classifier.threshold:
+                logger.debug(
+                    "Using local classifier for %r: %s (%.2f)", company_person, category, score
+                )
+                self.local_stats["fast_path"] += 1
+                count("categorise.local")
+                return category
+            self.local_stats["escalated"] += 1
+            if category is not None:
+                self._local_guesses[normaliseMerchant(company_person)] = category
+
+        return None
+
+    def _handle_response(self, company_person: str, raw: str, cache: bool = True) -> str:
+        logger.debug("LLM raw response for %r: %r", company_person, raw)
+
+        category = self.parse_category(raw)
+        self._record_answer(company_person, category, cache=cache)
+        return category
+
+    def _record_answer(self, company_person: str, category: str, cache: bool = True) -> None:
+        """
+        Store an LLM answer in the cache, register the merchant in the merchant
+        index and teach it to the local classifier, comparing it with the
+        classifier's low-confidence guess if there was one.
+        """
+        if cache and self.cache is not None:
+            self.cache.put(self.cache_namespace(), company_person, category)
+
+        if self.merchant_index is not None:
+            self.merchant_index.add(company_person)
 
-        # TEMP: debug output
-        print("=== DEBUG LLM RAW RESPONSE ===")
-        print(f"Merchant: {company_person!r}")
-        print(repr(raw))
-        print("=== END DEBUG ===")
+        if self.local_classifier is not None:
+            guess = self._local_guesses.pop(normaliseMerchant(company_person), None)
+            if guess is not None:
+                self.local_stats["compared"] += 1
+                self.local_stats["agreed"] += guess == category
+            if category in TARGET_CATEGORIES:
+                self.local_classifier.learn(company_person, category)
 
-        return self.parse_category(raw)
+    def _predict_all(self, prompts: List[str]) -> List[str]:
+        self.llm_calls += len(prompts)
+        count("llm.calls", len(prompts))
+        if self.predict_many_fn is not None:
+            return self.predict_many_fn(prompts)
+        return [self.predict_fn(prompt) for prompt in prompts]
+
+    def _query_llm(self, company_persons: List[str]) -> List[Optional[str]]:
+        """
+        Ask the model for the category of every (unique) merchant, batching
+        `batch_size` merchants per prompt when enabled. None marks a merchant
+        no cascade tier answered for.
+        """
+        if self.cascade is not None:
+            return self._query_cascade(company_persons)
+
+        if self.batch_size <= 1:
+            raws = self._predict_all([self.build_prompt(cp) for cp in company_persons])
+            return [self._handle_response(cp, raw) for cp, raw in zip(company_persons, raws)]
+
+        chunks = [
+            company_persons[i : i + self.batch_size]
+            for i in range(0, len(company_persons), self.batch_size)
+        ]
+        raws = self._predict_all([self.build_batch_prompt(chunk) for chunk in chunks])
+
+        results: Dict[str, str] = {}
+        retry: List[str] = []
+        for chunk, raw in zip(chunks, raws):
+            logger.debug("LLM raw batch response: %r", raw)
+            answers = self.parse_batch_response(raw, len(chunk))
+            for index, company_person in enumerate(chunk):
+                category = answers.get(index)
+                if category is None:
+                    retry.append(company_person)
+                    continue
+                results[company_person] = category
+                self._record_answer(company_person, category)
+
+        if retry:
+            logger.info("Re-querying %d merchants with malformed batch answers", len(retry))
+            count("categorise.batch_retries", len(retry))
+            raws = self._predict_all([self.build_prompt(cp) for cp in retry])
+            for company_person, raw in zip(retry, raws):
+                results[company_person] = self._handle_response(company_person, raw)
+
+        return [results[cp] for cp in company_persons]
+
+    def _query_cascade(
+        self, company_persons: List[str], description: Optional[str] = None
+    ) -> List[Optional[str]]:
+        """
+        Resolve merchants through the model cascade, escalating every answer
+        `accept_answer` rejects to the next tier.
+
+        Returns:
+            One category per merchant, or None where no tier answered (every
+            tier failed or had its circuit open); those are left uncached
+        """
+        prompts = [self.build_prompt(cp, description) for cp in company_persons]
+        requests_before = sum(tier.stats["requests"] for tier in self.cascade.tiers)
+        raws = self.cascade.run(
+            prompts, lambda index, raw: self.accept_answer(company_persons[index], raw)
+        )
+        requests = sum(tier.stats["requests"] for tier in self.cascade.tiers) - requests_before
+        self.llm_calls += requests
+        count("llm.calls", requests)
+
+        return [
+            self._handle_response(cp, raw, cache=not description) if raw is not None else None
+            for cp, raw in zip(company_persons, raws)
+        ]
+
+    def _unresolved(self, company_persons: List[str]) -> str:
+        """
+        Fallback for merchants no model answered for: the same 'misc' that
+        parse_category falls back to. Nothing is cached, so the next run asks
+        again.
+        """
+        logger.warning(
+            "No model tier answered for %d merchants, using 'misc': %s",
+            len(company_persons),
+            company_persons[:5],
+        )
+        count("categorise.unresolved", len(company_persons))
+        return "misc"
+
+    def apply_post_rules(self, company_person: str, category: str) -> str:
+        """
+        Downgrade 'ignore' to 'misc' unless the name looks like a bank
+        transaction (fees, interest, transfers, ...).
+        """
+        if category == "ignore":
+            name = company_person.lower()
+            if not any(k in name for k in BANK_KEYWORDS):
+                return "misc"
+        return category
+
+    def categorise_many(
+        self, transactions: List[Union[Transaction, Dict[str, Any]]]
+    ) -> List[Union[Transaction, Dict[str, Any]]]:
+        """
+        Categorise a list of cleaned transactions, calling the model once per
+        unique merchant.
+
+        Identical company_person values (after normalisation) are collapsed,
+        overrides and cached answers are resolved without touching the model,
+        and the remaining merchants are sent through `predict_many_fn` (if
+        given) so several requests can be in flight at once. The result is
+        fanned back out to every transaction with the post-rules applied.
+
+        Args:
+            transactions: Cleaned transactions (Transaction records, or dicts
+                with a 'company_person' field)
+
+        Returns:
+            The same transactions, each with 'llm_category' set
+        """
+        with span("categorise"):
+            return self._categorise_many(transactions)
+
+    def _categorise_many(self, transactions):
+        # First spelling seen for every unique merchant
+        merchants: Dict[str, str] = {}
+        for transaction in transactions:
+            key = normaliseMerchant(transaction["company_person"])
+            merchants.setdefault(key, transaction["company_person"])
+
+        categories: Dict[str, str] = {}
+        pending: List[str] = []
+        for key, company_person in merchants.items():
+            with span("categorise.lookup"):
+                category = self.lookup(company_person)
+            if category:
+                categories[key] = category
+            else:
+                pending.append(key)
+
+        if pending:
+            # Variants of one merchant share a single query for the canonical name
+            variants: Dict[str, List[str]] = {}
+            for key in pending:
+                if self.merchant_index is not None:
+                    canonical = self.merchant_index.add(merchants[key])
+                else:
+                    canonical = merchants[key]
+                variants.setdefault(canonical, []).append(key)
+            self.index_stats["collapsed"] += len(pending) - len(variants)
+
+            logger.info("Querying LLM for %d of %d unique merchants", len(variants), len(merchants))
+            count("categorise.llm", len(variants))
+            with span("categorise.llm_query"):
+                results = self._query_llm(list(variants))
+            unresolved = [canonical for canonical, category in zip(variants, results) if category is None]
+            fallback = self._unresolved(unresolved) if unresolved else None
+            for canonical, category in zip(variants, results):
+                for key in variants[canonical]:
+                    if category is None:
+                        categories[key] = fallback
+                        continue
+                    categories[key] = category
+                    if key != normaliseMerchant(canonical):
+                        self._record_answer(merchants[key], category)
+
+        for key, company_person in merchants.items():
+            categories[key] = self.apply_post_rules(company_person, categories[key])
+            logger.debug("%s → Category: %s", company_person, categories[key])
+
+        for transaction in transactions:
+            transaction["llm_category"] = categories[
+                normaliseMerchant(transaction["company_person"])
+            ]
+
+        count("categorise.transactions", len(transactions))
+        count("categorise.merchants", len(merchants))
+        logger.info(
+            "Categorised %d transactions from %d unique merchants (%d LLM calls)",
+            len(transactions),
+            len(merchants),
+            self.llm_calls,
+        )
+        return transactions
@@ -1,9 +1,22 @@
 # backend/categoriser/phi3llm.py
 
+import json
+import logging
 import os
-from typing import Optional
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Optional
 
 import requests
+from requests.adapters import HTTPAdapter
+
+from instrumentation import count, observe, span
+
+logger = logging.getLogger(__name__)
+
+# How long Ollama keeps a model loaded after a request: long enough to
+# outlast the OCR phase of a statement between warm-up and the first merchant
+DEFAULT_KEEP_ALIVE = "30m"
 
 
 class LLMService:
@@ -17,12 +30,44 @@ class LLMService:
     You can override via:
       - OLLAMA_BASE_URL
       - OLLAMA_MODEL
+      - OLLAMA_CONCURRENCY (max in-flight requests for predict_many)
+      - OLLAMA_NUM_PREDICT (max generated tokens per request)
+      - OLLAMA_KEEP_ALIVE (how long Ollama keeps the model loaded after a
+        request or the warm-up; default "30m", empty for Ollama's own
+        unload timer)
+
+    All requests go through one pooled HTTP session, so connections to
+    Ollama are reused. Ollama only serves requests in parallel up to its
+    own OLLAMA_NUM_PARALLEL setting; anything above that is queued server-side.
+
+    With `stream=True` the response is read token by token from Ollama's
+    NDJSON stream. Each time a line or a JSON object (structured output has
+    no newline) is completed, `early_stop(text_so_far)` is called; if it
+    returns True the request is closed and the text up to that point is
+    returned, so the model stops generating. `stop` (stop
+    sequences) and `format` (Ollama structured output, e.g. a JSON schema
+    with an enum of categories) constrain what the model may emit.
+
+    Ollama loads a model on its first request, so without `warm_up()` the
+    first merchant pays the model-load time.
     """
 
+    RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
     def __init__(
         self,
         base_url: Optional[str] = None,
         model_name: Optional[str] = None,
+        concurrency: Optional[int] = None,
+        timeout: float = 100,
+        max_retries: int = 2,
+        backoff_factor: float = 0.5,
+        num_predict: Optional[int] = None,
+        stream: bool = False,
+        early_stop: Optional[Callable[[str], bool]] = None,
+        stop: Optional[List[str]] = None,
+        format: Optional[Any] = None,
+        keep_alive: Optional[str] = None,
     ):
         self.base_url = base_url or os.getenv(
             "OLLAMA_BASE_URL", "http://localhost:11434"
@@ -30,17 +75,38 @@ class LLMService:
         self.model_name = model_name or os.getenv(
             "OLLAMA_MODEL", "llama3.2"
         )
+        self.concurrency = max(1, concurrency or int(os.getenv("OLLAMA_CONCURRENCY", "4")))
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.num_predict = num_predict or int(os.getenv("OLLAMA_NUM_PREDICT", "64"))
+        self.stream = stream
+        self.early_stop = early_stop
+        self.stop = stop
+        self.format = format
+        self.keep_alive = keep_alive or os.getenv("OLLAMA_KEEP_ALIVE", DEFAULT_KEEP_ALIVE) or None
+        self.early_stops = 0
 
-        print(
-            f"Using Ollama model '{self.model_name}' at '{self.base_url}'"
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=self.concurrency,
         )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
 
-    def predict(self, prompt: str) -> str:
+        logger.info("Using Ollama model '%s' at '%s'", self.model_name, self.base_url)
+
+    def predict(self, prompt: str, timeout: Optional[float] = None) -> str:
         """
         Generate a prediction from the Ollama model given a prompt.
 
+        Connection errors, timeouts and 429/5xx responses are retried up to
+        `max_retries` times with exponential backoff.
+
         Args:
             prompt: The input prompt string.
+            timeout: Per-request timeout in seconds (defaults to self.timeout).
 
         Returns:
             The model's text response (stripped).
@@ -50,23 +116,153 @@ class LLMService:
         payload = {
             "model": self.model_name,
             "prompt": prompt,
-            "stream": False,
+            "stream": self.stream,
             "options": {
                 # Keep output short for classification
-                "num_predict": 64,
+                "num_predict": self.num_predict,
                 "temperature": 0.0,
             },
         }
+        if self.stop:
+            payload["options"]["stop"] = self.stop
+        if self.format is not None:
+            payload["format"] = self.format
+        if self.keep_alive is not None:
+            payload["keep_alive"] = self.keep_alive
+
+        with span("llm.request"):
+            attempt = 0
+            while True:
+                try:
+                    resp = self.session.post(
+                        url, json=payload, timeout=timeout or self.timeout, stream=self.stream
+                    )
+                    if self.stream:
+                        resp.raise_for_status()
+                        return self._read_stream(resp)
+                    logger.debug("Ollama raw response (%s): %s", resp.status_code, resp.text[:500])
+                    resp.raise_for_status()
+                    break
+                except requests.RequestException as exc:
+                    if attempt >= self.max_retries or not self._is_retryable(exc):
+                        count("llm.failures")
+                        raise RuntimeError(f"Ollama request failed: {exc}") from exc
+                    logger.warning("Retrying Ollama request after %s", exc)
+                    count("llm.retries")
+                    time.sleep(self.backoff_factor * (2**attempt))
+                    attempt += 1
+
+            data = resp.json()
+            self._count_tokens(data)
+            return (data.get("response") or "").strip()
+
+    @staticmethod
+    def _count_tokens(data: dict, chunks: int = 0) -> None:
+        """
+        Token counters from Ollama's final response fields; an early-stopped
+        stream never gets them, so its chunk count (one token each) is used.
+        """
+        prompt_tokens = data.get("prompt_eval_count")
+        generated = data.get("eval_count", chunks)
+        if prompt_tokens is not None:
+            count("llm.prompt_tokens", prompt_tokens)
+        count("llm.generated_tokens", generated)
+        observe("llm.generated_tokens_per_request", generated)
+
+    def _read_stream(self, resp: requests.Response) -> str:
+        """
+        Accumulate an NDJSON token stream, closing it as soon as
+        `early_stop` accepts the completed lines received so far.
+        """
+        text = ""
+        checked = 0
+        chunks = 0
+        with resp:
+            for line in resp.iter_lines():
+                if not line:
+                    continue
+                try:
+                    chunk = json.loads(line)
+                except ValueError as exc:
+                    raise RuntimeError(f"Malformed Ollama stream chunk: {line[:200]!r}") from exc
+                if chunk.get("error"):
+                    raise RuntimeError(f"Ollama request failed: {chunk['error']}")
+
+                text += chunk.get("response") or ""
+                chunks += 1
 
+                if self.early_stop is not None:
+                    end = text.rfind("\n") + 1
+                    if text.rstrip().endswith("}"):
+                        end = len(text)
+                    if end > checked:
+                        checked = end
+                        if self.early_stop(text[:end]):
+                            self.early_stops += 1
+                            count("llm.early_stops")
+                            self._count_tokens({}, chunks)
+                            return text[:end].strip()
+
+                if chunk.get("done"):
+                    self._count_tokens(chunk, chunks)
+                    break
+
+        return text.strip()
+
+    def predict_many(
+        self, prompts: List[str], timeout: Optional[float] = None
+    ) -> List[str]:
+        """
+        Generate predictions for several prompts, keeping up to
+        `concurrency` requests in flight.
+
+        Args:
+            prompts: The input prompt strings.
+            timeout: Per-request timeout in seconds (defaults to self.timeout).
+
+        Returns:
+            The model's text responses, in the same order as `prompts`.
+        """
+        if not prompts:
+            return []
+        if self.concurrency == 1 or len(prompts) == 1:
+            return [self.predict(prompt, timeout) for prompt in prompts]
+
+        workers = min(self.concurrency, len(prompts))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(lambda p: self.predict(p, timeout), prompts))
+
+    def warm_up(self, timeout: Optional[float] = None) -> Optional[float]:
+        """
+        Load the model into Ollama's memory without generating anything
+        (a generate request with no prompt), so the first real request does
+        not pay the load time. The model then stays loaded for `keep_alive`. Failures are logged, not raised: the model is
+        then simply loaded on first use.
+
+        Returns:
+            Seconds the load took, or None if it failed
+        """
+        url = f"{self.base_url.rstrip('/')}/api/generate"
+        payload = {"model": self.model_name}
+        if self.keep_alive is not None:
+            payload["keep_alive"] = self.keep_alive
+
+        start = time.perf_counter()
         try:
-            resp = requests.post(url, json=payload, timeout=100)
-            print("=== DEBUG OLLAMA RAW RESPONSE ===")
-            print("Status:", resp.status_code)
-            print(resp.text[:500])
-            print("=== END DEBUG OLLAMA RAW RESPONSE ===")
+            resp = self.session.post(url, json=payload, timeout=timeout or self.timeout)
             resp.raise_for_status()
         except requests.RequestException as exc:
-            raise RuntimeError(f"Ollama request failed: {exc}") from exc
+            logger.warning("Could not preload Ollama model '%s': %s", self.model_name, exc)
+            return None
+        elapsed = time.perf_counter() - start
+        logger.info("Ollama model '%s' loaded in %.1fs", self.model_name, elapsed)
+        return elapsed
+
+    def _is_retryable(self, exc: requests.RequestException) -> bool:
+        if isinstance(exc, (requests.ConnectionError, requests.Timeout)):
+            return True
+        response = getattr(exc, "response", None)
+        return response is not None and response.status_code in self.RETRY_STATUS_CODES
 
-        data = resp.json()
-        return (data.get("response") or "").strip()
\ No newline at end of file
+    def close(self) -> None:
+        self.session.close()
\ No newline at end of file
@@ -0,0 +1,214 @@
+"""
+Local character n-gram nearest-neighbour classifier.
+
+Merchant names are turned into hashed character n-gram TF-IDF vectors and
+compared with cosine similarity against every labelled merchant seen so far
+(previous categorised_output.json runs and the company override table).
+A prediction is only trusted when the nearest neighbour is similar enough;
+everything else is escalated to the LLM.
+
+Training is incremental: `learn` adds or relabels a single merchant.
+Rows are stored sparsely (one entry per n-gram bucket a merchant uses), so
+memory grows with the merchants' n-grams rather than with `dim`, and a new
+merchant only appends its entries; the TF-IDF weights are refreshed in one
+vectorised pass over the entries on the next lookup.
+"""
+
+import json
+import zlib
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from categoriser.categoryCache import normaliseMerchant
+
+DEFAULT_MODEL_PATH = Path(__file__).parent / "cache" / "local_classifier.json"
+
+
+class LocalClassifier:
+    """
+    Hashed character n-gram TF-IDF + cosine nearest neighbour.
+
+    Args:
+        threshold: Minimum cosine similarity for a prediction to be trusted
+        ngram: Character n-gram size
+        dim: Number of hashed feature buckets
+    """
+
+    def __init__(self, threshold: float = 0.8, ngram: int = 3, dim: int = 1 << 12):
+        self.threshold = threshold
+        self.ngram = ngram
+        self.dim = dim
+
+        self.merchants: List[str] = []
+        self.labels: List[str] = []
+        self._index: Dict[str, int] = {}
+
+        # Sparse term counts: parallel arrays of (row, bucket, count) entries
+        self._entries = 0
+        self._rows = np.zeros(0, dtype=np.int32)
+        self._buckets = np.zeros(0, dtype=np.int32)
+        self._counts = np.zeros(0, dtype=np.float32)
+        self._df = np.zeros(dim, dtype=np.float32)
+        self._weights: Optional[np.ndarray] = None  # L2-normalised TF-IDF per entry
+        self._idf: Optional[np.ndarray] = None
+
+    def _features(self, company_person: str) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Hashed n-gram buckets and their counts for a merchant name.
+        """
+        text = f" {normaliseMerchant(company_person)} "
+        n = self.ngram
+        grams = [text[i : i + n] for i in range(max(1, len(text) - n + 1))]
+        buckets = np.fromiter(
+            (zlib.crc32(g.encode("utf-8")) % self.dim for g in grams),
+            dtype=np.int64,
+            count=len(grams),
+        )
+        return np.unique(buckets, return_counts=True)
+
+    def learn(self, company_person: str, category: str) -> None:
+        """
+        Add a labelled merchant, or relabel it if it is already known.
+        """
+        key = normaliseMerchant(company_person)
+        if not key:
+            return
+        if key in self._index:
+            self.labels[self._index[key]] = category
+            return
+
+        buckets, counts = self._features(key)
+        row = len(self.merchants)
+        start, end = self._entries, self._entries + len(buckets)
+        if end > len(self._rows):
+            size = max(256, 2 * end)
+            self._rows = np.resize(self._rows, size)
+            self._buckets = np.resize(self._buckets, size)
+            self._counts = np.resize(self._counts, size)
+        self._rows[start:end] = row
+        self._buckets[start:end] = buckets
+        self._counts[start:end] = counts
+        self._entries = end
+        self._df[buckets] += 1
+
+        self._index[key] = row
+        self.merchants.append(key)
+        self.labels.append(category)
+        self._weights = None
+
+    def _ensure_weights(self) -> None:
+        if self._weights is not None:
+            return
+        n, m = len(self.merchants), self._entries
+        rows, buckets = self._rows[:m], self._buckets[:m]
+        self._idf = (np.log((1 + n) / (1 + self._df)) + 1).astype(np.float32)
+        weights = self._counts[:m] * self._idf[buckets]
+        norms = np.sqrt(np.bincount(rows, weights=weights * weights, minlength=n))
+        norms[norms == 0] = 1
+        self._weights = (weights / norms[rows]).astype(np.float32)
+
+    def nearest(self, company_person: str) -> Tuple[Optional[str], float]:
+        """
+        Find the most similar labelled merchant.
+
+        Returns:
+            (category, cosine similarity) of the nearest neighbour, or
+            (None, 0.0) if nothing has been learnt yet
+        """
+        if not self.merchants:
+            return None, 0.0
+        key = normaliseMerchant(company_person)
+        if key in self._index:
+            return self.labels[self._index[key]], 1.0
+
+        self._ensure_weights()
+        buckets, counts = self._features(key)
+        query = counts * self._idf[buckets]
+        norm = np.linalg.norm(query)
+        if norm == 0:
+            return None, 0.0
+
+        dense = np.zeros(self.dim, dtype=np.float32)
+        dense[buckets] = query / norm
+        m = self._entries
+        scores = np.bincount(
+            self._rows[:m],
+            weights=dense[self._buckets[:m]] * self._weights,
+            minlength=len(self.merchants),
+        )
+        best = int(np.argmax(scores))
+        return self.labels[best], float(scores[best])
+
+    def predict(self, company_person: str) -> Optional[str]:
+        """
+        Return the nearest neighbour's category if its similarity reaches
+        the threshold, otherwise None (escalate to the LLM).
+        """
+        category, score = self.nearest(company_person)
+        if category is not None and score >= self.threshold:
+            return category
+        return None
+
+    def train_from_history(self, path, categories: Optional[List[str]] = None) -> int:
+        """
+        Learn from a categorised_output.json file.
+
+        Args:
+            path: Path to a list of transactions with 'company_person' and 'llm_category'
+            categories: If given, labels outside this list are skipped
+
+        Returns:
+            Number of transactions learnt from
+        """
+        with open(path, "r", encoding="utf-8") as f:
+            transactions = json.load(f)
+
+        learnt = 0
+        for transaction in transactions:
+            category = transaction.get("llm_category")
+            if not category or (categories and category not in categories):
+                continue
+            self.learn(transaction.get("company_person", ""), category)
+            learnt += 1
+        return learnt
+
+    def train_from_overrides(
+        self, overrides: Dict[str, str], categories: Optional[List[str]] = None
+    ) -> int:
+        learnt = 0
+        for company_person, category in overrides.items():
+            if categories and category not in categories:
+                continue
+            self.learn(company_person, category)
+            learnt += 1
+        return learnt
+
+    def save(self, path=None) -> None:
+        path = Path(path or DEFAULT_MODEL_PATH)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open("w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "ngram": self.ngram,
+                    "dim": self.dim,
+                    "merchants": self.merchants,
+                    "labels": self.labels,
+                },
+                f,
+                ensure_ascii=False,
+            )
+
+    @classmethod
+    def load(cls, path=None, threshold: float = 0.8) -> "LocalClassifier":
+        """
+        Rebuild a classifier from the labelled merchants saved by `save`.
+        """
+        with Path(path or DEFAULT_MODEL_PATH).open("r", encoding="utf-8") as f:
+            data = json.load(f)
+
+        classifier = cls(threshold=threshold, ngram=data["ngram"], dim=data["dim"])
+        for company_person, category in zip(data["merchants"], data["labels"]):
+            classifier.learn(company_person, category)
+        return classifier
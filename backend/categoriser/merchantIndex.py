@@ -0,0 +1,275 @@
+"""
+Merchant canonicalisation index: MinHash over character shingles with
+locality-sensitive hashing (LSH).
+
+OCR noise and terminal IDs turn one merchant into many strings ("ST
+LOGISTICS", "STLOGISTICS", "ST LOGISTIC5 0854"). Every name is reduced to
+a match key first (see merchantKey: terminal and reference IDs dropped,
+digits that OCR confuses with letters inside words mapped back, spaces and
+punctuation removed). Keys are then compared as sets of character shingles (n-grams of
+the key padded with start and end markers):
+
+  - each canonical merchant gets a MinHash signature of `num_perm` hash
+    minima, whose agreement estimates the Jaccard similarity of shingle sets
+  - the signature is cut into `bands` bands; merchants sharing any band
+    bucket become candidates, so a lookup only touches a few merchants
+    instead of scanning all of them
+  - a candidate is accepted when the exact Jaccard similarity of the shingle
+    sets reaches `threshold`, or when one key is the other with a single
+    character dropped (keys of at least `min_drop_length` characters), which
+    costs short names too many shingles to pass the threshold
+
+Names that match no canonical merchant become canonical themselves. The
+index is saved as the canonical names plus the alias map; signatures are
+rebuilt on load.
+"""
+
+import json
+import re
+import zlib
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, FrozenSet, List, Optional
+
+import numpy as np
+
+from categoriser.categoryCache import normaliseMerchant
+
+DEFAULT_INDEX_PATH = Path(__file__).parent / "cache" / "merchant_index.json"
+
+# Mersenne prime for the universal hash family; a * x stays below 2**62
+_PRIME = (1 << 31) - 1
+# Digits OCR reads in place of letters, only mapped inside words
+_LOOKALIKES = str.maketrans({"0": "O", "1": "I", "5": "S", "8": "B"})
+_TOKEN = re.compile(r"[A-Z0-9]+")
+_TRAILING_ID = re.compile(r"\d{3,}$")
+
+
+def droppedOne(short: str, long: str) -> bool:
+    """
+    True if `short` is `long` with exactly one character removed.
+    """
+    if len(long) != len(short) + 1:
+        return False
+    i = 0
+    while i < len(short) and short[i] == long[i]:
+        i += 1
+    return short[i:] == long[i + 1 :]
+
+
+def merchantKey(company_person: str) -> str:
+    """
+    Match key for a merchant name: upper-cased, IDs dropped (runs of 3+
+    digits at the end of a token, and tokens with 3+ digits and no more
+    letters than digits, e.g. "9053616FB67925FD"), lookalike digits in
+    tokens with at least two letters mapped to letters, and everything but
+    letters and digits removed.
+    """
+    tokens = []
+    for token in _TOKEN.findall(normaliseMerchant(company_person)):
+        token = _TRAILING_ID.sub("", token)
+        digits = sum(c.isdigit() for c in token)
+        if not token or (digits >= 3 and digits >= len(token) - digits):
+            continue
+        if len(token) - digits >= 2:
+            token = token.translate(_LOOKALIKES)
+        tokens.append(token)
+    return "".join(tokens)
+
+
+class MerchantIndex:
+    """
+    MinHash/LSH index of canonical merchant names.
+
+    Args:
+        threshold: Minimum shingle Jaccard similarity to join a merchant
+        num_perm: MinHash signature length
+        bands: LSH bands (num_perm must divide evenly); more bands find
+            lower-similarity candidates at the cost of more of them
+        ngram: Shingle size in characters
+        seed: Seed of the hash family (fixed so saved indexes reload the same)
+        min_drop_length: Shortest key accepted on a single dropped character
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.7,
+        num_perm: int = 64,
+        bands: int = 16,
+        ngram: int = 3,
+        seed: int = 1,
+        min_drop_length: int = 5,
+    ):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.ngram = ngram
+        self.seed = seed
+        self.min_drop_length = min_drop_length
+
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, _PRIME, size=(num_perm, 1), dtype=np.uint64)
+        self._b = rng.integers(0, _PRIME, size=(num_perm, 1), dtype=np.uint64)
+
+        self.canonicals: List[str] = []
+        self._keys: List[str] = []
+        self._shingles: List[FrozenSet[int]] = []
+        self._aliases: Dict[str, int] = {}  # match key -> canonical index
+        self._buckets: List[Dict[bytes, List[int]]] = [defaultdict(list) for _ in range(bands)]
+        self.stats = {"lookups": 0, "exact": 0, "matched": 0, "candidates": 0}
+
+    def __len__(self) -> int:
+        return len(self.canonicals)
+
+    def _shingle(self, key: str) -> FrozenSet[int]:
+        # Padded, so the first and last characters weigh as much as the rest
+        n, key = self.ngram, f"^{key}$"
+        grams = [key[i : i + n] for i in range(max(1, len(key) - n + 1))]
+        return frozenset(zlib.crc32(g.encode("utf-8")) % _PRIME for g in grams)
+
+    def _bands(self, shingles: FrozenSet[int]) -> List[bytes]:
+        values = np.fromiter(shingles, dtype=np.uint64, count=len(shingles))
+        signature = ((self._a * values + self._b) % _PRIME).min(axis=1)
+        return [band.tobytes() for band in signature.reshape(self.bands, -1)]
+
+    def _find(self, key: str, shingles: FrozenSet[int], bands: List[bytes]) -> Optional[int]:
+        candidates = set()
+        for buckets, band in zip(self._buckets, bands):
+            candidates.update(buckets.get(band, ()))
+        self.stats["candidates"] += len(candidates)
+
+        best, best_score = None, self.threshold
+        for candidate in candidates:
+            other = self._shingles[candidate]
+            score = len(shingles & other) / len(shingles | other)
+            if score < self.threshold and self._dropped(key, self._keys[candidate]):
+                score = self.threshold
+            if score >= best_score:
+                best, best_score = candidate, score
+        return best
+
+    def _dropped(self, key: str, other: str) -> bool:
+        short, long = sorted((key, other), key=len)
+        return len(short) >= self.min_drop_length and droppedOne(short, long)
+
+    def match(self, company_person: str) -> Optional[str]:
+        """
+        Canonical merchant for a name, or None if it matches none (the index
+        is not changed).
+        """
+        key = merchantKey(company_person)
+        if not key:
+            return None
+        self.stats["lookups"] += 1
+        if key in self._aliases:
+            self.stats["exact"] += 1
+            return self.canonicals[self._aliases[key]]
+        if not self.canonicals:
+            return None
+
+        shingles = self._shingle(key)
+        found = self._find(key, shingles, self._bands(shingles))
+        if found is None:
+            return None
+        self.stats["matched"] += 1
+        return self.canonicals[found]
+
+    def add(self, company_person: str) -> str:
+        """
+        Canonical merchant for a name, registering the name: as an alias of
+        the canonical merchant it matches, or as a new canonical merchant.
+        """
+        key = merchantKey(company_person)
+        if not key:
+            return normaliseMerchant(company_person)
+        self.stats["lookups"] += 1
+        if key in self._aliases:
+            self.stats["exact"] += 1
+            return self.canonicals[self._aliases[key]]
+
+        shingles = self._shingle(key)
+        bands = self._bands(shingles)
+        found = self._find(key, shingles, bands) if self.canonicals else None
+        if found is not None:
+            self.stats["matched"] += 1
+        else:
+            found = len(self.canonicals)
+            self.canonicals.append(normaliseMerchant(company_person))
+            self._keys.append(key)
+            self._shingles.append(shingles)
+            for buckets, band in zip(self._buckets, bands):
+                buckets[band].append(found)
+        self._aliases[key] = found
+        return self.canonicals[found]
+
+    def add_from_history(self, path) -> int:
+        """
+        Register every merchant of a categorised_output.json file.
+
+        Returns:
+            Number of canonical merchants added
+        """
+        with open(path, "r", encoding="utf-8") as f:
+            transactions = json.load(f)
+
+        before = len(self.canonicals)
+        for transaction in transactions:
+            self.add(transaction.get("company_person") or "")
+        return len(self.canonicals) - before
+
+    def clusters(self) -> Dict[str, List[str]]:
+        """
+        Match keys registered under each canonical merchant.
+        """
+        members: Dict[str, List[str]] = defaultdict(list)
+        for key, index in self._aliases.items():
+            members[self.canonicals[index]].append(key)
+        return dict(members)
+
+    def save(self, path=None) -> None:
+        path = Path(path or DEFAULT_INDEX_PATH)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open("w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "threshold": self.threshold,
+                    "num_perm": self.num_perm,
+                    "bands": self.bands,
+                    "ngram": self.ngram,
+                    "seed": self.seed,
+                    "min_drop_length": self.min_drop_length,
+                    "canonicals": self.canonicals,
+                    "aliases": self._aliases,
+                },
+                f,
+                ensure_ascii=False,
+            )
+
+    @classmethod
+    def load(cls, path=None, threshold: Optional[float] = None) -> "MerchantIndex":
+        """
+        Rebuild an index saved by `save`; `threshold` overrides the saved one.
+        """
+        with Path(path or DEFAULT_INDEX_PATH).open("r", encoding="utf-8") as f:
+            data = json.load(f)
+
+        index = cls(
+            threshold=data["threshold"] if threshold is None else threshold,
+            num_perm=data["num_perm"],
+            bands=data["bands"],
+            ngram=data["ngram"],
+            seed=data["seed"],
+            min_drop_length=data.get("min_drop_length", 5),
+        )
+        for canonical in data["canonicals"]:
+            key = merchantKey(canonical)
+            shingles = index._shingle(key)
+            for buckets, band in zip(index._buckets, index._bands(shingles)):
+                buckets[band].append(len(index.canonicals))
+            index.canonicals.append(canonical)
+            index._keys.append(key)
+            index._shingles.append(shingles)
+        index._aliases = {key: int(value) for key, value in data["aliases"].items()}
+        return index
@@ -0,0 +1,301 @@
+"""
+Tiered model cascade for the LLM categoriser.
+
+Merchants are sent to the fastest model first. An answer is accepted when it
+is a clean last-line category that agrees with the local heuristics (see
+LlmCategoriser.accept_answer); otherwise the merchant is escalated to the
+next, larger model. The last tier that answers always has the final word.
+
+Each tier has its own request timeout and a circuit breaker: after
+`failure_threshold` consecutive failed requests the tier is skipped for
+`cooldown` seconds, then a single trial request decides whether it is
+closed again. Merchants whose tier fails or is skipped move straight on to
+the next tier.
+
+Per-tier counts and latency are kept in `stats` for the run report.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from instrumentation import count, recordSpan
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    Args:
+        failure_threshold: Consecutive failures that open the circuit
+        cooldown: Seconds the circuit stays open before a trial request
+        clock: Time source (time.monotonic by default)
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 3,
+        cooldown: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.failure_threshold = max(1, failure_threshold)
+        self.cooldown = cooldown
+        self.clock = clock
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.trips = 0
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if self.clock() - self.opened_at >= self.cooldown:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        """
+        Whether a request may be sent. While half-open only one trial request
+        is let through at a time.
+        """
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half-open" and not self._trial:
+                self._trial = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self._trial or self.failures >= self.failure_threshold:
+                if self.opened_at is None or self._trial:
+                    self.trips += 1
+                self.opened_at = self.clock()
+            self._trial = False
+
+
+class ModelTier:
+    """
+    One model in the cascade.
+
+    Args:
+        name: Model name, used in logs and stats
+        predict_fn: Takes (prompt, timeout) and returns the raw response;
+            raises on failure (e.g. LLMService.predict)
+        timeout: Per-request timeout in seconds for this tier
+        breaker: Circuit breaker guarding this tier
+        concurrency: Requests kept in flight by predict_many
+        close_fn: Releases the tier's client, if any
+        warm_up_fn: Preloads the tier's model, if supported (e.g.
+            LLMService.warm_up)
+    """
+
+    def __init__(
+        self,
+        name: str,
+        predict_fn: Callable[[str, Optional[float]], str],
+        timeout: Optional[float] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        concurrency: int = 1,
+        close_fn: Optional[Callable[[], None]] = None,
+        warm_up_fn: Optional[Callable[[], Any]] = None,
+    ):
+        self.name = name
+        self.predict_fn = predict_fn
+        self.timeout = timeout
+        self.breaker = breaker or CircuitBreaker()
+        self.concurrency = max(1, concurrency)
+        self.close_fn = close_fn
+        self.warm_up_fn = warm_up_fn
+        self.stats = {
+            "requests": 0,
+            "failures": 0,
+            "skipped": 0,
+            "resolved": 0,
+            "escalated": 0,
+            "seconds": 0.0,
+        }
+        self._lock = threading.Lock()
+        self._metric = name.replace(" ", "_").replace(":", "_").lower()
+
+    def predict(self, prompt: str) -> Optional[str]:
+        """
+        Raw response for one prompt, or None if the circuit is open or the
+        request failed.
+        """
+        if not self.breaker.allow():
+            with self._lock:
+                self.stats["skipped"] += 1
+            count(f"cascade.{self._metric}.skipped")
+            return None
+
+        start = time.perf_counter()
+        try:
+            raw = self.predict_fn(prompt, self.timeout)
+        except Exception as exc:
+            elapsed = time.perf_counter() - start
+            self.breaker.record_failure()
+            with self._lock:
+                self.stats["requests"] += 1
+                self.stats["failures"] += 1
+                self.stats["seconds"] += elapsed
+            count(f"cascade.{self._metric}.failures")
+            logger.warning("Model tier %s failed (%s), escalating", self.name, exc)
+            return None
+
+        elapsed = time.perf_counter() - start
+        self.breaker.record_success()
+        with self._lock:
+            self.stats["requests"] += 1
+            self.stats["seconds"] += elapsed
+        recordSpan(f"cascade.{self._metric}.request", elapsed)
+        return raw
+
+    def predict_many(self, prompts: List[str]) -> List[Optional[str]]:
+        """
+        Raw responses in the order of `prompts`, None where a request failed
+        or was skipped.
+        """
+        if self.concurrency == 1 or len(prompts) <= 1:
+            return [self.predict(prompt) for prompt in prompts]
+        workers = min(self.concurrency, len(prompts))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(self.predict, prompts))
+
+    def close(self) -> None:
+        if self.close_fn is not None:
+            self.close_fn()
+
+
+class ModelCascade:
+    """
+    Ordered model tiers, fastest first.
+
+    `run` sends every prompt to the first tier, keeps the answers the
+    `accept` callback approves, and sends the rest on to the next tier.
+    """
+
+    def __init__(self, tiers: List[ModelTier]):
+        if not tiers:
+            raise ValueError("A model cascade needs at least one tier")
+        self.tiers = tiers
+        self.merchants = 0
+        self.unresolved = 0
+        self.seconds = 0.0
+
+    @property
+    def name(self) -> str:
+        return "+".join(tier.name for tier in self.tiers)
+
+    def run(
+        self,
+        prompts: List[str],
+        accept: Callable[[int, str], bool],
+    ) -> List[Optional[str]]:
+        """
+        Resolve every prompt through the cascade.
+
+        Args:
+            prompts: One prompt per merchant
+            accept: Called with (prompt index, raw response); returns True
+                if the answer is good enough to stop escalating
+
+        Returns:
+            The raw response that resolved each prompt: the first accepted
+            one, otherwise the answer of the last tier that responded, or
+            None if no tier responded
+        """
+        start = time.perf_counter()
+        results: List[Optional[str]] = [None] * len(prompts)
+        answered_by: Dict[int, ModelTier] = {}
+        pending = list(range(len(prompts)))
+
+        for position, tier in enumerate(self.tiers):
+            if not pending:
+                break
+            last = position == len(self.tiers) - 1
+            raws = tier.predict_many([prompts[index] for index in pending])
+            escalate: List[int] = []
+            for index, raw in zip(pending, raws):
+                if raw is None:
+                    escalate.append(index)
+                    continue
+                results[index] = raw
+                answered_by[index] = tier
+                if last or accept(index, raw):
+                    tier.stats["resolved"] += 1
+                    count(f"cascade.{tier._metric}.resolved")
+                else:
+                    tier.stats["escalated"] += 1
+                    count(f"cascade.{tier._metric}.escalated")
+                    escalate.append(index)
+            pending = escalate
+
+        # Escalated merchants whose later tiers all failed keep the last
+        # answer they got; it counts as resolved by the tier that gave it
+        for index in pending:
+            tier = answered_by.get(index)
+            if tier is not None:
+                tier.stats["escalated"] -= 1
+                tier.stats["resolved"] += 1
+
+        unresolved = sum(raw is None for raw in results)
+        self.merchants += len(prompts)
+        self.unresolved += unresolved
+        self.seconds += time.perf_counter() - start
+        if unresolved:
+            count("cascade.unresolved", unresolved)
+        return results
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        """
+        Per-tier share of merchants resolved, mean request latency and
+        circuit state, plus the mean cascade latency per merchant.
+        """
+        merchants = self.merchants or 1
+        tiers = {}
+        for tier in self.tiers:
+            stats = tier.stats
+            tiers[tier.name] = {
+                **stats,
+                "share": stats["resolved"] / merchants,
+                "mean_request_seconds": stats["seconds"] / stats["requests"]
+                if stats["requests"]
+                else 0.0,
+                "breaker": tier.breaker.state,
+                "trips": tier.breaker.trips,
+            }
+        return {
+            "merchants": self.merchants,
+            "unresolved": self.unresolved,
+            "mean_seconds_per_merchant": self.seconds / merchants,
+            "tiers": tiers,
+        }
+
+    def warm_up(self) -> None:
+        """
+        Preload every tier's model at once.
+        """
+        warmable = [tier.warm_up_fn for tier in self.tiers if tier.warm_up_fn is not None]
+        if warmable:
+            with ThreadPoolExecutor(max_workers=len(warmable)) as executor:
+                list(executor.map(lambda warm: warm(), warmable))
+
+    def close(self) -> None:
+        for tier in self.tiers:
+            tier.close()
@@ -7,67 +7,120 @@
 # keep going through the output until hit date xx containing terms like Paynow, DR, CR, Fund, Bill
 import os
 import json
+import logging
+from typing import Iterable, Iterator, List, Optional
 from categoriser.categoryDictionary import FINANCE_TERMS
-import operator as op
+from categoriser.termMatcher import FinanceTermMatcher
+from instrumentation import count
+from records import OcrLine, Transaction, TransactionGroup
 import re
 
+logger = logging.getLogger(__name__)
 
-class OcrSorter:
-    def __init__(self):
-        pass
+# Line of a transaction group (after its start line) holding the company/person
+COMPANY_LINE = {"nets": 1}
+DEFAULT_COMPANY_LINE = 2
 
-    def findScript(self):
-        # Get the directory where this script is located
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-        # Go up one level to backend, then access output.json
-        transactions_output = os.path.join(
-            script_dir, "..", "ocr/ocrOutPut/output.json"
-        )
 
-        print(f"Looking for file at: {os.path.abspath(transactions_output)}")
+class OcrSorter:
+    def __init__(self):
+        # Compiled once: one regex pass per line instead of one per term
+        self.termMatcher = FinanceTermMatcher(FINANCE_TERMS)
+
+    def findScript(self, path):
+        """
+        Load parsed OCR lines saved to disk (StatementPipeline keeps them in
+        memory; this is for lines written by an earlier run with
+        PIPELINE_DUMP_STAGES=lines, i.e. pipelineOutput/<statement>/lines.json).
+        There is no default: a fixed path would silently read a stale file.
+        """
+        transactions_output = path
+
+        logger.debug("Looking for file at: %s", os.path.abspath(transactions_output))
         with open(transactions_output, "r", encoding="utf-8") as f:
-            transactions = json.load(f)
-            print(f"Loaded {len(transactions)} transactions")
+            transactions = [OcrLine.from_dict(line) for line in json.load(f)]
+            logger.debug("Loaded %d transactions", len(transactions))
         return transactions
 
     def checkStartTransaction(self, transaction):
-
-        text = transaction.get("raw_text", "").lower()
-
-        for category, terms in FINANCE_TERMS.items():
-            # Check if ANY of the terms in the list are in the transaction text using word boundaries
-            for term in terms:
-                # Use word boundary \b to match whole words only
-                pattern = r"\b" + re.escape(term) + r"\b"
-                if re.search(pattern, text):
-                    return category
-        return None
+        # First FINANCE_TERMS category with a whole-word term match wins
+        return self.termMatcher.match(transaction.get("raw_text", ""))
 
     def groupTransactions(self, transactions):
-        counter = 0
-        transactionList = []
-        currentListIndex = 0
-        print(len(transactions))
-        while counter < len(transactions):
-            category = self.checkStartTransaction(transactions[counter])
+        return list(self.iterGroups(transactions))
+
+    def iterGroups(self, transactions: Iterable) -> Iterator[TransactionGroup]:
+        """
+        Group OCR lines into transactions in a single pass.
+
+        A group starts at every line that matches a FINANCE_TERMS category and
+        takes the lines after it; it is yielded as soon as the next start line
+        (or the end of input) arrives, so only one group is held at a time.
+        Lines before the first start line are dropped.
+
+        Args:
+            transactions: OcrLine records or dicts (e.g. a resumed batch run),
+                as a list or any iterator
+
+        Yields:
+            TransactionGroup per transaction, in statement order
+        """
+        match = self.termMatcher.match
+        group = None
+        for line in transactions:
+            # Lines may also come straight from JSON (e.g. a resumed batch run)
+            line = OcrLine.coerce(line)
+            category = match(line.raw_text or "")
             if category:  # If a category is found, this is a start transaction
-                print(
-                    f"Start transaction found at index {counter} - Category: {category}"
-                )
-                # Create a new list for this transaction group
-                transactionList.append(
-                    {"category": category, "lines": [transactions[counter]]}
-                )
-                currentListIndex += 1
-            else:
-                if currentListIndex != 0:
-                    # Append to the current transaction group
-                    transactionList[currentListIndex - 1]["lines"].append(
-                        transactions[counter]
-                    )
-
-            counter += 1
-        return transactionList
+                logger.debug("Start transaction found - Category: %s", category)
+                if group is not None:
+                    yield group
+                group = TransactionGroup(category, [line])
+            elif group is not None:
+                group.lines.append(line)
+        if group is not None:
+            yield group
+
+    def iterTransactions(self, transactions: Iterable) -> Iterator[Transaction]:
+        """
+        Group and clean OCR lines in one pass, without building the groups.
+
+        Equivalent to cleanTransactions(groupTransactions(transactions)), but
+        a state machine that only keeps the fields it needs of the current
+        group (start line, company line, line count): memory stays constant
+        however long the statement is, and each transaction is yielded as
+        soon as the next start line arrives.
+
+        Args:
+            transactions: OcrLine records or dicts, as a list or any iterator
+
+        Yields:
+            Cleaned Transaction records, in statement order
+        """
+        match = self.termMatcher.match
+        category = None  # category of the group in progress
+        head: List[str] = []  # parts of its start line
+        companyLine = None  # parts of its company/person line
+        wanted = 0  # offset of the company/person line
+        offset = 0  # lines seen after the start line
+        for line in transactions:
+            line = OcrLine.coerce(line)
+            started = match(line.raw_text or "")
+            if started:
+                if category is not None:
+                    transaction = self.buildTransaction(category, head, companyLine, offset + 1)
+                    if transaction is not None:
+                        yield transaction
+                category, head, companyLine, offset = started, line.parts, None, 0
+                wanted = COMPANY_LINE.get(started, DEFAULT_COMPANY_LINE)
+            elif category is not None:
+                offset += 1
+                if offset == wanted:
+                    companyLine = line.parts
+        if category is not None:
+            transaction = self.buildTransaction(category, head, companyLine, offset + 1)
+            if transaction is not None:
+                yield transaction
 
     # Cleaning this transactionsList into this format:
     # [date, transaction type(paynow, cr, dr), amount ,company]
@@ -76,35 +129,64 @@ class OcrSorter:
     def cleanTransactions(self, transactionList):
         cleanedTransactions = []
         for transaction in transactionList:
-            lines = transaction["lines"]
-            category = transaction["category"]
+            transaction = TransactionGroup.coerce(transaction)
+            lines = transaction.lines
+            category = transaction.category
 
-            # Skip interest transactions (not expenses - these are income/bank transactions)
-            if category == "interest":
-                print(f"Skipping interest transaction")
-                continue
+            # Extract company/person from appropriate line based on category
+            wanted = COMPANY_LINE.get(category, DEFAULT_COMPANY_LINE)
+            companyLine = lines[wanted].parts if len(lines) > wanted else None
 
-            # Extract date and amount from first line
-            date = lines[0]["parts"][0]  # date
-            amount = lines[0]["parts"][2]  # amount
+            cleaned = self.buildTransaction(category, lines[0].parts, companyLine, len(lines))
+            if cleaned is not None:
+                cleanedTransactions.append(cleaned)
+        return cleanedTransactions
 
-            # Extract company/person from appropriate line based on category
-            if category == "nets":
-                companyPerson = lines[1]["parts"][0].upper()
-            else:
-                companyPerson = lines[2]["parts"][0].upper()
-
-            cleanedCompanyPerson = self.cleanCompanyPerson(companyPerson)
-
-            cleanedTransactions.append(
-                {
-                    "date": date,
-                    "category": category,
-                    "amount": amount,
-                    "company_person": cleanedCompanyPerson,
-                }
+    def buildTransaction(
+        self,
+        category: str,
+        head: List[str],
+        companyLine: Optional[List[str]],
+        length: int,
+    ) -> Optional[Transaction]:
+        """
+        Build the cleaned transaction of one group.
+
+        Args:
+            category: Category of the group's start line
+            head: Parts of the start line: [date, description, amount, ...]
+            companyLine: Parts of the company/person line, or None if the
+                group is too short to have one
+            length: Number of lines in the group, for the log
+
+        Returns:
+            The transaction, or None for interest lines and for groups that
+            lack a date, amount or company/person (e.g. FX or summary rows
+            that happen to contain a start term)
+        """
+        # Skip interest transactions (not expenses - these are income/bank transactions)
+        if category == "interest":
+            logger.debug("Skipping interest transaction")
+            return None
+
+        if len(head) < 3 or not companyLine:
+            logger.warning(
+                "Skipping %s transaction with %d line(s) and %d field(s) on its first line: %r",
+                category,
+                length,
+                len(head),
+                " ".join(head)[:80],
             )
-        return cleanedTransactions
+            count("sorter.short_groups")
+            return None
+
+        # Date and amount from the first line
+        date = head[0]
+        amount = head[2]
+        companyPerson = companyLine[0].upper()
+
+        cleanedCompanyPerson = self.cleanCompanyPerson(companyPerson)
+        return Transaction(date, category, amount, cleanedCompanyPerson)
 
     def cleanCompanyPerson(self, raw: str) -> str:
         SUFFIX_STOP_WORDS = {
@@ -136,7 +218,10 @@ class OcrSorter:
             if token == "WWW":
                 continue
 
-            # For domains, keep part before first dot
+            # For domains, keep the part before the first dot after any WWW.
+            # ("WWW.JUICYFRESH.COM.SG" -> "JUICYFRESH", like "WWW,JUICYFRESH")
+            if token.startswith("WWW."):
+                token = token[len("WWW."):]
             if "." in token:
                 token = token.split(".")[0]
 
@@ -0,0 +1,57 @@
+"""
+Precompiled matcher for FINANCE_TERMS.
+
+All terms are compiled into a single regex. Each term sits inside a
+zero-width lookahead, so every position in the text is tested against every
+term (overlapping matches included) in one C-level scan, and the categories
+keep the FINANCE_TERMS priority: the first category (in dict order) with
+any whole-word term match wins, exactly like checking each
+`\\bterm\\b` pattern in turn. A first-character class in front of the
+lookahead lets the scan skip most positions cheaply.
+"""
+
+import re
+from typing import Dict, Iterable, List, Optional
+
+
+class FinanceTermMatcher:
+    def __init__(self, terms: Dict[str, List[str]]):
+        self.categories = list(terms)
+        self._group_priority: Dict[str, int] = {}
+
+        alternatives = []
+        for priority, category in enumerate(self.categories):
+            for term in terms[category]:
+                group = f"t{len(self._group_priority)}"
+                self._group_priority[group] = priority
+                alternatives.append(f"(?P<{group}>{re.escape(term)})\\b")
+
+        # Cheap first-character check so most positions are rejected before
+        # the alternation is tried
+        first_chars = "".join(sorted({re.escape(t[0]) for ts in terms.values() for t in ts if t}))
+        self._pattern = re.compile(
+            f"(?=[{first_chars}])" + r"\b(?=" + "|".join(alternatives) + ")"
+        )
+
+    def match(self, text: str) -> Optional[str]:
+        """
+        Return the highest-priority category with a term in `text`, or None.
+        """
+        best = None
+        for m in self._pattern.finditer(text.lower()):
+            priority = self._group_priority[m.lastgroup]
+            if best is None or priority < best:
+                best = priority
+                if best == 0:
+                    break
+        return None if best is None else self.categories[best]
+
+    def match_many(self, texts: Iterable[str]) -> List[Optional[str]]:
+        """
+        `match` over a whole list of lines.
+
+        Scanning each line separately beats joining them into one string:
+        the per-line scan can stop at the first top-priority match.
+        """
+        match = self.match
+        return [match(text) for text in texts]
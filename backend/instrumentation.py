@@ -0,0 +1,233 @@
+"""
+Run instrumentation: spans, counters and histograms.
+
+    from instrumentation import count, observe, span
+
+    with span("ocr.page.paddleocr"):
+        ...
+    count("llm.calls")
+    observe("llm.prompt_tokens", 123)
+
+Disabled by default. While disabled every call returns immediately (`span`
+hands back a shared no-op context manager), so instrumentation can stay in
+hot paths. Enable it with:
+
+  - SPENDLENS_METRICS=1, or
+  - METRICS_REPORT=<path>: also write the JSON run report there at exit of
+    main.py / batch.py
+
+Span durations and observed values go into log-bucketed histograms (count,
+sum, min, max, approximate p50/p95), so memory stays constant however long
+the run. `report()` returns everything as a JSON-ready dict.
+
+Log output uses the standard logging module; entry points call
+`configureLogging()`, with the level taken from LOG_LEVEL (default INFO).
+"""
+
+import json
+import logging
+import math
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+# Histogram resolution: buckets per doubling of the value (~19% wide)
+_BUCKETS_PER_OCTAVE = 4
+
+
+class Histogram:
+    __slots__ = ("count", "total", "min", "max", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.buckets: Dict[int, int] = {}
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        bucket = math.floor(math.log2(value) * _BUCKETS_PER_OCTAVE) if value > 0 else None
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+
+    def percentile(self, q: float) -> Optional[float]:
+        """
+        Approximate percentile: the geometric middle of the bucket holding it,
+        clamped to the observed range.
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = self.buckets.get(None, 0)
+        if seen >= rank:
+            return max(self.min, 0.0)
+        for bucket in sorted(b for b in self.buckets if b is not None):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                value = 2 ** ((bucket + 0.5) / _BUCKETS_PER_OCTAVE)
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    def summary(self, scale: float = 1.0) -> Dict[str, Any]:
+        if not self.count:
+            return {"count": 0}
+        return {
+            "count": self.count,
+            "total": self.total * scale,
+            "mean": self.total / self.count * scale,
+            "min": self.min * scale,
+            "p50": self.percentile(0.5) * scale,
+            "p95": self.percentile(0.95) * scale,
+            "max": self.max * scale,
+        }
+
+
+class Recorder:
+    """
+    Thread-safe store behind the module-level functions.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.started_at = time.time()
+            self._started = time.perf_counter()
+            self.counters: Dict[str, float] = {}
+            self.spans: Dict[str, Histogram] = {}
+            self.histograms: Dict[str, Histogram] = {}
+
+    def count(self, name: str, n: float = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def observe(self, name: str, value: float) -> None:
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.add(value)
+
+    def record_span(self, name: str, seconds: float) -> None:
+        with self._lock:
+            histogram = self.spans.get(name)
+            if histogram is None:
+                histogram = self.spans[name] = Histogram()
+            histogram.add(seconds)
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "started_at": self.started_at,
+                "duration_seconds": time.perf_counter() - self._started,
+                # Span durations in milliseconds
+                "spans_ms": {
+                    name: h.summary(scale=1000.0) for name, h in sorted(self.spans.items())
+                },
+                "counters": dict(sorted(self.counters.items())),
+                "histograms": {name: h.summary() for name, h in sorted(self.histograms.items())},
+            }
+
+
+class _Span:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        _recorder.record_span(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+_recorder = Recorder()
+_enabled = os.getenv("SPENDLENS_METRICS", "0") == "1" or bool(os.getenv("METRICS_REPORT"))
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def enable(on: bool = True) -> None:
+    global _enabled
+    _enabled = on
+
+
+def span(name: str):
+    """
+    Context manager timing a block into the `name` span histogram.
+    """
+    if not _enabled:
+        return _NULL_SPAN
+    return _Span(name)
+
+
+def recordSpan(name: str, seconds: float) -> None:
+    """
+    Record a duration the caller already measured (e.g. when the span name
+    is only known at the end of the block).
+    """
+    if _enabled:
+        _recorder.record_span(name, seconds)
+
+
+def count(name: str, n: float = 1) -> None:
+    if _enabled:
+        _recorder.count(name, n)
+
+
+def observe(name: str, value: float) -> None:
+    if _enabled:
+        _recorder.observe(name, value)
+
+
+def report() -> Dict[str, Any]:
+    return _recorder.report()
+
+
+def reset() -> None:
+    _recorder.reset()
+
+
+def writeReport(path: Optional[str] = None) -> Optional[str]:
+    """
+    Write the JSON run report to `path` (default METRICS_REPORT). Does
+    nothing when instrumentation is disabled or no path is configured.
+    """
+    path = path or os.getenv("METRICS_REPORT")
+    if not (_enabled and path):
+        return None
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report(), f, indent=2)
+    logging.getLogger(__name__).info("Run report written to %s", path)
+    return path
+
+
+def configureLogging(level: Optional[str] = None) -> None:
+    logging.basicConfig(
+        level=(level or os.getenv("LOG_LEVEL", "INFO")).upper(),
+        format="%(asctime)s %(levelname)-7s %(name)s: %(message)s",
+    )
@@ -1,78 +1,59 @@
-from ocr.ocr import Ocr
-from ocr.parser import OcrParser
-from datetime import datetime
+import logging
+import os
+import sys
 from pathlib import Path
 import json
-from categoriser.sorter import OcrSorter
-from categoriser.llmService import LLMService
-from categoriser.llmCategoriser import LlmCategoriser
-
-ocr_engine = Ocr()
-# Replace with a valid image path or ensure the path exists
-result = ocr_engine.perform_ocr("bankStatements/AUG 2025_20251126153531065.pdf")
-# print(result)
-# ocr_engine.print_result(result)
-parser = OcrParser()
-transactions = parser.parse_transactions(result)
-
-# Write to JSON file for easier data manipulation
-output_dir = Path(__file__).parent / "ocr" / "ocrOutput"
-output_dir.mkdir(parents=True, exist_ok=True)
-
-# timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-output_path = output_dir / "output.json"
-
-with output_path.open("w", encoding="utf-8") as f:
-    json.dump(transactions, f, indent=2, ensure_ascii=False)
-
-print(f"Results written to {output_path} ({len(transactions)} transactions)")
-
-# Extract transactions
-# Clean transaction company/person names
-
-sorter = OcrSorter()
-transactions = sorter.findScript()
-# print(transactions)
-groupedTransactions = sorter.groupTransactions(transactions)
-print(groupedTransactions)
-cleanedTransactions = sorter.cleanTransactions(groupedTransactions)
-
-print("CLEANED TRANSACTIONS:")
-print(json.dumps(cleanedTransactions, indent=2))
-
-# Initialize Phi-3 model (this takes time on first run)
-print("\n" + "=" * 60)
-print("Initializing LLM for categorization...")
-print("=" * 60)
-llmModel = LLMService()
-
-# Categorize transactions
-llmCategoriser = LlmCategoriser(predict_fn=llmModel.predict)
-
-print(f"\nCategorizing {len(cleanedTransactions)} transactions...")
-for i, transaction in enumerate(cleanedTransactions, 1):
-    print(
-        f"[{i}/{len(cleanedTransactions)}] Categorizing: {transaction['company_person']}"
-    )
-    category = llmCategoriser.categorise(transaction["company_person"])
-    if category == "ignore":
-        name = transaction["company_person"].lower()
-        bank_keywords = ["bank", "interest", "fee", "fees", "charge", "charges",
-                        "atm", "transfer", "loan", "repayment", "interest"]
-        if not any(k in name for k in bank_keywords):
-            category = "misc"
-    transaction["llm_category"] = (
-        category  # Use different key to preserve original category
-    )
-    print(f"  → Category: {category}")
-
-# Store as JSON output
+from instrumentation import configureLogging, writeReport
+from pipeline import StatementPipeline
+from records import recordToDict
+from spendLedger import SpendLedger
+
+# LOG_LEVEL=DEBUG shows per-page / per-merchant detail; METRICS_REPORT=<path>
+# writes a JSON report of stage timings and counters (see instrumentation.py)
+configureLogging()
+logger = logging.getLogger("main")
+
+# Statements to process; defaults to the sample statement
+# Set PIPELINE_DUMP_STAGES=lines,grouped,cleaned to keep intermediate output
+# Set PIPELINE_OVERLAP=1 to categorise finished pages while later pages are OCR'd
+statements = sys.argv[1:] or ["bankStatements/AUG 2025_20251126153531065.pdf"]
+
+# OCR, parser, sorter and categoriser are initialised once for all statements
+pipeline = StatementPipeline()
+# Every run is also upserted into the persistent spend ledger
+ledger = SpendLedger()
+
+# Load the Ollama model up front instead of on the first merchant. PaddleOCR
+# stays lazy (digital statements never need it); OCR_WARMUP=1 also
+# initialises it now, for runs that are known to be scanned
+pipeline.warmUp(ocr=os.getenv("OCR_WARMUP", "0") == "1")
+
+cleanedTransactions = []
+for statement in statements:
+    logger.info("Processing %s", statement)
+    # Pages are OCR'd lazily: page 1 is skipped and OCR stops at the end-of-transactions marker
+    transactions = pipeline.run(statement)
+    # Full dump only at LOG_LEVEL=DEBUG; the data also goes to the output file and ledger
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(
+            "Categorised transactions:\n%s",
+            json.dumps(transactions, indent=2, ensure_ascii=False, default=recordToDict),
+        )
+    ledger.upsert(Path(statement).name, transactions)
+    cleanedTransactions.extend(transactions)
+
+# Store as JSON output (also the local classifier's training history)
 output_dir = Path(__file__).parent / "categoriser" / "categorisedOutput"
 output_dir.mkdir(parents=True, exist_ok=True)
 output_path = output_dir / "categorised_output.json"
 
 with output_path.open("w", encoding="utf-8") as f:
-    json.dump(cleanedTransactions, f, indent=2, ensure_ascii=False)
-
-print(f"\n✅ Categorized transactions saved to: {output_path}")
-print(f"Total transactions processed: {len(cleanedTransactions)}")
+    json.dump(cleanedTransactions, f, indent=2, ensure_ascii=False, default=recordToDict)
+
+logger.info("Categorized transactions saved to: %s", output_path)
+logger.info("Total transactions processed: %d", len(cleanedTransactions))
+pipeline.printStats()
+pipeline.close()
+logger.info("Spend ledger: %d transactions in %s", ledger.count(), ledger.path)
+ledger.close()
+writeReport()
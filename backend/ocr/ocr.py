@@ -1,33 +1,294 @@
-from paddleocr import PaddleOCR
+import logging
+import os
+import time
+from importlib import metadata
+from pathlib import Path
+
+from instrumentation import recordSpan
+from ocr.ocrCache import OcrCache
+from ocr.preprocess import findHeaderRow, findTableRegion, offsetPage, toBgr
+from ocr.textLayer import extractTextLayer
+
+logger = logging.getLogger(__name__)
+
+END_MARKER = "End of Transaction Details"
+
 
 class Ocr:
-    def __init__(self):
+    """
+    PaddleOCR wrapper.
+
+    Results are cached on disk by statement content + OCR configuration
+    (see OcrCache), so re-running on an unchanged statement skips OCR.
+    Bypass the cache with use_cache=False or OCR_CACHE=0.
+
+    PDF pages with an embedded text layer (digital statements) are read
+    directly instead of being rasterised and OCR'd; scanned pages still go
+    through PaddleOCR. Disable with use_text_layer=False or OCR_TEXT_LAYER=0.
+
+    Scanned pages are rasterised at `dpi` (OCR_DPI, default 144) in
+    grayscale, and once a page has shown where the transaction table is,
+    later pages of the same size are only recognised inside that region
+    (see ocr/preprocess.py). Disable with preprocess=False or
+    OCR_PREPROCESS=0 to OCR full colour pages.
+
+    PaddleOCR (and paddle) is only imported and initialised when a page
+    actually needs recognition, so cached and digital statements never load
+    it; call warm_up() to load it ahead of time instead.
+    """
+
+    def __init__(self, use_cache=None, cache=None, use_text_layer=None, preprocess=None, dpi=None):
         # Initialize PaddleOCR with English language
-        self.ocr_model = PaddleOCR(use_angle_cls=True, lang='en')
+        self.config = {
+            "paddleocr": self._paddleocr_version(),
+            "use_angle_cls": True,
+            "lang": "en",
+        }
+        self._ocr_model = None
+
+        if use_text_layer is None:
+            use_text_layer = os.getenv("OCR_TEXT_LAYER", "1") != "0"
+        self.use_text_layer = use_text_layer
+        if preprocess is None:
+            preprocess = os.getenv("OCR_PREPROCESS", "1") != "0"
+        self.preprocess = preprocess
+        self.dpi = dpi or float(os.getenv("OCR_DPI", "144"))
+        # (page number, engine, seconds) for every page handled by iter_pages
+        self.page_log = []
+
+        if use_cache is None:
+            use_cache = os.getenv("OCR_CACHE", "1") != "0"
+        self.cache = (cache or OcrCache()) if use_cache else None
+
+    @staticmethod
+    def _paddleocr_version():
+        # Read from the package metadata, so the cache key does not need paddle imported
+        try:
+            return metadata.version("paddleocr")
+        except metadata.PackageNotFoundError:
+            return "unknown"
+
+    @property
+    def ocr_model(self):
+        """
+        The PaddleOCR engine, imported and initialised on first use.
+        """
+        if self._ocr_model is None:
+            start = time.perf_counter()
+            from paddleocr import PaddleOCR
+
+            self._ocr_model = PaddleOCR(use_angle_cls=True, lang='en')
+            elapsed = time.perf_counter() - start
+            recordSpan("ocr.init", elapsed)
+            logger.info("PaddleOCR loaded in %.1fs", elapsed)
+        return self._ocr_model
+
+    def warm_up(self):
+        """
+        Import and initialise PaddleOCR now rather than on the first scanned page.
+        """
+        return self.ocr_model
 
     def perform_ocr(self, image_path):
+        key = None
+        if self.cache is not None:
+            key = self.cache.key(image_path, {**self.config, "mode": "full"})
+            cached = self.cache.get(key)
+            if cached is not None:
+                logger.info("OCR cache hit for %s (%d pages)", image_path, len(cached))
+                return cached
+
         result = self.ocr_model.ocr(image_path)
-        print(f"OCR Result type: {type(result)}")
-        print(f"OCR Result length: {len(result) if result else 0}")
-        if result and len(result) > 0:
-            print(f"First page type: {type(result[0])}")
-            print(f"First page attributes: {dir(result[0])}")
-            # OCRResult objects have different attributes, let's inspect them
+        if key is not None and result:
+            self.cache.put(key, [self._compact_page(page) for page in result])
+        logger.debug("OCR Result type: %s, length: %d", type(result), len(result) if result else 0)
+        # Dumping a whole OCRResult is expensive; only build it when asked for
+        if result and logger.isEnabledFor(logging.DEBUG):
             first_page = result[0]
+            logger.debug("First page type: %s, attributes: %s", type(first_page), dir(first_page))
             if hasattr(first_page, '__dict__'):
-                print(f"First page dict: {first_page.__dict__}")
+                logger.debug("First page dict: %s", first_page.__dict__)
             if hasattr(first_page, 'rec_texts'):
-                print(f"Has rec_texts: {len(first_page.rec_texts)} items")
+                logger.debug("Has rec_texts: %d items", len(first_page.rec_texts))
             if hasattr(first_page, 'dt_polys'):
-                print(f"Has dt_polys: {len(first_page.dt_polys)} items")
+                logger.debug("Has dt_polys: %d items", len(first_page.dt_polys))
         return result
 
+    def iter_pages(self, image_path, first_page=2, scale=None, end_marker=END_MARKER):
+        """
+        Lazily OCR a statement one page at a time.
+
+        PDF pages are rasterised and recognised only when the consumer asks
+        for the next page, starting at `first_page` (1-based; page 1 of a
+        statement holds no transactions). Rasterising stops after the page
+        containing `end_marker`. Only rec_texts/rec_polys/rec_scores are kept
+        per page; the page image and intermediate maps are dropped.
+
+        Use with OcrParser.parse_transactions(pages, start_page=first_page).
+
+        Args:
+            image_path: PDF or image file
+            first_page: First page number to OCR
+            scale: Rasterisation scale (1.0 = 72 DPI); defaults to the `dpi` setting
+            end_marker: Text that marks the last transaction page
+
+        Yields:
+            {"rec_texts", "rec_polys", "rec_scores"} dicts, one per page
+        """
+        scale = scale or self.dpi / 72
+        if self.cache is None:
+            yield from self._iter_pages(image_path, first_page, scale, end_marker)
+            return
+
+        key = self.cache.key(
+            image_path,
+            {
+                **self.config,
+                "mode": "pages",
+                "first_page": first_page,
+                "scale": scale,
+                "end_marker": end_marker,
+                "text_layer": self.use_text_layer,
+                "preprocess": self.preprocess,
+            },
+        )
+        cached = self.cache.get(key)
+        if cached is not None:
+            logger.info("OCR cache hit for %s (%d pages)", image_path, len(cached))
+            yield from cached
+            return
+
+        # Store before handing over the last page: the parser stops pulling
+        # pages as soon as it sees the end marker
+        pages = []
+        for page, is_last in self._iter_pages(image_path, first_page, scale, end_marker, flag_last=True):
+            pages.append(page)
+            if is_last:
+                self.cache.put(key, pages)
+            yield page
+
+    def _iter_pages(self, image_path, first_page, scale, end_marker, flag_last=False):
+        """
+        Uncached page generator behind iter_pages. With flag_last=True it
+        yields (page, is_last_page) pairs.
+        """
+        if Path(image_path).suffix.lower() != ".pdf":
+            # Image input: recognised in one go, but keep the page numbering
+            results = self.ocr_model.ocr(str(image_path)) or []
+            pages = [self._compact_page(p) for p in results[first_page - 1 :]]
+            for idx, page in enumerate(pages):
+                yield (page, idx == len(pages) - 1) if flag_last else page
+            return
+
+        # pypdfium2 ships with PaddleOCR (PaddleX uses it to read PDFs)
+        import pypdfium2
+
+        pdf = pypdfium2.PdfDocument(str(image_path))
+        # Table regions found so far in this statement, by page size
+        regions = {}
+        try:
+            last_idx = len(pdf) - 1
+            for page_idx in range(first_page - 1, len(pdf)):
+                start = time.perf_counter()
+                pdf_page = pdf[page_idx]
+                page = extractTextLayer(pdf_page, scale=scale) if self.use_text_layer else None
+                engine = "text layer"
+                if page is None:
+                    page, engine = self._recognise(pdf_page, scale, regions)
+                pdf_page.close()
+
+                elapsed = time.perf_counter() - start
+                self.page_log.append((page_idx + 1, engine, elapsed))
+                recordSpan(f"ocr.page.{engine.replace(' ', '_').lower()}", elapsed)
+                logger.debug(
+                    "Page %d: %s, %d boxes in %.0f ms", page_idx + 1, engine, len(page["rec_texts"]), elapsed * 1000
+                )
+
+                found_end = any(end_marker in text for text in page["rec_texts"])
+                yield (page, found_end or page_idx == last_idx) if flag_last else page
+
+                if found_end:
+                    logger.debug("Found '%s' on page %d, stopping OCR", end_marker, page_idx + 1)
+                    break
+        finally:
+            pdf.close()
+
+    def _recognise(self, pdf_page, scale, regions):
+        """
+        Rasterise and OCR one PDF page. Returns (page, engine name).
+
+        With preprocessing, a page whose size has a known table region is
+        rendered and recognised only from the region's top, left and right
+        edges to the bottom of the page; if the header row is not in the
+        crop (the layout changed), the full page is OCR'd instead and its
+        region replaces the stored one.
+        """
+        if not self.preprocess:
+            bitmap = pdf_page.render(scale=scale)
+            image = bitmap.to_numpy()[:, :, :3]  # BGR, as PaddleOCR expects
+            bitmap.close()
+            return self._ocr_image(image), "PaddleOCR"
+
+        width, height = pdf_page.get_size()
+        layout = (round(width), round(height))
+        region = regions.get(layout)
+        if region is not None:
+            left, top, right, _ = region.pixels(scale)
+            # Down to the bottom edge: this page's table may run longer than
+            # the one the region was found on
+            crop = (left / scale, 0, max(0.0, width - right / scale), top / scale)
+            page = self._ocr_image(self._render_gray(pdf_page, scale, crop))
+            if findHeaderRow(page) is not None:
+                return offsetPage(page, left, top), "PaddleOCR crop"
+            logger.debug("Table header not in the stored region, OCR'ing the full page")
+
+        page = self._ocr_image(self._render_gray(pdf_page, scale))
+        regions[layout] = findTableRegion(page, width, height, scale)
+        return page, "PaddleOCR"
+
+    @staticmethod
+    def _render_gray(pdf_page, scale, crop=(0, 0, 0, 0)):
+        bitmap = pdf_page.render(scale=scale, crop=crop, grayscale=True)
+        image = toBgr(bitmap.to_numpy())
+        bitmap.close()
+        return image
+
+    def _ocr_image(self, image):
+        results = self.ocr_model.ocr(image)
+        return self._compact_page(results[0]) if results else self._empty_page()
+
+    @staticmethod
+    def _empty_page():
+        return {"rec_texts": [], "rec_polys": [], "rec_scores": []}
+
+    @staticmethod
+    def _compact_page(page):
+        """
+        Keep only what OcrParser needs from a PaddleX OCRResult (or a legacy
+        [[box, (text, score)], ...] page).
+        """
+        if page is None:
+            return Ocr._empty_page()
+        if hasattr(page, 'rec_texts') or isinstance(page, dict):
+            get = page.get if isinstance(page, dict) else lambda key, default=None: getattr(page, key, default)
+            texts = list(get('rec_texts', []) or [])
+            return {
+                "rec_texts": texts,
+                "rec_polys": get('rec_polys', []),
+                "rec_scores": get('rec_scores', [1.0] * len(texts)),
+            }
+        return {
+            "rec_texts": [det[1][0] for det in page],
+            "rec_polys": [det[0] for det in page],
+            "rec_scores": [det[1][1] for det in page],
+        }
+
     def print_result(self, result):
         if not result or result[0] is None:
             print("No text detected.")
             return
-            
+
         for line in result:
             for word_info in line:
                 # word_info is a tuple/list where the last element is the text
-                print(word_info[-1])
\ No newline at end of file
+                print(word_info[-1])
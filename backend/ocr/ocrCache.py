@@ -0,0 +1,144 @@
+"""
+Content-addressed cache for OCR results.
+
+Entries are keyed on a SHA-256 of the statement file plus the OCR
+configuration (PaddleOCR version/options, rasterisation scale, page range),
+so editing the file or changing the OCR setup never returns stale pages.
+
+Each entry is one compressed .npz holding every page's texts, polygons and
+scores as flat arrays with per-page offsets, instead of pretty-printed JSON.
+The directory is kept under `max_bytes` by evicting least recently used
+entries.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from instrumentation import count
+
+DEFAULT_CACHE_DIR = Path(__file__).parent / "cache"
+
+
+def fileDigest(path, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class OcrCache:
+    """
+    You can override the location via:
+      - OCR_CACHE_DIR
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes: int = 512 * 1024 * 1024):
+        self.cache_dir = Path(cache_dir or os.getenv("OCR_CACHE_DIR", DEFAULT_CACHE_DIR))
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def key(self, path, config: Dict[str, Any]) -> str:
+        """
+        Cache key for a statement file under a given OCR configuration.
+        """
+        config_hash = hashlib.sha256(
+            json.dumps(config, sort_keys=True, default=str).encode("utf-8")
+        ).hexdigest()[:16]
+        return f"{fileDigest(path)}-{config_hash}"
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.npz"
+
+    def get(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        """
+        Load cached pages as {"rec_texts", "rec_polys", "rec_scores"} dicts,
+        or None on a miss.
+        """
+        path = self._path(key)
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                texts = data["texts"].tolist()
+                points = data["points"]
+                point_offsets = data["point_offsets"]
+                scores = data["scores"]
+                page_offsets = data["page_offsets"]
+        except (OSError, KeyError, ValueError):
+            self.misses += 1
+            count("ocr_cache.miss")
+            return None
+
+        # Touch for LRU eviction
+        os.utime(path)
+        self.hits += 1
+        count("ocr_cache.hit")
+
+        pages = []
+        for start, end in zip(page_offsets[:-1], page_offsets[1:]):
+            polys = [
+                points[point_offsets[i] : point_offsets[i + 1]] for i in range(start, end)
+            ]
+            pages.append(
+                {
+                    "rec_texts": texts[start:end],
+                    "rec_polys": polys,
+                    "rec_scores": scores[start:end],
+                }
+            )
+        return pages
+
+    def put(self, key: str, pages: List[Dict[str, Any]]) -> None:
+        texts: List[str] = []
+        scores: List[float] = []
+        polys: List[np.ndarray] = []
+        page_offsets = [0]
+
+        for page in pages:
+            page_texts = list(page["rec_texts"])
+            texts.extend(page_texts)
+            scores.extend(float(s) for s in page["rec_scores"])
+            polys.extend(np.asarray(p, dtype=np.float32).reshape(-1, 2) for p in page["rec_polys"])
+            page_offsets.append(len(texts))
+
+        point_offsets = np.zeros(len(polys) + 1, dtype=np.int64)
+        if polys:
+            point_offsets[1:] = np.cumsum([len(p) for p in polys])
+            points = np.concatenate(polys)
+        else:
+            points = np.zeros((0, 2), dtype=np.float32)
+
+        # Write to a temp file first so readers never see a partial entry
+        fd, tmp = tempfile.mkstemp(suffix=".npz", dir=self.cache_dir)
+        with os.fdopen(fd, "wb") as f:
+            np.savez_compressed(
+                f,
+                texts=np.array(texts, dtype=str),
+                points=points,
+                point_offsets=point_offsets,
+                scores=np.array(scores, dtype=np.float32),
+                page_offsets=np.array(page_offsets, dtype=np.int64),
+            )
+        os.replace(tmp, self._path(key))
+        self._evict()
+
+    def _evict(self) -> None:
+        entries = []
+        total = 0
+        for path in self.cache_dir.glob("*.npz"):
+            stat = path.stat()
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
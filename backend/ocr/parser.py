@@ -1,39 +1,113 @@
-from typing import List, Dict, Any
+import logging
+from itertools import chain
+from typing import TYPE_CHECKING, List, Dict, Any, Iterable, Iterator, Optional
+
+from records import OcrLine
+
+if TYPE_CHECKING:
+    import numpy as np
+
+logger = logging.getLogger(__name__)
 
 class OcrParser:
     def __init__(self):
         pass
 
-    def parse_transactions(self, ocr_result: List[Any]) -> List[Dict[str, Any]]:
+    def parse_transactions(
+        self, ocr_result: Iterable[Any], start_page: int = 1
+    ) -> List[OcrLine]:
         """
         Parses raw OCR result into a list of structured transactions.
         Handles both standard PaddleOCR format and PaddleX OCRResult objects.
         Starts from page 2 and stops when "End of Transaction Details" is detected.
+        Lines are clustered per page, so rows from different pages at the same
+        height are never merged.
+
+        `ocr_result` may be a lazy iterator of pages (see Ocr.iter_pages); no
+        further pages are pulled once the end marker is found. `start_page` is
+        the page number of its first item, e.g. 2 when page 1 was never OCR'd.
         """
         transactions = []
-        
-        # Debug: Print the type and structure of ocr_result
-        # print(f"OCR Result Type: {type(ocr_result)}")
-        
-        all_detections = []
+        pages = list(self._iter_detections(ocr_result, start_page))
+
+        total = sum(len(texts) for texts, _, _ in pages)
+        if total == 0:
+            logger.warning("No detections found!")
+            return []
+
+        logger.debug("Total detections across all pages: %d", total)
+
+        # 1. Cluster each page into lines (top-to-bottom, then left-to-right)
+        # 2. Extract data from lines
+        # This is a heuristic approach. You might need to adjust based on the specific bank statement format.
+        for texts, polys, scores in pages:
+            try:
+                lines = self._group_into_lines(polys)
+            except (ValueError, IndexError) as e:
+                logger.error(
+                    "Error clustering detections: %s (expected 4-point polygons)", e
+                )
+                return []
+
+            for line in lines:
+                transaction = self._parse_line([texts[i] for i in line])
+                if transaction:
+                    transactions.append(transaction)
+
+        return transactions
+
+    def iter_lines(self, ocr_result: Iterable[Any], start_page: int = 1) -> Iterator[OcrLine]:
+        """
+        Streaming counterpart of parse_transactions: each page is clustered
+        into lines as soon as it is pulled from `ocr_result`, and its lines
+        are yielded before the next page is requested, so a lazy OCR
+        iterator is only advanced as fast as the lines are consumed.
+
+        A page whose detections cannot be clustered ends the stream (with the
+        same error log as parse_transactions; lines of earlier pages have
+        already been yielded by then).
+        """
+        for texts, polys, scores in self._iter_detections(ocr_result, start_page):
+            try:
+                lines = self._group_into_lines(polys)
+            except (ValueError, IndexError) as e:
+                logger.error(
+                    "Error clustering detections: %s (expected 4-point polygons)", e
+                )
+                return
+
+            for line in lines:
+                transaction = self._parse_line([texts[i] for i in line])
+                if transaction:
+                    yield transaction
+
+    def _iter_detections(self, ocr_result: Iterable[Any], start_page: int):
+        """
+        (texts, polys, scores) of every transaction page, from page 2 up to
+        and including the "End of Transaction Details" marker (cut off
+        there). No further pages are pulled once the marker is found.
+        """
         end_of_transactions_found = False
         
+        pages_iter = iter(ocr_result if ocr_result is not None else [])
+        first_item = next(pages_iter, None)
+        pages_iter = chain([first_item], pages_iter)
+
         # Handle PaddleX OCRResult objects
-        if ocr_result and len(ocr_result) > 0:
-            first_item = ocr_result[0]
+        if first_item is not None:
             
             # Check if it's an OCRResult object (has rec_texts attribute)
             if hasattr(first_item, 'rec_texts') or (isinstance(first_item, dict) and 'rec_texts' in first_item):
-                print("Detected PaddleX OCRResult format")
+                logger.debug("Detected PaddleX OCRResult format")
                 
                 # Process each page (OCRResult object), starting from page 2 (index 1)
-                for page_idx, page in enumerate(ocr_result):
+                for page_idx, page in enumerate(pages_iter, start=start_page - 1):
                     # Skip page 1 (index 0)
                     if page_idx == 0:
-                        print(f"Skipping page {page_idx + 1} (non-transaction page)")
+                        logger.debug("Skipping page %d (non-transaction page)", page_idx + 1)
                         continue
                     
-                    print(f"Processing page {page_idx + 1}")
+                    logger.debug("Processing page %d", page_idx + 1)
                     
                     # Access attributes based on whether it's an object or dict
                     if hasattr(page, 'rec_texts'):
@@ -45,20 +119,18 @@ class OcrParser:
                         polys = page.get('rec_polys', [])
                         scores = page.get('rec_scores', [1.0] * len(texts))
                     
-                    print(f"Found {len(texts)} text detections on page {page_idx + 1}")
+                    logger.debug("Found %d text detections on page %d", len(texts), page_idx + 1)
                     
-                    # Reconstruct standard format: [[box], (text, confidence)]
-                    for i in range(len(texts)):
-                        # Check if we've reached the end of transaction details
-                        if "End of Transaction Details" in texts[i]:
-                            print(f"Found 'End of Transaction Details' marker on page {page_idx + 1}")
-                            end_of_transactions_found = True
-                            break
-                        
-                        # Convert numpy array to list if needed
-                        poly = polys[i].tolist() if hasattr(polys[i], 'tolist') else polys[i]
-                        detection = [poly, (texts[i], scores[i])]
-                        all_detections.append(detection)
+                    # Check if we've reached the end of transaction details
+                    end = self._find_end_marker(texts)
+                    if end is not None:
+                        logger.debug("Found 'End of Transaction Details' marker on page %d", page_idx + 1)
+                        end_of_transactions_found = True
+                    else:
+                        end = len(texts)
+
+                    # Keep polygons/scores as arrays; no per-detection conversion
+                    yield texts[:end], polys[:end], scores[:end]
                     
                     # Stop processing pages if end marker found
                     if end_of_transactions_found:
@@ -66,109 +138,94 @@ class OcrParser:
                         
             # Handle standard PaddleOCR list format
             elif isinstance(first_item, list):
-                print("Detected standard PaddleOCR list format")
+                logger.debug("Detected standard PaddleOCR list format")
                 # Start from page 2 (index 1)
-                for page_idx, page in enumerate(ocr_result):
+                for page_idx, page in enumerate(pages_iter, start=start_page - 1):
                     # Skip page 1 (index 0)
                     if page_idx == 0:
-                        print(f"Skipping page {page_idx + 1} (non-transaction page)")
+                        logger.debug("Skipping page %d (non-transaction page)", page_idx + 1)
                         continue
                     
                     if page:
+                        texts = [detection[1][0] if len(detection) > 1 else "" for detection in page]
+
                         # Check for end marker in this page
-                        for detection in page:
-                            text = detection[1][0] if len(detection) > 1 else ""
-                            if "End of Transaction Details" in text:
-                                print(f"Found 'End of Transaction Details' marker on page {page_idx + 1}")
-                                end_of_transactions_found = True
-                                break
-                            all_detections.append(detection)
+                        end = self._find_end_marker(texts)
+                        if end is not None:
+                            logger.debug("Found 'End of Transaction Details' marker on page %d", page_idx + 1)
+                            end_of_transactions_found = True
+                        else:
+                            end = len(texts)
+
+                        polys = [detection[0] for detection in page[:end]]
+                        scores = [detection[1][1] if len(detection) > 1 else 1.0 for detection in page[:end]]
+                        yield texts[:end], polys, scores
                         
                         if end_of_transactions_found:
                             break
             else:
-                print(f"Unknown OCR result format: {type(first_item)}")
-                return []
+                logger.warning("Unknown OCR result format: %s", type(first_item))
 
-        if not all_detections:
-            print("No detections found!")
-            return []
-
-        # Debug: Check the structure of detections
-        print(f"Total detections across all pages: {len(all_detections)}")
-        if all_detections:
-            print(f"First detection: {all_detections[0]}")
-            print(f"Sample texts: {[d[1][0] for d in all_detections[:5]]}")
-
-        # 1. Sort by Y coordinate to process top-to-bottom
-        # box is [[x1, y1], [x2, y2], [x3, y3], [x4, y4]]
-        # We use the top-left y (y1) for sorting
-        try:
-            all_detections.sort(key=lambda x: x[0][0][1])
-            print("Successfully sorted detections by Y coordinate")
-        except (IndexError, TypeError) as e:
-            print(f"Error sorting detections: {e}")
-            print(f"Detection structure issue - cannot access x[0][0][1]")
-            return []
+    @staticmethod
+    def _find_end_marker(texts) -> Optional[int]:
+        for i, text in enumerate(texts):
+            if "End of Transaction Details" in text:
+                return i
+        return None
 
-        # 2. Group into lines
-        lines = self._group_into_lines(all_detections)
+    def _group_into_lines(self, polys, y_threshold=10, height_ratio=0.5) -> List["np.ndarray"]:
+        """
+        Groups one page's detections into lines based on Y-coordinate proximity.
 
-        # 3. Extract data from lines
-        # This is a heuristic approach. You might need to adjust based on the specific bank statement format.
-        for line in lines:
-            transaction = self._parse_line(line)
-            if transaction:
-                transactions.append(transaction)
+        Boxes are sorted by their vertical centre; a new line starts wherever
+        the gap to the previous centre exceeds the larger of `y_threshold`
+        and `height_ratio` times the smaller of the two box heights. Each line
+        is then ordered by left-most x. Runs in O(n log n) on NumPy arrays.
 
-        return transactions
+        Args:
+            polys: Array-like of shape (n, 4, 2) with the detection polygons
 
-    def _group_into_lines(self, detections, y_threshold=10):
+        Returns:
+            List of index arrays into the page's detections, one per line
         """
-        Groups detections into lines based on Y-coordinate proximity.
-        """
-        lines = []
-        current_line = []
-        
-        if not detections:
-            return lines
+        # Imported here so importing the parser does not load NumPy; only
+        # OCR output with detection polygons needs it
+        import numpy as np
 
-        # Initialize with the first detection
-        current_line.append(detections[0])
-        
-        for i in range(1, len(detections)):
-            current_det = detections[i]
-            prev_det = current_line[-1]
-            
-            # Compare Y-center or Top-Y
-            curr_y = current_det[0][0][1]
-            prev_y = prev_det[0][0][1]
-            
-            if abs(curr_y - prev_y) <= y_threshold:
-                current_line.append(current_det)
-            else:
-                # Sort current line by X coordinate (left to right)
-                current_line.sort(key=lambda x: x[0][0][0])
-                lines.append(current_line)
-                current_line = [current_det]
-        
-        # Append the last line
-        if current_line:
-            current_line.sort(key=lambda x: x[0][0][0])
-            lines.append(current_line)
-            
-        return lines
+        boxes = np.asarray(polys, dtype=np.float32)
+        if boxes.size == 0:
+            return []
+        boxes = boxes.reshape(len(boxes), -1, 2)
+
+        ys = boxes[:, :, 1]
+        top = ys.min(axis=1)
+        bottom = ys.max(axis=1)
+        left = boxes[:, :, 0].min(axis=1)
+        centre = (top + bottom) / 2
+        height = bottom - top
+
+        order = np.argsort(centre, kind="stable")
+        centre_sorted = centre[order]
+        height_sorted = height[order]
+
+        tolerance = np.maximum(
+            y_threshold,
+            height_ratio * np.minimum(height_sorted[1:], height_sorted[:-1]),
+        )
+        line_ids = np.concatenate(([0], np.cumsum(np.diff(centre_sorted) > tolerance)))
+
+        # Sort by line, then by X coordinate (left to right) within a line
+        within = np.lexsort((left[order], line_ids))
+        ordered = order[within]
+        breaks = np.flatnonzero(np.diff(line_ids[within])) + 1
+        return np.split(ordered, breaks)
 
-    def _parse_line(self, line) -> Dict[str, Any]:
+    def _parse_line(self, texts: List[str]) -> OcrLine:
         """
         Attempts to parse a single line of text into a transaction.
         Expected format example: Date Description Amount
         """
         # Combine text in the line
-        texts = [det[1][0] for det in line]
-        full_text = " ".join(texts)        
+        full_text = " ".join(texts)
 
-        return {
-            "raw_text": full_text,
-            "parts": texts
-        }
+        return OcrLine(full_text, texts)
@@ -0,0 +1,118 @@
+"""
+Page preprocessing for scanned statements: grayscale rendering and cropping
+recognition to the transaction table.
+
+The table is located from its column header row ("Date Description
+Withdrawals Deposits Balance") on a full-page OCR result. The region runs
+from just above that row to the bottom of the page and spans the header
+row's width plus a margin. It is not cut at the footer: the page it is
+found on may hold a short table, and later pages of the same layout can
+run longer. Regions are kept in PDF points, so they apply at any
+rasterisation scale.
+
+Ocr reuses a region for the following pages of the same size and checks
+every cropped result still contains the header row; if it does not, the
+page is OCR'd in full and the region is detected again.
+"""
+
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+HEADER_WORDS = ("date", "description", "withdrawals", "deposits", "balance")
+
+
+class TableRegion(NamedTuple):
+    """
+    Table bounds in PDF points from the top-left corner of the page.
+    """
+
+    left: float
+    top: float
+    right: float
+    bottom: float
+
+    def pixels(self, scale: float) -> Tuple[int, int, int, int]:
+        """
+        (left, top, right, bottom) snapped to whole pixels at `scale`, so a
+        cropped render lines up exactly with the full page.
+        """
+        return tuple(round(value * scale) for value in self)
+
+
+def _bounds(polys) -> np.ndarray:
+    """
+    (n, 4) array of x0, y0, x1, y1 per polygon.
+    """
+    boxes = np.asarray(polys, dtype=np.float32).reshape(len(polys), -1, 2)
+    return np.concatenate([boxes.min(axis=1), boxes.max(axis=1)], axis=1)
+
+
+def findHeaderRow(page: Dict[str, Any], min_words: int = 4) -> Optional[np.ndarray]:
+    """
+    Bounds (x0, y0, x1, y1) in pixels of the table's column header row, or
+    None. The row must hold at least `min_words` of HEADER_WORDS, whether
+    OCR returned them as separate boxes or merged.
+    """
+    texts = page["rec_texts"]
+    if not len(texts):
+        return None
+    bounds = _bounds(page["rec_polys"])
+    candidates = [
+        i for i, text in enumerate(texts) if any(word in text.lower() for word in HEADER_WORDS)
+    ]
+    for i in candidates:
+        top, bottom = bounds[i, 1], bounds[i, 3]
+        centre = (top + bottom) / 2
+        row = [j for j in candidates if bounds[j, 1] <= centre <= bounds[j, 3]]
+        words = {word for j in row for word in HEADER_WORDS if word in texts[j].lower()}
+        if len(words) >= min_words:
+            return np.concatenate([bounds[row, :2].min(axis=0), bounds[row, 2:].max(axis=0)])
+    return None
+
+
+def findTableRegion(page: Dict[str, Any], width: float, height: float, scale: float) -> Optional[TableRegion]:
+    """
+    Locate the transaction table on a full-page OCR result.
+
+    Args:
+        page: {"rec_texts", "rec_polys"} in pixels of a page rendered at `scale`
+        width: Page width in PDF points
+        height: Page height in PDF points
+        scale: Rasterisation scale of `page`
+
+    Returns:
+        The table region, or None when the page has no header row
+    """
+    header = findHeaderRow(page)
+    if header is None:
+        return None
+    x0, y0, x1, y1 = header
+    row_height = y1 - y0
+    margin = 3 * row_height
+    return TableRegion(
+        left=max(0.0, float(x0 - margin) / scale),
+        top=max(0.0, float(y0 - row_height) / scale),
+        right=min(width, float(x1 + margin) / scale),
+        bottom=height,
+    )
+
+
+def toBgr(gray: np.ndarray) -> np.ndarray:
+    """
+    Three identical channels: the OCR models expect BGR input.
+    """
+    if gray.ndim == 3:
+        return gray[:, :, :3]
+    return np.repeat(gray[:, :, np.newaxis], 3, axis=2)
+
+
+def offsetPage(page: Dict[str, Any], dx: int, dy: int) -> Dict[str, Any]:
+    """
+    Shift a cropped page's polygons back into full-page pixel coordinates.
+    """
+    polys = page["rec_polys"]
+    if len(polys):
+        polys = np.asarray(polys)
+        polys = (polys + np.array([dx, dy])).astype(polys.dtype)
+    return {**page, "rec_polys": polys}
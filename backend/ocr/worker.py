@@ -0,0 +1,36 @@
+"""
+Warm OCR worker processes, shared by the statement service (service.py)
+and the batch runner (batch.py).
+
+Use `initOcrWorker` as a multiprocessing pool initializer, so each worker
+loads PaddleOCR once, then send it `ocrStatement` tasks.
+"""
+
+import time
+from typing import Any, Dict
+
+# Per-process OCR engine, created once by the pool initializer
+_workerOcr = None
+
+
+def initOcrWorker():
+    global _workerOcr
+    from ocr.ocr import Ocr
+
+    _workerOcr = Ocr()
+    # PaddleOCR is loaded lazily; a warm worker has it loaded already
+    _workerOcr.warm_up()
+
+
+def ocrStatement(path: str) -> Dict[str, Any]:
+    """
+    Runs in a warm worker process: OCR + line parsing. The parsed lines go
+    back to the calling process as OcrLine records (`__slots__` objects,
+    which pickle without a per-line __dict__), alongside the OCR time.
+    """
+    from ocr.parser import OcrParser
+
+    start = time.perf_counter()
+    pages = _workerOcr.iter_pages(path, first_page=2)
+    lines = OcrParser().parse_transactions(pages, start_page=2)
+    return {"lines": lines, "ocr_seconds": time.perf_counter() - start}
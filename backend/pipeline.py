@@ -0,0 +1,352 @@
+"""
+In-memory statement pipeline.
+
+OCR pages -> parsed lines -> grouped transactions -> cleaned -> categorised,
+handed from stage to stage in memory instead of through JSON files. The OCR
+engine, parser, sorter and categoriser are built once, so `run` can be
+called for any number of statements without re-initialising anything:
+
+    pipeline = StatementPipeline()
+    for path in statements:
+        transactions = pipeline.run(path)
+    pipeline.close()
+
+Stage output is only written to disk when asked for, one JSON file per stage
+under <dump_dir>/<statement name>/:
+
+  - PIPELINE_DUMP_STAGES: comma-separated stages to write
+    (lines, grouped, cleaned, categorised)
+  - PIPELINE_DUMP_DIR: where to write them (defaults to pipelineOutput/)
+
+With instrumentation enabled (see instrumentation.py) every stage is timed
+as a `stage.<name>` span. Pages are OCR'd lazily while the parser pulls
+them, so OCR time is part of `stage.lines`; `ocr.page.*` spans break it out.
+
+Overlapped mode (PIPELINE_OVERLAP=1) runs the stages concurrently instead of
+one after the other, so transactions finished on page N are categorised
+(waiting on Ollama) while page N+1 is still being OCR'd (CPU-bound):
+
+  OCR thread --pages--> parse/group/clean thread --transactions--> categoriser
+
+Both queues are bounded (PIPELINE_PAGE_QUEUE, PIPELINE_QUEUE_SIZE), so a
+slow categoriser holds back OCR instead of letting pages pile up. The
+categoriser takes whatever transactions are waiting, up to
+`categorise_chunk` at a time, in queue order, so the output keeps statement
+order. Lines and grouped transactions are never materialised in this mode;
+dumping either stage falls back to the serial run.
+"""
+
+import json
+import logging
+import os
+import queue
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from categoriser.categoriserFactory import (
+    buildCategoriser,
+    closeCategoriser,
+    printCategoriserStats,
+    warmUpCategoriser,
+)
+from categoriser.sorter import OcrSorter
+from instrumentation import count, span
+from ocr.parser import OcrParser
+from records import OcrLine, Transaction, TransactionGroup, recordToDict
+
+DUMP_STAGES = ("lines", "grouped", "cleaned", "categorised")
+DEFAULT_DUMP_DIR = Path(__file__).parent / "pipelineOutput"
+
+logger = logging.getLogger(__name__)
+
+
+class StatementPipeline:
+    """
+    Composable statement pipeline. Each stage method takes the previous
+    stage's output, so stages can also be driven one at a time, e.g.
+    `pipeline.cleaned(pipeline.grouped(lines))` for lines parsed elsewhere.
+
+    Args:
+        ocr: Ocr engine (built on first use if not given)
+        first_page: First statement page to OCR (page 1 holds no transactions)
+        dump_stages: Stages to write to disk, defaults to PIPELINE_DUMP_STAGES
+        dump_dir: Directory for stage output, defaults to PIPELINE_DUMP_DIR
+        overlap: Run the stages concurrently, defaults to PIPELINE_OVERLAP=1
+        page_queue: OCR'd pages buffered ahead of the parser in overlapped mode
+        transaction_queue: Cleaned transactions buffered ahead of the
+            categoriser in overlapped mode
+        categorise_chunk: Most transactions per categorise_many call in
+            overlapped mode
+    """
+
+    def __init__(
+        self,
+        ocr=None,
+        first_page: int = 2,
+        dump_stages: Optional[Iterable[str]] = None,
+        dump_dir: Optional[str] = None,
+        overlap: Optional[bool] = None,
+        page_queue: Optional[int] = None,
+        transaction_queue: Optional[int] = None,
+        categorise_chunk: int = 64,
+    ):
+        if dump_stages is None:
+            dump_stages = [s for s in os.getenv("PIPELINE_DUMP_STAGES", "").split(",") if s]
+        unknown = set(dump_stages) - set(DUMP_STAGES)
+        if unknown:
+            raise ValueError(f"Unknown pipeline stage(s): {', '.join(sorted(unknown))}")
+
+        self.dump_stages = set(dump_stages)
+        self.dump_dir = Path(dump_dir or os.getenv("PIPELINE_DUMP_DIR", DEFAULT_DUMP_DIR))
+        self.first_page = first_page
+
+        if overlap is None:
+            overlap = os.getenv("PIPELINE_OVERLAP", "0") == "1"
+        self.overlap = overlap
+        self.page_queue = page_queue or int(os.getenv("PIPELINE_PAGE_QUEUE", "2"))
+        self.transaction_queue = transaction_queue or int(os.getenv("PIPELINE_QUEUE_SIZE", "256"))
+        self.categorise_chunk = max(1, categorise_chunk)
+
+        self._ocr = ocr
+        self.parser = OcrParser()
+        self.sorter = OcrSorter()
+        self.llmModel, self.llmCategoriser = buildCategoriser()
+
+    @property
+    def ocr(self):
+        if self._ocr is None:
+            # Deferred so pipelines that start from parsed lines never import
+            # the OCR stack (PaddleOCR itself only loads on first recognition)
+            from ocr.ocr import Ocr
+
+            self._ocr = Ocr()
+        return self._ocr
+
+    def warmUp(self, ocr: bool = True) -> None:
+        """
+        Preload the Ollama model(s) in the background while PaddleOCR is
+        imported and initialised in this thread, so neither the first scanned
+        page nor the first merchant pays a cold start. With ocr=False only
+        the model is preloaded (PaddleOCR then loads on the first page that
+        has no text layer). A missing PaddleOCR install is logged, not
+        raised, since statements with a text layer never need it.
+        """
+        with span("warmup"):
+            llm = threading.Thread(
+                target=warmUpCategoriser,
+                args=(self.llmModel, self.llmCategoriser),
+                name="warmup-llm",
+                daemon=True,
+            )
+            llm.start()
+            if ocr:
+                with span("warmup.ocr"):
+                    warm = getattr(self.ocr, "warm_up", None)
+                    if warm is not None:
+                        try:
+                            warm()
+                        except ImportError as e:
+                            logger.warning("Skipping OCR warm-up: %s", e)
+            with span("warmup.llm_wait"):
+                llm.join()
+
+    def pages(self, statement_path) -> Iterator[Dict[str, Any]]:
+        """
+        Lazily OCR'd pages (see Ocr.iter_pages).
+        """
+        return self.ocr.iter_pages(statement_path, first_page=self.first_page)
+
+    def lines(self, pages: Iterable[Dict[str, Any]]) -> List[OcrLine]:
+        return self.parser.parse_transactions(pages, start_page=self.first_page)
+
+    def grouped(self, lines: List[OcrLine]) -> List[TransactionGroup]:
+        return self.sorter.groupTransactions(lines)
+
+    def cleaned(self, grouped: List[TransactionGroup]) -> List[Transaction]:
+        return self.sorter.cleanTransactions(grouped)
+
+    def categorised(self, cleaned: List[Transaction]) -> List[Transaction]:
+        # One call per statement so repeated merchants are only asked about once
+        return self.llmCategoriser.categorise_many(cleaned)
+
+    def run(self, statement_path) -> List[Transaction]:
+        """
+        Process one statement end to end.
+
+        Returns:
+            Transaction records with llm_category set
+        """
+        if self.overlap:
+            if self.dump_stages & {"lines", "grouped"}:
+                logger.info("Dumping lines/grouped output needs the serial pipeline")
+            else:
+                return self.runOverlapped(statement_path)
+
+        name = Path(statement_path).stem
+        with span("statement"):
+            # Includes building the OCR engine on first use
+            with span("stage.pages"):
+                data: Any = self.pages(statement_path)
+            for stage in DUMP_STAGES:
+                with span(f"stage.{stage}"):
+                    data = getattr(self, stage)(data)
+                if stage in self.dump_stages:
+                    self.dump(name, stage, data)
+        count("pipeline.statements")
+        count("pipeline.transactions", len(data))
+        return data
+
+    def runOverlapped(self, statement_path) -> List[Transaction]:
+        """
+        Process one statement with OCR, parsing/grouping/cleaning and
+        categorisation running concurrently (see the module docstring).
+
+        Returns:
+            Transaction records with llm_category set, in statement order
+        """
+        name = Path(statement_path).stem
+        stop = threading.Event()
+        errors: List[BaseException] = []
+        pages: queue.Queue = queue.Queue(maxsize=self.page_queue)
+        cleaned: queue.Queue = queue.Queue(maxsize=self.transaction_queue)
+
+        with span("statement"):
+            with span("stage.pages"):
+                pageIter = self.pages(statement_path)
+            transactions = self.sorter.iterTransactions(
+                self.parser.iter_lines(_drain(pages), start_page=self.first_page)
+            )
+            threads = [
+                threading.Thread(
+                    target=_produce, args=(pageIter, pages, stop, errors), name="pipeline-ocr", daemon=True
+                ),
+                threading.Thread(
+                    target=_produce,
+                    args=(transactions, cleaned, stop, errors),
+                    name="pipeline-sort",
+                    daemon=True,
+                ),
+            ]
+            for thread in threads:
+                thread.start()
+
+            categorised: List[Transaction] = []
+            try:
+                with span("stage.overlapped"):
+                    for chunk in _drainChunks(cleaned, self.categorise_chunk):
+                        count("pipeline.chunks")
+                        categorised.extend(self.categorised(chunk))
+            finally:
+                # Unblocks producers stuck on a full queue if categorising failed
+                stop.set()
+                for thread in threads:
+                    thread.join()
+            if errors:
+                raise errors[0]
+
+        if "cleaned" in self.dump_stages:
+            # Same records as "categorised", minus the category
+            cleanedOnly = [
+                Transaction(t.date, t.category, t.amount, t.company_person) for t in categorised
+            ]
+            self.dump(name, "cleaned", cleanedOnly)
+        if "categorised" in self.dump_stages:
+            self.dump(name, "categorised", categorised)
+        count("pipeline.statements")
+        count("pipeline.transactions", len(categorised))
+        return categorised
+
+    def dump(self, name: str, stage: str, data: Any) -> Path:
+        path = self.dump_dir / name / f"{stage}.json"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open("w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False, default=recordToDict)
+        logger.info("Wrote %s output to %s", stage, path)
+        return path
+
+    def printStats(self) -> None:
+        printCategoriserStats(self.llmCategoriser)
+
+    def close(self) -> None:
+        closeCategoriser(self.llmModel, self.llmCategoriser)
+
+
+_DONE = object()
+
+
+def _put(out: queue.Queue, item: Any, stop: threading.Event) -> bool:
+    """
+    Block while `out` is full (backpressure), giving up once `stop` is set.
+    """
+    while not stop.is_set():
+        try:
+            out.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _produce(items: Iterable[Any], out: queue.Queue, stop: threading.Event, errors: List[BaseException]) -> None:
+    """
+    Thread body of an overlapped stage: push every item of `items` into
+    `out`, then an end-of-stream sentinel. Errors are kept for the caller and
+    stop the other stages.
+    """
+    try:
+        for item in items:
+            if not _put(out, item, stop):
+                break
+    except BaseException as exc:
+        errors.append(exc)
+        stop.set()
+    finally:
+        close = getattr(items, "close", None)
+        if close is not None:
+            close()
+        # The sentinel must get through even after a stop, or the consumer
+        # would block; drop queued items to make room
+        while True:
+            try:
+                out.put(_DONE, timeout=0.1)
+                break
+            except queue.Full:
+                if stop.is_set():
+                    try:
+                        out.get_nowait()
+                    except queue.Empty:
+                        pass
+
+
+def _drain(items: queue.Queue) -> Iterator[Any]:
+    """
+    Items of a stage queue until its end-of-stream sentinel.
+    """
+    while True:
+        item = items.get()
+        if item is _DONE:
+            return
+        yield item
+
+
+def _drainChunks(items: queue.Queue, size: int) -> Iterator[List[Any]]:
+    """
+    Like _drain, but yields whatever is already waiting (at least one item,
+    at most `size`) as one list.
+    """
+    done = False
+    while not done:
+        chunk = [items.get()]
+        if chunk[0] is _DONE:
+            return
+        while len(chunk) < size:
+            try:
+                item = items.get_nowait()
+            except queue.Empty:
+                break
+            if item is _DONE:
+                done = True
+                break
+            chunk.append(item)
+        yield chunk
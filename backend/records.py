@@ -0,0 +1,221 @@
+"""
+Compact transaction records.
+
+OCR lines, grouped transactions and cleaned transactions are `__slots__`
+records instead of dicts: no per-object __dict__, so a million of them take
+a fraction of the memory. For code written against the old dict form they
+still support item access (`line["raw_text"]`, `.get`) and serialise to the
+same JSON through `to_dict` / `json.dump(..., default=recordToDict)`.
+
+For long-lived history, `TransactionBatch` holds cleaned transactions
+column by column and round-trips through Arrow / Parquet (needs pandas and
+pyarrow).
+"""
+
+from typing import Any, Dict, Iterable, List, Optional
+
+
+class _Record:
+    __slots__ = ()
+    # Fields left out of to_dict() while unset
+    _optional: tuple = ()
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if key not in self.__slots__:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.__slots__
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key) if key in self.__slots__ else default
+
+    def keys(self):
+        return self.__slots__
+
+    def __eq__(self, other: Any) -> bool:
+        if type(other) is not type(self):
+            return NotImplemented
+        return all(getattr(self, n) == getattr(other, n) for n in self.__slots__)
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{n}={getattr(self, n)!r}" for n in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            n: getattr(self, n)
+            for n in self.__slots__
+            if n not in self._optional or getattr(self, n) is not None
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]):
+        return cls(**{n: data[n] for n in cls.__slots__ if n in data})
+
+    @classmethod
+    def coerce(cls, obj):
+        """
+        Return `obj` as a record of this type (dicts are converted).
+        """
+        return obj if isinstance(obj, cls) else cls.from_dict(obj)
+
+
+class OcrLine(_Record):
+    """
+    One visual line of a statement: the joined text and its OCR text boxes.
+    """
+
+    __slots__ = ("raw_text", "parts")
+
+    def __init__(self, raw_text: str, parts: List[str]):
+        self.raw_text = raw_text
+        self.parts = parts
+
+
+class TransactionGroup(_Record):
+    """
+    The lines of one transaction, starting at the line that matched `category`.
+    """
+
+    __slots__ = ("category", "lines")
+
+    def __init__(self, category: str, lines: List[OcrLine]):
+        self.category = category
+        self.lines = lines
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"category": self.category, "lines": [line.to_dict() for line in self.lines]}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "TransactionGroup":
+        return cls(data["category"], [OcrLine.coerce(line) for line in data["lines"]])
+
+
+class Transaction(_Record):
+    """
+    A cleaned transaction; `llm_category` is set by LlmCategoriser.
+    """
+
+    __slots__ = ("date", "category", "amount", "company_person", "llm_category")
+    _optional = ("llm_category",)
+
+    def __init__(
+        self,
+        date: str,
+        category: str,
+        amount: str,
+        company_person: str,
+        llm_category: Optional[str] = None,
+    ):
+        self.date = date
+        self.category = category
+        self.amount = amount
+        self.company_person = company_person
+        self.llm_category = llm_category
+
+
+def recordToDict(obj: Any) -> Dict[str, Any]:
+    """
+    `default` hook for json.dump/json.dumps so records serialise like the
+    dicts they replace.
+    """
+    if isinstance(obj, _Record):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class TransactionBatch:
+    """
+    Cleaned transactions stored column by column.
+
+    Columns are plain lists; `to_arrow` dictionary-encodes the low-cardinality
+    ones (date, category, llm_category), which is what keeps the Parquet files
+    small.
+    """
+
+    __slots__ = Transaction.__slots__
+
+    def __init__(self, **columns: List[Any]):
+        for name in self.__slots__:
+            setattr(self, name, list(columns.get(name) or []))
+        if not self.llm_category:
+            self.llm_category = [None] * len(self.date)
+
+    def __len__(self) -> int:
+        return len(self.date)
+
+    @classmethod
+    def from_records(cls, transactions: Iterable[Any]) -> "TransactionBatch":
+        batch = cls()
+        columns = [getattr(batch, name) for name in cls.__slots__]
+        for transaction in transactions:
+            transaction = Transaction.coerce(transaction)
+            for name, column in zip(cls.__slots__, columns):
+                column.append(getattr(transaction, name))
+        return batch
+
+    def to_records(self) -> List[Transaction]:
+        return [Transaction(*row) for row in zip(*(getattr(self, n) for n in self.__slots__))]
+
+    def to_arrow(self):
+        import pyarrow as pa
+
+        arrays = {name: pa.array(getattr(self, name), type=pa.string()) for name in self.__slots__}
+        for name in ("date", "category", "llm_category"):
+            arrays[name] = arrays[name].dictionary_encode()
+        return pa.table(arrays)
+
+    @classmethod
+    def from_arrow(cls, table) -> "TransactionBatch":
+        return cls(
+            **{
+                name: _columnToList(table.column(name))
+                for name in cls.__slots__
+                if name in table.column_names
+            }
+        )
+
+    def to_pandas(self):
+        return self.to_arrow().to_pandas()
+
+    @classmethod
+    def from_pandas(cls, frame) -> "TransactionBatch":
+        import pyarrow as pa
+
+        return cls.from_arrow(pa.Table.from_pandas(frame, preserve_index=False))
+
+    def to_parquet(self, path, compression: str = "zstd") -> None:
+        import pyarrow.parquet as pq
+
+        pq.write_table(self.to_arrow(), str(path), compression=compression)
+
+    @classmethod
+    def from_parquet(cls, path) -> "TransactionBatch":
+        import pyarrow.parquet as pq
+
+        return cls.from_arrow(pq.read_table(str(path)))
+
+
+def _columnToList(column) -> List[Any]:
+    """
+    Arrow column to a Python list. Dictionary-encoded columns are expanded
+    through their dictionary, so repeated values share one str object and
+    per-value conversion is avoided.
+    """
+    values: List[Any] = []
+    for chunk in column.chunks:
+        if hasattr(chunk, "dictionary"):
+            dictionary = chunk.dictionary.to_pylist()
+            indices = chunk.indices.fill_null(len(dictionary)).to_numpy(zero_copy_only=False)
+            dictionary.append(None)
+            values.extend(map(dictionary.__getitem__, indices.tolist()))
+        else:
+            values.extend(chunk.to_pylist())
+    return values
@@ -0,0 +1,331 @@
+"""
+Resident statement service.
+
+Loads PaddleOCR once per worker process and keeps the pool warm, so each
+statement only pays for OCR itself instead of model start-up. Statements are
+accepted over a small local HTTP API and processed from a bounded job queue:
+
+  POST /jobs           JSON {"path": "..."} for a statement under the
+                       statements directory (relative to it, or absolute),
+                       or the raw PDF/image bytes as the request body.
+                       202 {"id": ...}, 403 for a path outside the
+                       statements directory, or 503 when the queue is full.
+  GET  /jobs/<id>      Job status, timings and, once done, the parsed and
+                       categorised transactions.
+  GET  /metrics        Queue depth, job counts and per-job latency stats
+                       (plus stage spans and counters with SPENDLENS_METRICS=1).
+
+The API has no authentication, so it only listens on 127.0.0.1 unless
+--host says otherwise (docker-compose binds 0.0.0.0 inside the container and
+publishes the port on the host's loopback interface only).
+
+Run from backend/:
+    python service.py --port 8000 --workers 4 --queue-size 32
+
+  - OCR_WORKERS: number of warm OCR processes (defaults to the CPU count)
+  - STATEMENTS_DIR: directory path jobs may read from (defaults to
+    backend/bankStatements)
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import queue
+import tempfile
+import threading
+import time
+import uuid
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional
+
+from categoriser.categoriserFactory import buildCategoriser, closeCategoriser
+from categoriser.sorter import OcrSorter
+import instrumentation
+from ocr.worker import initOcrWorker, ocrStatement
+from records import recordToDict
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STATEMENTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bankStatements")
+
+
+def _warmUp(_) -> int:
+    return os.getpid()
+
+
+class StatementService:
+    """
+    Warm OCR process pool + shared categoriser behind a bounded job queue.
+
+    Args:
+        workers: Number of OCR worker processes
+        queue_size: Maximum number of queued (not yet started) jobs
+        history: Number of recent jobs kept for latency statistics
+        max_jobs: Number of jobs (with results) kept for GET /jobs/<id>
+        statements_dir: The only directory path jobs may read from
+    """
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        queue_size: int = 32,
+        history: int = 200,
+        max_jobs: int = 1000,
+        statements_dir: Optional[str] = None,
+    ):
+        self.workers = workers or int(os.getenv("OCR_WORKERS", os.cpu_count() or 1))
+        self.statements_dir = os.path.realpath(
+            statements_dir or os.getenv("STATEMENTS_DIR", DEFAULT_STATEMENTS_DIR)
+        )
+        self.jobs: Dict[str, Dict[str, Any]] = {}
+        self.queue: "queue.Queue[str]" = queue.Queue(maxsize=queue_size)
+        self.latencies: deque = deque(maxlen=history)
+        self.max_jobs = max_jobs
+        self.completed = 0
+        self.failed = 0
+        self._lock = threading.Lock()
+        self._categoriseLock = threading.Lock()
+        self._uploadDir = tempfile.mkdtemp(prefix="spendlens_uploads_")
+
+        logger.info("Starting %d OCR worker processes...", self.workers)
+        start = time.perf_counter()
+        # spawn: PaddlePaddle is not fork-safe once initialised
+        context = multiprocessing.get_context("spawn")
+        self.pool = context.Pool(processes=self.workers, initializer=initOcrWorker)
+        self.llmModel, self.llmCategoriser = buildCategoriser()
+        self.sorter = OcrSorter()
+
+        # Workers run the initializer (model load) before their first task,
+        # so a round of no-op tasks blocks until the pool is warm
+        pids = set(self.pool.map(_warmUp, range(self.workers * 4), chunksize=1))
+        logger.info("%d OCR workers warm in %.1fs", len(pids), time.perf_counter() - start)
+
+        self._dispatchers = [
+            threading.Thread(target=self._dispatch, daemon=True) for _ in range(self.workers)
+        ]
+        for thread in self._dispatchers:
+            thread.start()
+
+    def resolveStatement(self, path: str) -> str:
+        """
+        Resolve a client-supplied path against the statements directory.
+
+        Raises:
+            PermissionError: If it points outside the statements directory
+                (including via symlinks or "..")
+            FileNotFoundError: If the file does not exist
+        """
+        resolved = os.path.realpath(os.path.join(self.statements_dir, path))
+        if os.path.commonpath([resolved, self.statements_dir]) != self.statements_dir:
+            raise PermissionError(f"path is outside the statements directory: {path}")
+        if not os.path.isfile(resolved):
+            raise FileNotFoundError(f"file not found: {path}")
+        return resolved
+
+    def submit(self, path: str, cleanup: bool = False) -> str:
+        """
+        Queue a statement for processing.
+
+        Raises:
+            queue.Full: If the job queue is at capacity
+        """
+        jobId = uuid.uuid4().hex
+        job = {
+            "id": jobId,
+            "path": path,
+            "status": "queued",
+            "submitted_at": time.time(),
+            "cleanup": cleanup,
+        }
+        with self._lock:
+            self._pruneJobs()
+            self.jobs[jobId] = job
+        try:
+            self.queue.put_nowait(jobId)
+        except queue.Full:
+            with self._lock:
+                del self.jobs[jobId]
+            raise
+        return jobId
+
+    def _pruneJobs(self):
+        # Oldest finished jobs go first; queued/running jobs are always kept
+        excess = len(self.jobs) - self.max_jobs + 1
+        if excess <= 0:
+            return
+        finished = [
+            jobId for jobId, job in self.jobs.items() if job["status"] in ("done", "failed")
+        ]
+        for jobId in finished[:excess]:
+            del self.jobs[jobId]
+
+    def submitBytes(self, data: bytes, suffix: str = ".pdf") -> str:
+        fd, path = tempfile.mkstemp(suffix=suffix, dir=self._uploadDir)
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        try:
+            return self.submit(path, cleanup=True)
+        except queue.Full:
+            os.remove(path)
+            raise
+
+    def _dispatch(self):
+        while True:
+            jobId = self.queue.get()
+            job = self.jobs[jobId]
+            started = time.time()
+            job["status"] = "running"
+            job["queue_seconds"] = started - job["submitted_at"]
+            try:
+                ocr = self.pool.apply(ocrStatement, (job["path"],))
+                job["ocr_seconds"] = ocr["ocr_seconds"]
+                instrumentation.recordSpan("service.ocr", ocr["ocr_seconds"])
+
+                cleaned = list(self.sorter.iterTransactions(ocr["lines"]))
+
+                categoriseStart = time.perf_counter()
+                # The categoriser (cache, local classifier) is shared state
+                with self._categoriseLock:
+                    job["transactions"] = self.llmCategoriser.categorise_many(cleaned)
+                job["categorise_seconds"] = time.perf_counter() - categoriseStart
+                job["status"] = "done"
+            except Exception as exc:
+                job["status"] = "failed"
+                job["error"] = f"{type(exc).__name__}: {exc}"
+            finally:
+                job["total_seconds"] = time.time() - job["submitted_at"]
+                if job.pop("cleanup", False):
+                    try:
+                        os.remove(job["path"])
+                    except OSError:
+                        pass
+                with self._lock:
+                    if job["status"] == "done":
+                        self.completed += 1
+                        self.latencies.append(job["total_seconds"])
+                    else:
+                        self.failed += 1
+                self.queue.task_done()
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            latencies = sorted(self.latencies)
+            running = sum(1 for job in self.jobs.values() if job["status"] == "running")
+            completed, failed = self.completed, self.failed
+
+        def percentile(p: float) -> Optional[float]:
+            if not latencies:
+                return None
+            return latencies[min(len(latencies) - 1, int(p * len(latencies)))]
+
+        metrics = {
+            "queue_depth": self.queue.qsize(),
+            "queue_capacity": self.queue.maxsize,
+            "running": running,
+            "workers": self.workers,
+            "completed": completed,
+            "failed": failed,
+            "latency_seconds": {
+                "mean": sum(latencies) / len(latencies) if latencies else None,
+                "p50": percentile(0.5),
+                "p95": percentile(0.95),
+                "max": latencies[-1] if latencies else None,
+            },
+        }
+        if instrumentation.enabled():
+            metrics["instrumentation"] = instrumentation.report()
+        return metrics
+
+    def close(self):
+        self.pool.terminate()
+        self.pool.join()
+        closeCategoriser(self.llmModel, self.llmCategoriser)
+
+
+def makeHandler(service: StatementService):
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, status: int, body: Any):
+            data = json.dumps(body, ensure_ascii=False, default=recordToDict).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_POST(self):
+            if self.path != "/jobs":
+                self._send(404, {"error": "not found"})
+                return
+
+            length = int(self.headers.get("Content-Length", 0))
+            body = self.rfile.read(length)
+            try:
+                if self.headers.get("Content-Type", "").startswith("application/json"):
+                    jobId = service.submit(service.resolveStatement(json.loads(body)["path"]))
+                else:
+                    suffix = ".png" if self.headers.get("Content-Type") == "image/png" else ".pdf"
+                    jobId = service.submitBytes(body, suffix=suffix)
+            except queue.Full:
+                self._send(503, {"error": "job queue is full", **service.metrics()})
+                return
+            except PermissionError as exc:
+                self._send(403, {"error": str(exc)})
+                return
+            except FileNotFoundError as exc:
+                self._send(400, {"error": str(exc)})
+                return
+            except (ValueError, KeyError) as exc:
+                self._send(400, {"error": f"bad request: {exc}"})
+                return
+
+            self._send(202, {"id": jobId})
+
+        def do_GET(self):
+            if self.path == "/metrics":
+                self._send(200, service.metrics())
+                return
+            if self.path.startswith("/jobs/"):
+                job = service.jobs.get(self.path[len("/jobs/"):])
+                if job is None:
+                    self._send(404, {"error": "unknown job"})
+                else:
+                    self._send(200, job)
+                return
+            self._send(404, {"error": "not found"})
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SpendLens resident statement service")
+    # No authentication: loopback only unless explicitly exposed
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--queue-size", type=int, default=32)
+    parser.add_argument("--statements-dir", default=None, help="Directory path jobs may read from")
+    args = parser.parse_args()
+
+    instrumentation.configureLogging()
+    service = StatementService(
+        workers=args.workers, queue_size=args.queue_size, statements_dir=args.statements_dir
+    )
+    server = ThreadingHTTPServer((args.host, args.port), makeHandler(service))
+    logger.info("Statement service listening on http://%s:%d", args.host, args.port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,415 @@
+"""
+Persistent spend ledger.
+
+Categorised transactions from every statement are upserted into a SQLite
+database instead of only being written to categorised_output.json, so
+spend can be analysed across runs without rescanning files.
+
+  - Upserts are idempotent: a transaction is identified by statement, date,
+    amount and merchant (plus its occurrence number, so two identical
+    purchases on the same day are both kept). Re-running a statement only
+    updates categories that changed.
+  - transactions is indexed on date, llm_category and merchant.
+  - Monthly per-category and per-merchant totals, and all-time merchant
+    totals, are maintained by triggers on every insert/update/delete, so the
+    summary queries read small aggregate tables instead of scanning the
+    ledger. Only spend is aggregated: credits (txn_type 'cr', i.e. salary
+    and inward transfers) are kept in the ledger but not in the totals.
+
+Statement dates have no year ("06 Aug"); it is taken from the statement
+period, which is read from the file name ("AUG 2025_....pdf") unless given.
+
+You can override the location via:
+  - SPEND_LEDGER_PATH
+
+Run from backend/:
+    python spendLedger.py --by-category --top-merchants 10
+"""
+
+import argparse
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter
+from decimal import Decimal, InvalidOperation
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from categoriser.categoryCache import normaliseMerchant
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LEDGER_PATH = Path(__file__).parent / "ledger" / "spend_ledger.sqlite3"
+
+MONTHS = ("JAN", "FEB", "MAR", "APR", "MAY", "JUN", "JUL", "AUG", "SEP", "OCT", "NOV", "DEC")
+
+_PERIOD = re.compile(
+    r"\b(" + "|".join(MONTHS) + r")[A-Z]*[\s_-]*(\d{4})(?!\d)", re.IGNORECASE
+)
+_DATE = re.compile(r"^\s*(\d{1,2})\s*([A-Za-z]{3})", re.IGNORECASE)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS transactions (
+    id INTEGER PRIMARY KEY,
+    statement TEXT NOT NULL,
+    date TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    posted_on TEXT,
+    month TEXT NOT NULL,
+    amount_cents INTEGER NOT NULL,
+    merchant TEXT NOT NULL,
+    txn_type TEXT,
+    llm_category TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    UNIQUE (statement, date, amount_cents, merchant, seq)
+);
+CREATE INDEX IF NOT EXISTS idx_transactions_posted_on ON transactions (posted_on);
+CREATE INDEX IF NOT EXISTS idx_transactions_category ON transactions (llm_category, month);
+CREATE INDEX IF NOT EXISTS idx_transactions_merchant ON transactions (merchant, month);
+
+CREATE TABLE IF NOT EXISTS monthly_category (
+    month TEXT NOT NULL,
+    llm_category TEXT NOT NULL,
+    total_cents INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (month, llm_category)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS monthly_merchant (
+    month TEXT NOT NULL,
+    merchant TEXT NOT NULL,
+    llm_category TEXT NOT NULL,
+    total_cents INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (month, merchant, llm_category)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_monthly_merchant_category
+    ON monthly_merchant (llm_category, month);
+
+CREATE TABLE IF NOT EXISTS merchant_totals (
+    merchant TEXT PRIMARY KEY,
+    total_cents INTEGER NOT NULL,
+    count INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_merchant_totals_total ON merchant_totals (total_cents);
+"""
+
+# Transaction types that are money in, not spend: kept out of the aggregates
+CREDIT_TYPE = "cr"
+
+# Each trigger moves a row's amount out of (OLD) and/or into (NEW) its
+# aggregate buckets, skipping credits; buckets that become empty are dropped
+_ADD = f"""
+    INSERT INTO monthly_category (month, llm_category, total_cents, count)
+    SELECT NEW.month, NEW.llm_category, NEW.amount_cents, 1
+    WHERE NEW.txn_type IS NOT '{CREDIT_TYPE}'
+    ON CONFLICT (month, llm_category) DO UPDATE SET
+        total_cents = total_cents + excluded.total_cents, count = count + 1;
+    INSERT INTO monthly_merchant (month, merchant, llm_category, total_cents, count)
+    SELECT NEW.month, NEW.merchant, NEW.llm_category, NEW.amount_cents, 1
+    WHERE NEW.txn_type IS NOT '{CREDIT_TYPE}'
+    ON CONFLICT (month, merchant, llm_category) DO UPDATE SET
+        total_cents = total_cents + excluded.total_cents, count = count + 1;
+    INSERT INTO merchant_totals (merchant, total_cents, count)
+    SELECT NEW.merchant, NEW.amount_cents, 1
+    WHERE NEW.txn_type IS NOT '{CREDIT_TYPE}'
+    ON CONFLICT (merchant) DO UPDATE SET
+        total_cents = total_cents + excluded.total_cents, count = count + 1;
+"""
+_REMOVE = f"""
+    UPDATE monthly_category SET total_cents = total_cents - OLD.amount_cents, count = count - 1
+    WHERE month = OLD.month AND llm_category = OLD.llm_category
+      AND OLD.txn_type IS NOT '{CREDIT_TYPE}';
+    DELETE FROM monthly_category
+    WHERE month = OLD.month AND llm_category = OLD.llm_category AND count <= 0;
+    UPDATE monthly_merchant SET total_cents = total_cents - OLD.amount_cents, count = count - 1
+    WHERE month = OLD.month AND merchant = OLD.merchant AND llm_category = OLD.llm_category
+      AND OLD.txn_type IS NOT '{CREDIT_TYPE}';
+    DELETE FROM monthly_merchant
+    WHERE month = OLD.month AND merchant = OLD.merchant AND llm_category = OLD.llm_category
+      AND count <= 0;
+    UPDATE merchant_totals SET total_cents = total_cents - OLD.amount_cents, count = count - 1
+    WHERE merchant = OLD.merchant AND OLD.txn_type IS NOT '{CREDIT_TYPE}';
+    DELETE FROM merchant_totals WHERE merchant = OLD.merchant AND count <= 0;
+"""
+_TRIGGERS = f"""
+CREATE TRIGGER IF NOT EXISTS transactions_ai AFTER INSERT ON transactions BEGIN
+{_ADD}
+END;
+CREATE TRIGGER IF NOT EXISTS transactions_ad AFTER DELETE ON transactions BEGIN
+{_REMOVE}
+END;
+CREATE TRIGGER IF NOT EXISTS transactions_au
+AFTER UPDATE OF month, amount_cents, merchant, txn_type, llm_category ON transactions BEGIN
+{_REMOVE}
+{_ADD}
+END;
+"""
+
+# Bumped whenever the triggers change; older ledgers get their triggers
+# recreated and aggregates rebuilt from the transactions table on open
+_SCHEMA_VERSION = 1
+_REBUILD = f"""
+DROP TRIGGER IF EXISTS transactions_ai;
+DROP TRIGGER IF EXISTS transactions_ad;
+DROP TRIGGER IF EXISTS transactions_au;
+DELETE FROM monthly_category;
+DELETE FROM monthly_merchant;
+DELETE FROM merchant_totals;
+INSERT INTO monthly_category (month, llm_category, total_cents, count)
+SELECT month, llm_category, SUM(amount_cents), COUNT(*) FROM transactions
+WHERE txn_type IS NOT '{CREDIT_TYPE}' GROUP BY month, llm_category;
+INSERT INTO monthly_merchant (month, merchant, llm_category, total_cents, count)
+SELECT month, merchant, llm_category, SUM(amount_cents), COUNT(*) FROM transactions
+WHERE txn_type IS NOT '{CREDIT_TYPE}' GROUP BY month, merchant, llm_category;
+INSERT INTO merchant_totals (merchant, total_cents, count)
+SELECT merchant, SUM(amount_cents), COUNT(*) FROM transactions
+WHERE txn_type IS NOT '{CREDIT_TYPE}' GROUP BY merchant;
+"""
+
+
+def statementPeriod(name: str) -> Optional[Tuple[int, int]]:
+    """
+    (year, month) of a statement from a name like "AUG 2025_2025112615.pdf".
+    """
+    match = _PERIOD.search(name)
+    if not match:
+        return None
+    return int(match.group(2)), MONTHS.index(match.group(1).upper()[:3]) + 1
+
+
+def postedOn(date: str, period: Optional[Tuple[int, int]]) -> Optional[str]:
+    """
+    ISO date for a statement date like "06 Aug". Months after the statement
+    month belong to the previous year (a January statement with December
+    transactions).
+    """
+    match = _DATE.match(date or "")
+    if not match or period is None or match.group(2).upper() not in MONTHS:
+        return None
+    year, statement_month = period
+    month = MONTHS.index(match.group(2).upper()) + 1
+    if month > statement_month:
+        year -= 1
+    return f"{year:04d}-{month:02d}-{int(match.group(1)):02d}"
+
+
+def parseAmount(amount: str) -> Optional[int]:
+    """
+    "1,098.34" -> 109834 cents; None if the OCR'd amount is not a number.
+    """
+    try:
+        return int(Decimal(str(amount).replace(",", "").strip()) * 100)
+    except (InvalidOperation, ValueError):
+        return None
+
+
+class SpendLedger:
+    """
+    SQLite spend ledger with incrementally maintained monthly aggregates.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = Path(path or os.getenv("SPEND_LEDGER_PATH", DEFAULT_LEDGER_PATH))
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        if self._conn.execute("PRAGMA user_version").fetchone()[0] < _SCHEMA_VERSION:
+            self._conn.executescript(
+                f"BEGIN; {_REBUILD} PRAGMA user_version = {_SCHEMA_VERSION}; COMMIT;"
+            )
+        self._conn.executescript(_TRIGGERS)
+        self._conn.commit()
+
+    def upsert(
+        self,
+        statement: str,
+        transactions: Iterable[Any],
+        period: Optional[Tuple[int, int]] = None,
+    ) -> Dict[str, int]:
+        """
+        Insert or update a statement's categorised transactions.
+
+        Args:
+            statement: Statement identifier, e.g. its file name
+            transactions: Transaction records or dicts with date, amount,
+                company_person and llm_category
+            period: (year, month) of the statement; read from `statement` if omitted
+
+        Returns:
+            Counts of 'written' and 'skipped' (unparseable amount) transactions
+        """
+        period = period or statementPeriod(statement)
+        fallback_month = f"{period[0]:04d}-{period[1]:02d}" if period else "unknown"
+
+        rows = []
+        seen: Counter = Counter()
+        skipped = 0
+        now = time.time()
+        for transaction in transactions:
+            amount = parseAmount(transaction["amount"])
+            if amount is None:
+                skipped += 1
+                continue
+            date = transaction["date"]
+            merchant = normaliseMerchant(transaction["company_person"] or "")
+            key = (date, amount, merchant)
+            seen[key] += 1
+            posted = postedOn(date, period)
+            rows.append(
+                (
+                    statement,
+                    date,
+                    seen[key],
+                    posted,
+                    posted[:7] if posted else fallback_month,
+                    amount,
+                    merchant,
+                    transaction.get("category"),
+                    transaction.get("llm_category") or "misc",
+                    now,
+                )
+            )
+
+        with self._lock, self._conn:
+            self._conn.executemany(
+                """
+                INSERT INTO transactions (
+                    statement, date, seq, posted_on, month, amount_cents,
+                    merchant, txn_type, llm_category, updated_at
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (statement, date, amount_cents, merchant, seq) DO UPDATE SET
+                    posted_on = excluded.posted_on,
+                    month = excluded.month,
+                    txn_type = excluded.txn_type,
+                    llm_category = excluded.llm_category,
+                    updated_at = excluded.updated_at
+                WHERE llm_category IS NOT excluded.llm_category
+                   OR month IS NOT excluded.month
+                   OR txn_type IS NOT excluded.txn_type
+                """,
+                rows,
+            )
+        if skipped:
+            logger.warning("Ledger: skipped %d transactions with unreadable amounts", skipped)
+        return {"written": len(rows), "skipped": skipped}
+
+    def remove_statement(self, statement: str) -> int:
+        with self._lock, self._conn:
+            return self._conn.execute(
+                "DELETE FROM transactions WHERE statement = ?", (statement,)
+            ).rowcount
+
+    def spend_by_category(
+        self,
+        start_month: Optional[str] = None,
+        end_month: Optional[str] = None,
+        category: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Spend per category per month, from the maintained aggregates
+        (credits excluded).
+
+        Args:
+            start_month: First month to include, "YYYY-MM"
+            end_month: Last month to include, "YYYY-MM"
+            category: Only this llm_category
+        """
+        where, params = self._filters(start_month, end_month, category)
+        rows = self._query(
+            f"""
+            SELECT month, llm_category, total_cents, count FROM monthly_category
+            {where} ORDER BY month, total_cents DESC
+            """,
+            params,
+        )
+        return [
+            {"month": m, "llm_category": c, "total": cents / 100, "count": n}
+            for m, c, cents, n in rows
+        ]
+
+    def top_merchants(
+        self,
+        limit: int = 10,
+        start_month: Optional[str] = None,
+        end_month: Optional[str] = None,
+        category: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Merchants with the highest total spend (credits excluded), optionally
+        over a month range and/or within one category.
+        """
+        if not (start_month or end_month or category):
+            rows = self._query(
+                "SELECT merchant, total_cents, count FROM merchant_totals "
+                "ORDER BY total_cents DESC LIMIT ?",
+                [limit],
+            )
+            return [{"merchant": m, "total": cents / 100, "count": n} for m, cents, n in rows]
+
+        where, params = self._filters(start_month, end_month, category)
+        rows = self._query(
+            f"""
+            SELECT merchant, SUM(total_cents) AS cents, SUM(count) FROM monthly_merchant
+            {where} GROUP BY merchant ORDER BY cents DESC LIMIT ?
+            """,
+            params + [limit],
+        )
+        return [{"merchant": m, "total": cents / 100, "count": n} for m, cents, n in rows]
+
+    def count(self) -> int:
+        return self._query("SELECT COUNT(*) FROM transactions", [])[0][0]
+
+    @staticmethod
+    def _filters(start_month, end_month, category) -> Tuple[str, List[Any]]:
+        clauses, params = [], []
+        if start_month:
+            clauses.append("month >= ?")
+            params.append(start_month)
+        if end_month:
+            clauses.append("month <= ?")
+            params.append(end_month)
+        if category:
+            clauses.append("llm_category = ?")
+            params.append(category)
+        return ("WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def _query(self, sql: str, params: List[Any]) -> List[tuple]:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the SpendLens spend ledger")
+    parser.add_argument("--by-category", action="store_true", help="Spend per category per month")
+    parser.add_argument("--top-merchants", type=int, metavar="N", help="Top N merchants by spend")
+    parser.add_argument("--from", dest="start_month", help="First month, YYYY-MM")
+    parser.add_argument("--to", dest="end_month", help="Last month, YYYY-MM")
+    parser.add_argument("--category")
+    args = parser.parse_args()
+
+    ledger = SpendLedger()
+    print(f"{ledger.count()} transactions in {ledger.path}")
+    if args.by_category:
+        for row in ledger.spend_by_category(args.start_month, args.end_month, args.category):
+            print(f"{row['month']}  {row['llm_category']:<14} {row['total']:>12,.2f}  ({row['count']})")
+    if args.top_merchants:
+        for row in ledger.top_merchants(
+            args.top_merchants, args.start_month, args.end_month, args.category
+        ):
+            print(f"{row['merchant']:<40} {row['total']:>12,.2f}  ({row['count']})")
+    ledger.close()
+
+
+if __name__ == "__main__":
+    main()